@@ -65,12 +65,22 @@ def main():
     # Initialize language selection
     init_language()
 
+    # Apply pending migrations once per process; later reruns skip the database entirely
     try:
-        from db.schema_update import update_database_schema
-        update_database_schema()
+        from db.migrations import ensure_schema
+        ensure_schema()
     except Exception as e:
         logger.error(f"Database schema update failed: {str(e)}")
 
+    # Tie this rerun's statements to the session so reads after its own writes skip the replicas
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        from db.mysql_connection import MySQLConnection
+        ctx = get_script_run_ctx()
+        MySQLConnection().bind_session(ctx.session_id if ctx else None)
+    except Exception as e:
+        logger.error(f"Database session binding failed: {str(e)}")
+
     # Initialize the authentication UI
     auth_ui = AuthUI()
 
@@ -191,4 +201,8 @@ def main():
         render_llm_logs_tab()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    from db.query_stats import query_stats
+    
+    # Count the database statements issued by each rerun (DB_QUERY_STATS=true)
+    with query_stats.scope("rerun"):
+        main()
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Activity log templates for the Java Peer Review Training System.
+
+activity_log rows store a template ID and the template's parameters as JSON
+instead of the same free text in every language. The text is rendered when
+it is read, in the reader's language, from the language pack entry the
+template names:
+
+    "activity_review_completion": "Review completion with {accuracy:.1f}% accuracy, found {errors} errors"
+
+Badge names live in the badges table rather than the language packs, so the
+badge template stores the badge ID and the renderer is given the names.
+"""
+
+import json
+import logging
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from language import get_translations
+
+logger = logging.getLogger(__name__)
+
+# Legacy rows whose text matched no template keep it as {"text": ...}
+TEMPLATE_FREE_TEXT = 0
+TEMPLATE_REVIEW_COMPLETION = 1
+TEMPLATE_BADGE_EARNED = 2
+TEMPLATE_PERFECT_REVIEW = 3
+
+# Template ID -> language pack key. IDs are stored; never reuse or renumber one
+ACTIVITY_TEMPLATES: Dict[int, str] = {
+    TEMPLATE_FREE_TEXT: "activity_free_text",
+    TEMPLATE_REVIEW_COMPLETION: "activity_review_completion",
+    TEMPLATE_BADGE_EARNED: "activity_badge_earned",
+    TEMPLATE_PERFECT_REVIEW: "activity_perfect_review",
+}
+
+# Text the app wrote before templates, used to compact existing rows
+_LEGACY_REVIEW = re.compile(r"^Review completion with ([\d.]+)% accuracy, found (\d+) errors$")
+_LEGACY_BADGE = re.compile(r"^[^:]+:\s*(.+)$")
+
+
+def encode_params(params: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Serialize template parameters for the params column (None when empty)."""
+    return json.dumps(params, ensure_ascii=False, separators=(",", ":")) if params else None
+
+
+def render_activity(template_id: Optional[int], params: Any, lang: str,
+                    badge_names: Dict[str, str] = None) -> str:
+    """
+    Render an activity row's text in a language.
+
+    Args:
+        template_id: Row's template ID
+        params: Row's params column (JSON text or already decoded)
+        lang: Language code
+        badge_names: Badge ID to name in the language, for badge templates
+
+    Returns:
+        Localized text; the bare language key if the parameters do not fit the template
+    """
+    if isinstance(params, (str, bytes)):
+        params = json.loads(params)
+    params = dict(params or {})
+    if template_id == TEMPLATE_FREE_TEXT:
+        return params.get("text", "")
+    if "badge_id" in params:
+        params["badge"] = (badge_names or {}).get(params["badge_id"], params["badge_id"])
+
+    key = ACTIVITY_TEMPLATES.get(template_id)
+    if key is None:
+        return ""
+    template = get_translations(lang).get(key, key)
+    try:
+        return template.format(**params)
+    except (KeyError, ValueError, IndexError) as e:
+        logger.warning(f"Activity template {key} does not fit params {params}: {str(e)}")
+        return key
+
+
+def parse_legacy_details(activity_type: str, details: Optional[str],
+                         badge_ids_by_name: Dict[str, str]) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """
+    Map a pre-template activity row to a template and parameters.
+
+    Args:
+        activity_type: Row's activity_type
+        details: Row's details_en text
+        badge_ids_by_name: Badge name (any language) to badge ID
+
+    Returns:
+        Tuple of (template ID, params or None)
+    """
+    if activity_type == "perfect_review":
+        return TEMPLATE_PERFECT_REVIEW, None
+    if details and activity_type == "review_completion":
+        match = _LEGACY_REVIEW.match(details)
+        if match:
+            return TEMPLATE_REVIEW_COMPLETION, {"accuracy": float(match.group(1)), "errors": int(match.group(2))}
+    if details and activity_type == "badge_earned":
+        match = _LEGACY_BADGE.match(details)
+        badge_id = badge_ids_by_name.get(match.group(1).strip()) if match else None
+        if badge_id:
+            return TEMPLATE_BADGE_EARNED, {"badge_id": badge_id}
+    return TEMPLATE_FREE_TEXT, {"text": details} if details else None
@@ -4,8 +4,15 @@ Badge and rewards manager for the Java Peer Review Training System.
 
 import logging
 import datetime
+import os
+import threading
+import time
 import uuid
 from typing import Dict, Any, List, Optional, Tuple
+from auth.activity_templates import (
+    TEMPLATE_BADGE_EARNED, TEMPLATE_PERFECT_REVIEW, encode_params, render_activity
+)
+from auth.badge_rules import evaluate_rules, parse_snapshot, snapshot_query
 from db.mysql_connection import MySQLConnection
 from utils.language_utils import get_current_language, t
 
@@ -31,12 +38,30 @@ class BadgeManager:
             return
             
         self.db = MySQLConnection()
+        
+        # In-process leaderboard snapshots shared by every session's sidebar,
+        # one per class (None is the whole deployment)
+        self._leaderboards: Dict[Optional[str], Dict[str, Any]] = {}
+        self._leaderboard_lock = threading.Lock()
+        self.leaderboard_refresh_seconds = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "30"))
+        
+        # Ranks are recomputed for everyone in the background at most once per cycle
+        self.rank_refresh_seconds = float(os.getenv("RANK_REFRESH_SECONDS", "60"))
+        self._rank_lock = threading.Lock()
+        self._rank_refreshing = False
+        self._rank_refreshed_at = float("-inf")
+        self._rank_versions = None
+        
+        # Class of each user seen; assignments change rarely and only through assign_class
+        self._user_classes: Dict[str, str] = {}
+        
         self._initialized = True
         # Get current language on initialization and update when needed
         self.current_language = get_current_language()
     
 
-    def award_points(self, user_id: str, points: int, activity_type: str, details: str = None) -> Dict[str, Any]:
+    def award_points(self, user_id: str, points: int, activity_type: str, template_id: int = None,
+                     params: Dict[str, Any] = None, check_badges: bool = True) -> Dict[str, Any]:
         """
         Award points to a user and log the activity.
         
@@ -44,7 +69,10 @@ class BadgeManager:
             user_id: The user's ID
             points: Number of points to award
             activity_type: Type of activity (e.g., review_completion, error_found)
-            details: Optional details about the activity
+            template_id: Activity template describing the activity (see auth/activity_templates.py)
+            params: Parameters of the template
+            check_badges: Evaluate the badge rules afterwards; callers that
+                evaluate them once at the end of a larger update pass False
             
         Returns:
             Dict containing success status and updated point total
@@ -67,10 +95,14 @@ class BadgeManager:
            
             log_query = """
                     INSERT INTO activity_log 
-                    (user_id, activity_type, points, details_en, details_zh) 
+                    (user_id, activity_type, points, template_id, params) 
                     VALUES (%s, %s, %s, %s, %s)
                 """
-            self.db.execute_query(log_query, (user_id, activity_type, points, details, details))
+            self.db.execute_query(log_query, (user_id, activity_type, points, template_id, encode_params(params)))
+            self._record_daily_activity(
+                user_id, points=points, reviews=1 if activity_type == "review_completion" else 0
+            )
+            self.touch_class(user_id)
          
             
             # Get the updated total points
@@ -80,8 +112,9 @@ class BadgeManager:
             if result:
                 total_points = result.get("total_points", 0)
                 
-                # Check for any point-based badges
-                self._check_point_badges(user_id, total_points)
+                # The new total may cross a point-based badge threshold
+                if check_badges:
+                    self.evaluate_badges(user_id)
                 
                 return {"success": True, "total_points": total_points}
             else:
@@ -115,39 +148,41 @@ class BadgeManager:
             desc_field = f"description_{self.current_language}" if self.current_language == "en" or self.current_language == "zh" else "description_en"
             
             badge_query = f"SELECT badge_id, {name_field} as name, {desc_field} as description, points FROM badges WHERE badge_id = %s"
-            badge = self.db.execute_query(badge_query, (badge_id,), fetch_one=True)
+            badge = self.db.execute_query(badge_query, (badge_id,), fetch_one=True, cache_tables=("badges",))
             
             if not badge:
                 return {"success": False, "error": t("badge_not_found")}
             
-            # Check if the user already has this badge
-            has_badge_query = """
-                SELECT * FROM user_badges 
-                WHERE user_id = %s AND badge_id = %s
-            """
-            
-            existing = self.db.execute_query(has_badge_query, (user_id, badge_id), fetch_one=True)
-            
-            if existing:
-                return {"success": True, "badge": badge, "message": t("badge_already_awarded")}
-            
-            # Award the badge
+            # Award the badge and its points as one unit of work. INSERT IGNORE
+            # claims the badge atomically, so two concurrent awards cannot both
+            # add the points
             award_query = """
-                INSERT INTO user_badges 
+                INSERT IGNORE INTO user_badges 
                 (user_id, badge_id) 
                 VALUES (%s, %s)
             """
             
-            self.db.execute_query(award_query, (user_id, badge_id))
-            
-            # Award points for earning the badge
-            badge_points = badge.get("points", 10)
-            self.award_points(
-                user_id, 
-                badge_points,
-                "badge_earned",
-                f"{t('earned_badge')}: {badge.get('name')}"
-            )
+            with self.db.transaction():
+                inserted = self.db.execute_query(award_query, (user_id, badge_id))
+                if inserted is None:
+                    return {"success": False, "error": t("error_awarding_badge")}
+                if inserted == 0:
+                    return {"success": False, "badge": badge, "error": t("badge_already_awarded")}
+                
+                self.db.execute_query(
+                    "UPDATE users SET badge_count = badge_count + 1 WHERE uid = %s",
+                    (user_id,)
+                )
+                
+                # Award points for earning the badge
+                badge_points = badge.get("points", 10)
+                self.award_points(
+                    user_id, 
+                    badge_points,
+                    "badge_earned",
+                    TEMPLATE_BADGE_EARNED,
+                    {"badge_id": badge_id}
+                )
             
             return {
                 "success": True, 
@@ -159,6 +194,85 @@ class BadgeManager:
             logger.error(f"{t('error_awarding_badge')}: {str(e)}")
             return {"success": False, "error": str(e)}
     
+    def award_badges(self, user_id: str, badge_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Award several badges in one batch, skipping badges the user already has.
+        
+        Runs inside a single transaction: one lookup of the unearned badges, one
+        multi-row insert into user_badges, one points and badge_count update and
+        one multi-row insert into activity_log.
+        
+        Args:
+            user_id: The user's ID
+            badge_ids: Candidate badge IDs
+            
+        Returns:
+            List of newly awarded badge dictionaries
+        """
+        if not user_id or not badge_ids:
+            return []
+        
+        # Update current language
+        self.current_language = get_current_language()
+        
+        try:
+            name_field = f"name_{self.current_language}" if self.current_language == "en" or self.current_language == "zh" else "name_en"
+            desc_field = f"description_{self.current_language}" if self.current_language == "en" or self.current_language == "zh" else "description_en"
+            
+            with self.db.transaction() as tx:
+                # Lock the user row so concurrent submissions cannot award the same badge twice
+                user = tx.execute(
+                    "SELECT total_points FROM users WHERE uid = %s FOR UPDATE",
+                    (user_id,), fetch_one=True
+                )
+                if not user:
+                    return []
+                
+                placeholders = ", ".join(["%s"] * len(badge_ids))
+                badge_query = f"""
+                    SELECT badge_id, {name_field} as name, {desc_field} as description, points
+                    FROM badges
+                    WHERE badge_id IN ({placeholders})
+                    AND badge_id NOT IN (SELECT badge_id FROM user_badges WHERE user_id = %s)
+                """
+                new_badges = tx.execute(badge_query, (*badge_ids, user_id)) or []
+                
+                if not new_badges:
+                    return []
+                
+                tx.executemany(
+                    "INSERT INTO user_badges (user_id, badge_id) VALUES (%s, %s)",
+                    [(user_id, badge["badge_id"]) for badge in new_badges]
+                )
+                
+                badge_points = sum(badge.get("points", 10) for badge in new_badges)
+                tx.execute(
+                    "UPDATE users SET total_points = total_points + %s, badge_count = badge_count + %s WHERE uid = %s",
+                    (badge_points, len(new_badges), user_id)
+                )
+                
+                log_rows = [
+                    (user_id, "badge_earned", badge.get("points", 10), TEMPLATE_BADGE_EARNED,
+                     encode_params({"badge_id": badge["badge_id"]}))
+                    for badge in new_badges
+                ]
+                tx.executemany(
+                    """
+                    INSERT INTO activity_log 
+                    (user_id, activity_type, points, template_id, params) 
+                    VALUES (%s, %s, %s, %s, %s)
+                    """,
+                    log_rows
+                )
+                self._record_daily_activity(user_id, points=badge_points)
+                self.touch_class(user_id)
+            
+            return new_badges
+                
+        except Exception as e:
+            logger.error(f"{t('error_awarding_badge')}: {str(e)}")
+            return []
+    
     def get_user_badges(self, user_id: str) -> List[Dict[str, Any]]:
         """
         Get all badges earned by a user.
@@ -189,7 +303,7 @@ class BadgeManager:
                 ORDER BY ub.awarded_at DESC
             """
             
-            badges = self.db.execute_query(query, (user_id,))
+            badges = self.db.execute_query(query, (user_id,), cache_tables=("badges", "user_badges"))
             return badges or []
                 
         except Exception as e:
@@ -213,55 +327,91 @@ class BadgeManager:
         if not user_id or not category:
             return {"success": False, "error": t("invalid_user_id_or_category")}
         
-        try:
-            # Check if the stats exist
-            check_query = """
-                SELECT * FROM error_category_stats 
-                WHERE user_id = %s AND category = %s
-            """
+        result = self.update_category_stats_batch(
+            user_id, {category: {"encountered": encountered, "identified": identified}}
+        )
+        if not result["success"]:
+            return result
+        return {"success": True, "stats": result["stats"].get(category)}
+    
+    def update_category_stats_batch(self, user_id: str, category_stats: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+        """
+        Add one review's error counts for all its categories in a single statement.
+        
+        A multi-row upsert increments existing rows and inserts missing ones,
+        computing mastery_level in SQL, so concurrent submissions by the same
+        user cannot lose updates. The updated rows are then read back once and
+        the badge rules evaluated.
+        
+        Args:
+            user_id: The user's ID
+            category_stats: Mapping of category to {"encountered": n, "identified": n}
             
-            stats = self.db.execute_query(check_query, (user_id, category), fetch_one=True)
-            
-            if stats:
-                # Update existing stats
-                update_query = """
-                    UPDATE error_category_stats 
-                    SET encountered = encountered + %s,
-                        identified = identified + %s,
-                        mastery_level = CASE 
-                            WHEN (encountered + %s) > 0 THEN (identified + %s) / (encountered + %s) 
-                            ELSE 0 
-                        END
-                    WHERE user_id = %s AND category = %s
+        Returns:
+            Dict containing success status and the updated statistics keyed by category
+        """
+        if not user_id:
+            return {"success": False, "error": t("invalid_user_id_or_category")}
+        if not category_stats:
+            return {"success": True, "stats": {}}
+        
+        try:
+            rows = []
+            for category, counts in category_stats.items():
+                encountered = counts.get("encountered", 0)
+                identified = counts.get("identified", 0)
+                mastery = identified / encountered if encountered > 0 else 0
+                rows.append((user_id, category, encountered, identified, mastery))
+            
+            placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+            if self.db.dialect == "sqlite":
+                conflict = """
+                    ON CONFLICT (user_id, category) DO UPDATE SET
+                        mastery_level = CASE
+                            WHEN error_category_stats.encountered + excluded.encountered > 0
+                            THEN (error_category_stats.identified + excluded.identified) * 1.0
+                                 / (error_category_stats.encountered + excluded.encountered)
+                            ELSE 0
+                        END,
+                        encountered = error_category_stats.encountered + excluded.encountered,
+                        identified = error_category_stats.identified + excluded.identified,
+                        last_updated = CURRENT_TIMESTAMP
                 """
-                
-                self.db.execute_query(
-                    update_query, 
-                    (encountered, identified, encountered, identified, encountered, user_id, category)
-                )
             else:
-                # Insert new stats
-                insert_query = """
-                    INSERT INTO error_category_stats 
-                    (user_id, category, encountered, identified, mastery_level) 
-                    VALUES (%s, %s, %s, %s, %s)
+                # MySQL applies assignments left to right, so mastery_level must
+                # come first to see the old counts
+                conflict = """
+                    ON DUPLICATE KEY UPDATE
+                        mastery_level = CASE
+                            WHEN encountered + VALUES(encountered) > 0
+                            THEN (identified + VALUES(identified)) / (encountered + VALUES(encountered))
+                            ELSE 0
+                        END,
+                        encountered = encountered + VALUES(encountered),
+                        identified = identified + VALUES(identified)
                 """
-                
-                mastery = identified / encountered if encountered > 0 else 0
-                self.db.execute_query(insert_query, (user_id, category, encountered, identified, mastery))
-            
-            # Get the updated stats
-            updated_query = """
-                SELECT * FROM error_category_stats 
-                WHERE user_id = %s AND category = %s
+            upsert_query = f"""
+                INSERT INTO error_category_stats
+                (user_id, category, encountered, identified, mastery_level)
+                VALUES {placeholders}
+                {conflict}
             """
             
-            updated_stats = self.db.execute_query(updated_query, (user_id, category), fetch_one=True)
+            params = tuple(value for row in rows for value in row)
+            if self.db.execute_query(upsert_query, params) is None:
+                return {"success": False, "error": t("error_updating_category_stats")}
+            self.touch_class(user_id)
+            
+            all_stats = self.db.execute_query(
+                "SELECT * FROM error_category_stats WHERE user_id = %s", (user_id,)
+            ) or []
+            by_category = {row["category"]: row for row in all_stats}
+            updated = {category: by_category.get(category) for category in category_stats}
             
-            # Check for category mastery badges
-            self._check_category_mastery(user_id, category, updated_stats)
+            # Mastery and Full Spectrum badges
+            self.evaluate_badges(user_id)
             
-            return {"success": True, "stats": updated_stats}
+            return {"success": True, "stats": updated}
                 
         except Exception as e:
             logger.error(f"{t('error_updating_category_stats')}: {str(e)}")
@@ -287,17 +437,98 @@ class BadgeManager:
                 ORDER BY mastery_level DESC
             """
             
-            stats = self.db.execute_query(query, (user_id,))
+            stats = self.db.execute_query(query, (user_id,), cache_tables=("error_category_stats",))
             return stats or []
                 
         except Exception as e:
             logger.error(f"{t('error_getting_category_stats')}: {str(e)}")
             return []
     
+    def get_class_category_stats(self, class_id: str) -> List[Dict[str, Any]]:
+        """
+        Get error category totals across one class.
+        
+        Args:
+            class_id: Class ID ('' for users not assigned to a class)
+            
+        Returns:
+            One dict per category with encountered, identified, students and mastery_level
+        """
+        try:
+            stats = self.db.execute_query("""
+                SELECT c.category, SUM(c.encountered) AS encountered, SUM(c.identified) AS identified,
+                    COUNT(*) AS students
+                FROM users u
+                JOIN error_category_stats c ON c.user_id = u.uid
+                WHERE u.class_id = %s
+                GROUP BY c.category
+            """, (class_id,), cache_tables=(self.class_tag(class_id),)) or []
+            for row in stats:
+                row["mastery_level"] = row["identified"] / row["encountered"] if row["encountered"] else 0.0
+            stats.sort(key=lambda row: row["mastery_level"], reverse=True)
+            return stats
+        except Exception as e:
+            logger.error(f"{t('error_getting_category_stats')}: {str(e)}")
+            return []
+    
+    @staticmethod
+    def class_tag(class_id: str) -> str:
+        """Get the cache tag of a class; reads scoped to one class are cached under it."""
+        return f"class:{class_id}"
+    
+    def get_user_class(self, user_id: str) -> str:
+        """
+        Get the class a user belongs to.
+        
+        Args:
+            user_id: The user's ID
+            
+        Returns:
+            Class ID, '' for users not assigned to a class or unknown users
+        """
+        class_id = self._user_classes.get(user_id)
+        if class_id is None:
+            row = self.db.execute_query("SELECT class_id FROM users WHERE uid = %s", (user_id,), fetch_one=True)
+            if not row:
+                return ""
+            class_id = row["class_id"] or ""
+            self._user_classes[user_id] = class_id
+        return class_id
+    
+    def assign_class(self, user_id: str, class_id: str) -> bool:
+        """
+        Move a user to a class.
+        
+        Args:
+            user_id: The user's ID
+            class_id: Class ID ('' to unassign)
+            
+        Returns:
+            True if the user was found and updated
+        """
+        old_class = self.get_user_class(user_id)
+        updated = self.db.execute_query("UPDATE users SET class_id = %s WHERE uid = %s", (class_id or "", user_id))
+        if not updated:
+            return False
+        self._user_classes[user_id] = class_id or ""
+        self.db.invalidate_cache_tags([self.class_tag(old_class), self.class_tag(class_id or "")])
+        return True
+    
+    def touch_class(self, user_id: str) -> None:
+        """
+        Invalidate the class-scoped caches of a user's class after changing their data.
+        
+        Other classes' leaderboards and stats stay cached, which is the point of
+        tagging reads per class rather than with the users table.
+        """
+        self.db.invalidate_cache_tags([self.class_tag(self.get_user_class(user_id))])
+    
     def update_consecutive_days(self, user_id: str) -> Dict[str, Any]:
         """
         Update a user's consecutive days of activity.
         
+        The Consistency Champ badge is a rule; see evaluate_badges.
+        
         Args:
             user_id: The user's ID
             
@@ -350,10 +581,6 @@ class BadgeManager:
             
             self.db.execute_query(update_query, (today, new_consecutive_days, user_id))
             
-            # Check for consistency badges
-            if new_consecutive_days >= 5:
-                self.award_badge(user_id, "consistency-champ")
-            
             return {
                 "success": True, 
                 "consecutive_days": new_consecutive_days
@@ -363,12 +590,13 @@ class BadgeManager:
             logger.error(f"{t('error_updating_consecutive_days')}: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def get_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
+    def get_leaderboard(self, limit: int = 10, class_id: str = None) -> List[Dict[str, Any]]:
         """
         Get the user leaderboard by total points with multilingual support.
         
         Args:
             limit: Maximum number of users to return
+            class_id: Rank only this class, or every user when None
             
         Returns:
             List of user dictionaries with score and ranking
@@ -383,15 +611,18 @@ class BadgeManager:
             
             
             # Build query with appropriate fields
+            where, params, tags = "", (), ("users",)
+            if class_id is not None:
+                where, params, tags = "WHERE class_id = %s", (class_id,), (self.class_tag(class_id),)
             query = f"""
-                SELECT uid, {display_name_field} as display_name, total_points, {level_field} as level,
-                    (SELECT COUNT(*) FROM user_badges WHERE user_id = uid) AS badge_count
+                SELECT uid, {display_name_field} as display_name, total_points, {level_field} as level, badge_count
                 FROM users
+                {where}
                 ORDER BY total_points DESC
                 LIMIT %s
             """
             
-            leaders = self.db.execute_query(query, (limit,))
+            leaders = self.db.execute_query(query, params + (limit,), cache_tables=tags) or []
             
             # Add rank
             for i, leader in enumerate(leaders, 1):
@@ -403,9 +634,349 @@ class BadgeManager:
             logger.error(f"{t('error_getting_leaderboard')}: {str(e)}")
             return []
     
+    def _record_daily_activity(self, user_id: str, points: int = 0, reviews: int = 0,
+                               perfect_reviews: int = 0) -> None:
+        """
+        Add to today's user_daily_activity row alongside an activity_log insert.
+        
+        Joins the caller's transaction, so the rollup commits with the log row.
+        The date is the app's local date, the same one get_activity_history
+        reads back, rather than the database server's CURRENT_DATE.
+        """
+        if self.db.dialect == "sqlite":
+            conflict = """
+                ON CONFLICT (user_id, activity_date) DO UPDATE SET
+                    points = points + excluded.points,
+                    reviews = reviews + excluded.reviews,
+                    perfect_reviews = perfect_reviews + excluded.perfect_reviews
+            """
+        else:
+            conflict = """
+                ON DUPLICATE KEY UPDATE
+                    points = points + VALUES(points),
+                    reviews = reviews + VALUES(reviews),
+                    perfect_reviews = perfect_reviews + VALUES(perfect_reviews)
+            """
+        self.db.execute_query(f"""
+            INSERT INTO user_daily_activity (user_id, activity_date, points, reviews, perfect_reviews)
+            VALUES (%s, %s, %s, %s, %s)
+            {conflict}
+        """, (user_id, datetime.date.today(), points, reviews, perfect_reviews))
+    
+    def get_activity_history(self, user_id: str, days: int = 30) -> List[Dict[str, Any]]:
+        """
+        Get a user's points, reviews and perfect reviews per day from the rollup.
+        
+        Args:
+            user_id: The user's ID
+            days: Number of days up to and including today
+            
+        Returns:
+            One dict per day, oldest first, with zeros for inactive days
+        """
+        if not user_id:
+            return []
+        
+        try:
+            today = datetime.date.today()
+            start = today - datetime.timedelta(days=days - 1)
+            rows = self.db.execute_query("""
+                SELECT activity_date, points, reviews, perfect_reviews
+                FROM user_daily_activity
+                WHERE user_id = %s AND activity_date >= %s
+            """, (user_id, start), cache_tables=("user_daily_activity",)) or []
+            by_date = {row["activity_date"]: row for row in rows}
+            
+            history = []
+            for offset in range(days):
+                day = start + datetime.timedelta(days=offset)
+                row = by_date.get(day, {})
+                history.append({
+                    "date": day,
+                    "points": row.get("points", 0),
+                    "reviews": row.get("reviews", 0),
+                    "perfect_reviews": row.get("perfect_reviews", 0),
+                })
+            return history
+        except Exception as e:
+            logger.error(f"Error getting activity history: {str(e)}")
+            return []
+    
+    def get_activity_log(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get a user's most recent activity with its text in the current language.
+        
+        Args:
+            user_id: The user's ID
+            limit: Maximum number of entries
+            
+        Returns:
+            List of dicts with activity_type, points, created_at and details, newest first
+        """
+        if not user_id:
+            return []
+        
+        try:
+            self.current_language = get_current_language()
+            lang = self.current_language if self.current_language in ["en", "zh"] else "en"
+            
+            rows = self.db.execute_query("""
+                SELECT activity_type, points, template_id, params, created_at
+                FROM activity_log
+                WHERE user_id = %s
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s
+            """, (user_id, limit), cache_tables=("activity_log",)) or []
+            
+            badge_names = {}
+            if any(row["template_id"] == TEMPLATE_BADGE_EARNED for row in rows):
+                badges = self.db.execute_query(
+                    f"SELECT badge_id, name_{lang} AS name FROM badges", cache_tables=("badges",)
+                ) or []
+                badge_names = {badge["badge_id"]: badge["name"] for badge in badges}
+            
+            return [
+                {
+                    "activity_type": row["activity_type"],
+                    "points": row["points"],
+                    "created_at": row["created_at"],
+                    "details": render_activity(row["template_id"], row["params"], lang, badge_names),
+                }
+                for row in rows
+            ]
+        except Exception as e:
+            logger.error(f"Error getting activity log: {str(e)}")
+            return []
+    
+    def get_period_leaderboard(self, days: int = 7, limit: int = 10,
+                               class_id: str = None) -> List[Dict[str, Any]]:
+        """
+        Get the leaderboard of points earned over the last days, e.g. "this week".
+        
+        Reads the daily rollup, so the cost depends on the users active in the
+        window rather than the size of activity_log.
+        
+        Args:
+            days: Number of days up to and including today
+            limit: Maximum number of users to return
+            class_id: Rank only this class, or every user when None
+            
+        Returns:
+            List of user dictionaries with period points, reviews and rank
+        """
+        try:
+            self.current_language = get_current_language()
+            display_name_field = f"display_name_{self.current_language}" if self.current_language in ["en", "zh"] else "display_name_en"
+            level_field = f"level_name_{self.current_language}" if self.current_language in ["en", "zh"] else "level_name_en"
+            
+            start = datetime.date.today() - datetime.timedelta(days=days - 1)
+            if class_id is None:
+                query = f"""
+                    SELECT u.uid, u.{display_name_field} as display_name, u.{level_field} as level,
+                        p.points AS period_points, p.reviews AS period_reviews
+                    FROM (
+                        SELECT user_id, SUM(points) AS points, SUM(reviews) AS reviews
+                        FROM user_daily_activity
+                        WHERE activity_date >= %s
+                        GROUP BY user_id
+                        ORDER BY points DESC, user_id
+                        LIMIT %s
+                    ) p
+                    JOIN users u ON u.uid = p.user_id
+                    ORDER BY p.points DESC, u.uid
+                """
+                params, tags = (start, limit), ("user_daily_activity", "users")
+            else:
+                # Walk the class's users and their rollup rows in the window
+                query = f"""
+                    SELECT u.uid, u.{display_name_field} as display_name, u.{level_field} as level,
+                        SUM(d.points) AS period_points, SUM(d.reviews) AS period_reviews
+                    FROM users u
+                    JOIN user_daily_activity d ON d.user_id = u.uid AND d.activity_date >= %s
+                    WHERE u.class_id = %s
+                    GROUP BY u.uid, u.{display_name_field}, u.{level_field}
+                    ORDER BY period_points DESC, u.uid
+                    LIMIT %s
+                """
+                params, tags = (start, class_id, limit), (self.class_tag(class_id),)
+            leaders = self.db.execute_query(query, params, cache_tables=tags) or []
+            
+            for i, leader in enumerate(leaders, 1):
+                leader["rank"] = i
+            return leaders
+        except Exception as e:
+            logger.error(f"{t('error_getting_leaderboard')}: {str(e)}")
+            return []
+    
+    def rebuild_daily_activity(self) -> bool:
+        """
+        Recompute user_daily_activity from activity_log.
+        
+        The rollup is maintained on every activity_log insert; this repairs it
+        after rows were written outside BadgeManager. The table is replaced in
+        one transaction.
+        
+        Returns:
+            True if the rollup was rebuilt
+        """
+        try:
+            with self.db.transaction() as tx:
+                tx.execute("DELETE FROM user_daily_activity")
+                tx.execute("""
+                    INSERT INTO user_daily_activity (user_id, activity_date, points, reviews, perfect_reviews)
+                    SELECT user_id, DATE(created_at), SUM(points),
+                        SUM(CASE WHEN activity_type = 'review_completion' THEN 1 ELSE 0 END),
+                        SUM(CASE WHEN activity_type = 'perfect_review' THEN 1 ELSE 0 END)
+                    FROM activity_log
+                    GROUP BY user_id, DATE(created_at)
+                """)
+            return True
+        except Exception as e:
+            logger.error(f"Error rebuilding daily activity: {str(e)}")
+            return False
+    
+    @staticmethod
+    def standings_keyset(cursor: Tuple[int, str], backward: bool = False,
+                         inclusive: bool = False) -> Tuple[str, tuple]:
+        """
+        Build the predicate selecting standings rows after (or before) a keyset cursor.
+        
+        Args:
+            cursor: (total_points, uid) of the row the page starts from
+            backward: Select rows before the cursor instead of after it
+            inclusive: Include the cursor row itself
+            
+        Returns:
+            Tuple of (SQL predicate on users aliased u, its parameters)
+        """
+        points, uid = cursor
+        strict = ">" if backward else "<"
+        # The leading bound keeps this an index range read; an OR alone
+        # makes the planner scan from the top
+        predicate = (f"u.total_points {strict}= %s "
+                     f"AND (u.total_points {strict} %s OR u.uid {strict}{'=' if inclusive else ''} %s)")
+        return predicate, (points, points, uid)
+    
+    def _standings_rows(self, class_id: str, cursor: Optional[Tuple[int, str]], limit: int,
+                        backward: bool = False, inclusive: bool = False) -> List[Dict[str, Any]]:
+        """
+        Read a class's standings rows after (or before) a (total_points, uid) keyset cursor.
+        
+        Rows are ordered by total_points DESC, uid DESC, the order of the
+        class's slice of idx_users_class_points_uid read backwards, so any page
+        is an index range read of `limit` rows however deep it is. Ranks come
+        from user_rank.
+        """
+        self.current_language = get_current_language()
+        display_name_field = f"display_name_{self.current_language}" if self.current_language in ["en", "zh"] else "display_name_en"
+        level_field = f"level_name_{self.current_language}" if self.current_language in ["en", "zh"] else "level_name_en"
+        
+        where, params = "WHERE u.class_id = %s", (class_id,)
+        if cursor is not None:
+            predicate, cursor_params = self.standings_keyset(cursor, backward, inclusive)
+            where += f" AND {predicate}"
+            params += cursor_params
+        order = "ASC" if backward else "DESC"
+        
+        query = f"""
+            SELECT u.uid, u.{display_name_field} as display_name, u.{level_field} as level,
+                u.total_points, u.badge_count, r.rank_pos
+            FROM users u
+            LEFT JOIN user_rank r ON r.uid = u.uid
+            {where}
+            ORDER BY u.total_points {order}, u.uid {order}
+            LIMIT %s
+        """
+        rows = self.db.execute_query(
+            query, params + (limit,), cache_tables=(self.class_tag(class_id), "user_rank")
+        ) or []
+        # RANK is a reserved word in MySQL 8, so the column keeps its own name in SQL
+        rows = [{**{k: v for k, v in row.items() if k != "rank_pos"}, "rank": row.get("rank_pos")} for row in rows]
+        return rows[::-1] if backward else rows
+    
+    def get_standings_page(self, cursor: Optional[Tuple[int, str]] = None, page_size: int = 50,
+                           backward: bool = False, class_id: str = "") -> Dict[str, Any]:
+        """
+        Get one page of a class's full standings using keyset pagination.
+        
+        Pass a page's next_cursor to get the following page, or its
+        prev_cursor with backward=True to get the one before it.
+        
+        Args:
+            cursor: (total_points, uid) the page starts after, or None for the top
+            page_size: Rows per page
+            backward: Read the page before the cursor instead of after it
+            class_id: Class to list ('' for users not assigned to a class)
+            
+        Returns:
+            Dict with rows (each with rank, display_name, level, total_points,
+            badge_count), next_cursor and prev_cursor (None at either end)
+        """
+        try:
+            self._schedule_rank_refresh()
+            # One extra row tells whether there is another page in that direction
+            rows = self._standings_rows(class_id, cursor, page_size + 1, backward)
+            more = len(rows) > page_size
+            if more:
+                rows = rows[1:] if backward else rows[:page_size]
+            return self._standings_page(rows, has_next=more if not backward else cursor is not None,
+                                        has_prev=more if backward else cursor is not None)
+        except Exception as e:
+            logger.error(f"{t('error_getting_leaderboard')}: {str(e)}")
+            return {"rows": [], "next_cursor": None, "prev_cursor": None}
+    
+    def get_standings_around_user(self, user_id: str, page_size: int = 50) -> Dict[str, Any]:
+        """
+        Get the standings page of a user's class that shows them, with about a third of it above them.
+        
+        Args:
+            user_id: The user's ID
+            page_size: Rows per page
+            
+        Returns:
+            get_standings_page result plus the user's rank and total_users
+            from get_user_rank; an empty page if the user is unknown
+        """
+        try:
+            user = self.db.execute_query(
+                "SELECT total_points FROM users WHERE uid = %s", (user_id,),
+                fetch_one=True, cache_tables=("users",)
+            )
+            if not user:
+                return {"rows": [], "next_cursor": None, "prev_cursor": None, "rank": 0, "total_users": 0}
+            
+            class_id = self.get_user_class(user_id)
+            key = (user["total_points"], user_id)
+            above = self._standings_rows(class_id, key, page_size // 3 + 1, backward=True)
+            has_prev = len(above) > page_size // 3
+            above = above[1:] if has_prev else above
+            below = self._standings_rows(class_id, key, page_size - len(above) + 1, inclusive=True)
+            has_next = len(below) > page_size - len(above)
+            rows = above + below[:page_size - len(above)]
+            
+            page = self._standings_page(rows, has_next=has_next, has_prev=has_prev)
+            page.update(self.get_user_rank(user_id))
+            return page
+        except Exception as e:
+            logger.error(f"{t('error_getting_leaderboard')}: {str(e)}")
+            return {"rows": [], "next_cursor": None, "prev_cursor": None, "rank": 0, "total_users": 0}
+    
+    @staticmethod
+    def _standings_page(rows: List[Dict[str, Any]], has_next: bool, has_prev: bool) -> Dict[str, Any]:
+        return {
+            "rows": rows,
+            "next_cursor": (rows[-1]["total_points"], rows[-1]["uid"]) if rows and has_next else None,
+            "prev_cursor": (rows[0]["total_points"], rows[0]["uid"]) if rows and has_prev else None,
+        }
+    
     def get_user_rank(self, user_id: str) -> Dict[str, Any]:
         """
-        Get a user's rank on the leaderboard.
+        Get a user's rank within their class.
+        
+        Ranks come from the user_rank table, which refresh_user_ranks()
+        rebuilds for all users once per RANK_REFRESH_SECONDS after points
+        change, so a lookup is a single primary-key read. Users who joined
+        or changed class since the last refresh are ranked live.
         
         Args:
             user_id: The user's ID
@@ -417,27 +988,38 @@ class BadgeManager:
             return {"rank": 0, "total_users": 0}
         
         try:
+            self._schedule_rank_refresh()
+            
+            class_id = self.get_user_class(user_id)
+            ranked = self.db.execute_query(
+                "SELECT rank_pos, total_users, class_id FROM user_rank WHERE uid = %s",
+                (user_id,), fetch_one=True, cache_tables=("user_rank",)
+            )
+            if ranked and ranked["class_id"] == class_id:
+                return {"rank": ranked["rank_pos"], "total_users": ranked["total_users"]}
+            
             # Get the user's points
             points_query = "SELECT total_points FROM users WHERE uid = %s"
-            result = self.db.execute_query(points_query, (user_id,), fetch_one=True)
+            result = self.db.execute_query(points_query, (user_id,), fetch_one=True, cache_tables=("users",))
             
             if not result:
                 return {"rank": 0, "total_users": 0}
             
             points = result.get("total_points", 0)
+            tag = self.class_tag(class_id)
             
-            # Get the user's rank
+            # Get the user's rank; both counts read the class's slice of idx_users_class_points_uid
             rank_query = """
                 SELECT COUNT(*) AS rank_pos
                 FROM users
-                WHERE total_points > %s
+                WHERE class_id = %s AND total_points > %s
             """
             
-            rank_result = self.db.execute_query(rank_query, (points,), fetch_one=True)
+            rank_result = self.db.execute_query(rank_query, (class_id, points), fetch_one=True, cache_tables=(tag,))
             
             # Get total users
-            total_query = "SELECT COUNT(*) AS total FROM users"
-            total_result = self.db.execute_query(total_query, fetch_one=True)
+            total_query = "SELECT COUNT(*) AS total FROM users WHERE class_id = %s"
+            total_result = self.db.execute_query(total_query, (class_id,), fetch_one=True, cache_tables=(tag,))
             
             return {
                 "rank": rank_result.get("rank_pos", 0) + 1,
@@ -448,143 +1030,178 @@ class BadgeManager:
             logger.error(f"{t('error_getting_user_rank')}: {str(e)}")
             return {"rank": 0, "total_users": 0}
     
-    def _check_point_badges(self, user_id: str, total_points: int) -> None:
+    def refresh_user_ranks(self) -> bool:
         """
-        Check if a user qualifies for any point-based badges.
+        Recompute every user's rank within their class into the user_rank table.
         
-        Args:
-            user_id: The user's ID
-            total_points: The user's total points
+        RANK() over total_points gives tied users the same rank and skips the
+        following positions, matching the live "users with more points + 1"
+        rule; partitioning by class_id ranks each class on its own. The table
+        is replaced in one transaction, so readers see either the old or the
+        new ranking.
+        
+        Returns:
+            True if the ranks were refreshed
         """
-        # Rising Star badge - 500 points in first week
-        if total_points >= 500:
-            # Check when the user joined
-            query = "SELECT created_at FROM users WHERE uid = %s"
-            result = self.db.execute_query(query, (user_id,), fetch_one=True)
-            
-            if result:
-                created_at = result.get("created_at")
-                now = datetime.datetime.now()
-                
-                if created_at and (now - created_at).days <= 7:
-                    self.award_badge(user_id, "rising-star")
+        try:
+            with self.db.transaction() as tx:
+                tx.execute("DELETE FROM user_rank")
+                tx.execute("""
+                    INSERT INTO user_rank (uid, rank_pos, total_points, total_users, class_id)
+                    SELECT uid,
+                        RANK() OVER (PARTITION BY class_id ORDER BY total_points DESC),
+                        total_points,
+                        COUNT(*) OVER (PARTITION BY class_id),
+                        class_id
+                    FROM users
+                """)
+            return True
+        except Exception as e:
+            logger.error(f"Error refreshing user ranks: {str(e)}")
+            return False
     
-    def _check_category_mastery(self, user_id: str, category: str, stats: Dict[str, Any]) -> None:
+    def repair_badge_counts(self) -> int:
         """
-        Check if a user qualifies for category mastery badges.
+        Recompute users.badge_count from user_badges where they disagree.
+        
+        badge_count is maintained by award_badge/award_badges; this repairs
+        drift from rows written outside them (manual fixes, imports).
+        
+        Returns:
+            Number of users whose count was corrected, or -1 on failure
+        """
+        fixed = self.db.execute_query("""
+            UPDATE users
+            SET badge_count = (SELECT COUNT(*) FROM user_badges WHERE user_badges.user_id = users.uid)
+            WHERE badge_count <> (SELECT COUNT(*) FROM user_badges WHERE user_badges.user_id = users.uid)
+        """)
+        if fixed is None:
+            return -1
+        if fixed:
+            logger.warning(f"Repaired badge_count for {fixed} users")
+        return fixed
+    
+    def _schedule_rank_refresh(self) -> None:
+        """Start a background rank refresh when the ranks are due for one."""
+        versions = self.db.query_cache.versions(("users",))
+        age = time.monotonic() - self._rank_refreshed_at
+        # Points changed through this process: refresh once per cycle. Otherwise
+        # refresh every ten cycles to pick up other processes' writes.
+        due = age >= self.rank_refresh_seconds if versions != self._rank_versions else age >= 10 * self.rank_refresh_seconds
+        if self._rank_refreshing or not due:
+            return
+        with self._rank_lock:
+            if self._rank_refreshing:
+                return
+            self._rank_refreshing = True
+        threading.Thread(target=self._refresh_ranks_in_background, args=(versions,),
+                         name="rank-refresh", daemon=True).start()
+    
+    def _refresh_ranks_in_background(self, versions: Tuple[int, ...]) -> None:
+        try:
+            if self.refresh_user_ranks():
+                self._rank_versions = versions
+            self._rank_refreshed_at = time.monotonic()
+        finally:
+            self._rank_refreshing = False
+    
+    def evaluate_badges(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Award every badge whose rule the user now meets.
+        
+        Reads the user's aggregates with one snapshot query, evaluates all
+        rules in auth.badge_rules in memory and awards the new badges in one
+        batch. Points from those badges are added to the snapshot and the rules
+        re-evaluated without another query.
         
         Args:
             user_id: The user's ID
-            category: The error category
-            stats: Category statistics
+            
+        Returns:
+            List of newly awarded badge dictionaries
         """
-        # Required mastery level and minimum encounters to earn the badge
-        MASTERY_THRESHOLD = 0.85
-        MIN_ENCOUNTERS = 10
+        if not user_id:
+            return []
         
-        if stats and stats.get("mastery_level", 0) >= MASTERY_THRESHOLD and stats.get("encountered", 0) >= MIN_ENCOUNTERS:
-            # Update current language before mapping categories
-            self.current_language = get_current_language()
-            
-            # Map categories to badge IDs - support both English and Chinese categories
-            # Categories are not translated with t() because they need to match exactly what's in the database
-            category_badges = {
-                t("logical"): "logic-guru",
-                "Logical": "logic-guru",
-                "邏輯錯誤": "logic-guru",  # Chinese equivalent
-                t("syntax"): "syntax-specialist",
-                "Syntax": "syntax-specialist",
-                "語法錯誤": "syntax-specialist",  # Chinese equivalent
-                t("code_quality"): "quality-inspector",
-                "Code Quality": "quality-inspector",
-                "程式碼品質": "quality-inspector",  # Chinese equivalent
-                t("standard_violation"): "standards-expert",
-                "Standard Violation": "standards-expert",
-                "標準違規": "standards-expert",  # Chinese equivalent
-                t("java_specific"): "java-maven",
-                "Java Specific": "java-maven",
-                "Java 特定錯誤": "java-maven"  # Chinese equivalent
-            }
-            
-            # Award the appropriate badge if available
-            badge_id = category_badges.get(category)
-            if badge_id:
-                self.award_badge(user_id, badge_id)
-            
-        # Check for "Full Spectrum" badge - at least one error in each category
-        query = """
-            SELECT COUNT(DISTINCT category) AS category_count
-            FROM error_category_stats
-            WHERE user_id = %s AND identified > 0
+        try:
+            query, params = snapshot_query(user_id)
+            row = self.db.execute_query(query, params, fetch_one=True)
+            if not row:
+                return []
+            return self._award_from_snapshot(user_id, parse_snapshot(row))
+        except Exception as e:
+            logger.error(f"{t('error_awarding_badge')}: {str(e)}")
+            return []
+    
+    def _award_from_snapshot(self, user_id: str, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Award the badges the metrics qualify for until no new rule holds."""
+        awarded = []
+        candidates = evaluate_rules(metrics)
+        while candidates:
+            new_badges = self.award_badges(user_id, candidates)
+            # Badges the user already had (e.g. awarded concurrently) count as earned too
+            metrics["earned"].update(candidates)
+            metrics["total_points"] += sum(badge.get("points", 10) for badge in new_badges)
+            awarded.extend(new_badges)
+            candidates = evaluate_rules(metrics) if new_badges else []
+        return awarded
+    
+    def evaluate_all_badges(self) -> int:
         """
+        Re-evaluate the badge rules for every user, e.g. after adding a rule.
         
-        result = self.db.execute_query(query, (user_id,), fetch_one=True)
+        Snapshots are streamed in one query; only users with new badges cause
+        further statements.
         
-        if result and result.get("category_count", 0) >= 5:  # Assuming 5 main categories
-            self.award_badge(user_id, "full-spectrum")
+        Returns:
+            Number of badges awarded, or -1 on error
+        """
+        try:
+            query, params = snapshot_query()
+            pending = []
+            for row in self.db.stream_query(query, params):
+                metrics = parse_snapshot(row)
+                if evaluate_rules(metrics):
+                    pending.append((row["uid"], metrics))
+            
+            awarded = sum(len(self._award_from_snapshot(uid, metrics)) for uid, metrics in pending)
+            logger.info(f"Badge re-evaluation awarded {awarded} badges to {len(pending)} users")
+            return awarded
+        except Exception as e:
+            logger.error(f"{t('error_awarding_badge')}: {str(e)}")
+            return -1
     
     def check_review_completion_badges(self, user_id: str, reviews_completed: int, 
                                     all_errors_found: bool) -> None:
         """
-        Check if a user qualifies for review completion badges.
+        Record a review's outcome and award the badges it earned.
         
         Args:
             user_id: The user's ID
-            reviews_completed: Number of reviews completed
+            reviews_completed: Number of reviews completed (the rules read the
+                stored count from the snapshot)
             all_errors_found: Whether all errors were found in the review
         """
-        # Review progression badges
-        if reviews_completed >= 5:
-            self.award_badge(user_id, "reviewer-novice")
-        
-        if reviews_completed >= 25:
-            self.award_badge(user_id, "reviewer-adept")
-        
-        if reviews_completed >= 50:
-            self.award_badge(user_id, "reviewer-master")
-        
-        # Bug Hunter badge - find all errors in at least 5 reviews
+        # Perfect reviews are counted for the Bug Hunter badge
         if all_errors_found:
-            # Count how many perfect reviews the user has
-            query = """
-                SELECT COUNT(*) AS perfect_count
-                FROM activity_log
-                WHERE user_id = %s AND activity_type = 'perfect_review'
-            """
-            
-            result = self.db.execute_query(query, (user_id,), fetch_one=True)
-            
-            if result and result.get("perfect_count", 0) >= 5:
-                self.award_badge(user_id, "bug-hunter")            
-          
-                self.db.execute_query(
-                    "INSERT INTO activity_log (user_id, activity_type, points, details_en, details_zh) VALUES (%s, %s, %s, %s, %s)",
-                    (user_id, "perfect_review", 0, t("completed_perfect_review"), t("completed_perfect_review"))
-                )
-          
-            
-            # Perfectionist badge - 3 consecutive perfect reviews
-            query = """
-                SELECT activity_type
-                FROM activity_log
-                WHERE user_id = %s
-                ORDER BY created_at DESC
-                LIMIT 3
-            """
-            
-            result = self.db.execute_query(query, (user_id,))
-            
-            if result and len(result) >= 3:
-                all_perfect = all(r.get("activity_type") == "perfect_review" for r in result)
-                if all_perfect:
-                    self.award_badge(user_id, "perfectionist")
+            self.db.execute_query(
+                "INSERT INTO activity_log (user_id, activity_type, points, template_id) VALUES (%s, %s, %s, %s)",
+                (user_id, "perfect_review", 0, TEMPLATE_PERFECT_REVIEW)
+            )
+            self._record_daily_activity(user_id, perfect_reviews=1)
+        
+        self.evaluate_badges(user_id)
 
-    def get_leaderboard_with_badges(self, limit: int = 10) -> List[Dict[str, Any]]:
+    def get_leaderboard_with_badges(self, limit: int = 10, class_id: str = None) -> List[Dict[str, Any]]:
         """
         Get the user leaderboard with badge icons for display.
         
+        Served from an in-process snapshot (see _get_leaderboard_snapshot), so
+        repeated calls cost no database work until points or badges change.
+        
         Args:
             limit: Maximum number of users to return
+            class_id: Rank only this class, or every user when None
             
         Returns:
             List of user dictionaries with badge icons and ranking
@@ -592,53 +1209,121 @@ class BadgeManager:
         try:
             # Update current language
             self.current_language = get_current_language()
-            
-            # Set display name and level fields based on language
-            display_name_field = f"display_name_{self.current_language}" if self.current_language in ["en", "zh"] else "display_name_en"
-            level_field = f"level_name_{self.current_language}" if self.current_language in ["en", "zh"] else "level_name_en"
-            
-            # Build query with appropriate fields
-            query = f"""
-                SELECT uid, {display_name_field} as display_name, total_points, {level_field} as level,
-                    (SELECT COUNT(*) FROM user_badges WHERE user_id = uid) AS badge_count
-                FROM users
-                WHERE total_points > 0
-                ORDER BY total_points DESC
-                LIMIT %s
-            """
-            
-            leaders = self.db.execute_query(query, (limit,))
-            
-            if not leaders:
-                return []
-            
-            # Add rank and get top badges for each user
-            for i, leader in enumerate(leaders, 1):
-                leader["rank"] = i
-                
-                # Get top 3 badges for this user
-                badge_query = f"""
-                    SELECT b.icon, b.{f"name_{self.current_language}" if self.current_language in ["en", "zh"] else "name_en"} as name,
-                        b.category, b.difficulty
-                    FROM badges b
-                    JOIN user_badges ub ON b.badge_id = ub.badge_id
-                    WHERE ub.user_id = %s
-                    ORDER BY 
-                        CASE b.difficulty 
-                            WHEN 'hard' THEN 3 
-                            WHEN 'medium' THEN 2 
-                            WHEN 'easy' THEN 1 
-                            ELSE 0 
-                        END DESC,
-                        ub.awarded_at DESC
-                    LIMIT 3
-                """
-                
-                badges = self.db.execute_query(badge_query, (leader["uid"],))
-                leader["top_badges"] = badges or []
-                    
+            lang = self.current_language if self.current_language in ["en", "zh"] else "en"
+            
+            leaders = []
+            for entry in self._get_leaderboard_snapshot(limit, class_id)[:limit]:
+                leaders.append({
+                    "uid": entry["uid"],
+                    "display_name": entry[f"display_name_{lang}"],
+                    "total_points": entry["total_points"],
+                    "level": entry[f"level_name_{lang}"],
+                    "badge_count": entry["badge_count"],
+                    "rank": entry["rank"],
+                    "top_badges": [
+                        {"icon": badge["icon"], "name": badge[f"name_{lang}"],
+                         "category": badge["category"], "difficulty": badge["difficulty"]}
+                        for badge in entry["top_badges"]
+                    ],
+                })
             return leaders
                 
         except Exception as e:
             logger.error(f"{t('error_getting_leaderboard')}: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+    
+    LEADERBOARD_SNAPSHOT_SIZE = 50
+    
+    def _get_leaderboard_snapshot(self, size: int, class_id: str = None) -> List[Dict[str, Any]]:
+        """
+        Get a leaderboard snapshot, rebuilding it when stale.
+        
+        The snapshot holds both languages and is rebuilt when the tables it
+        reads have been written through this process (tracked by the DB layer's
+        table versions) or when it is older than LEADERBOARD_REFRESH_SECONDS,
+        which picks up writes from other processes. A class's snapshot tracks
+        its class tag instead of the users and user_badges tables, so activity
+        in one class leaves the other classes' snapshots valid. If a rebuild
+        fails the previous snapshot keeps being served.
+        
+        Args:
+            size: Number of leaders the caller needs
+            class_id: Class to rank, or None for every user
+            
+        Returns:
+            Snapshot rows, best first
+        """
+        if class_id is None:
+            tables = ("users", "user_badges", "badges")
+        else:
+            tables = (self.class_tag(class_id), "badges")
+        snapshot = self._leaderboards.get(class_id)
+        if (snapshot is not None and snapshot["size"] >= size
+                and snapshot["versions"] == self.db.query_cache.versions(tables)
+                and time.monotonic() - snapshot["built_at"] < self.leaderboard_refresh_seconds):
+            return snapshot["rows"]
+        
+        with self._leaderboard_lock:
+            # Another session may have rebuilt it while we waited
+            snapshot = self._leaderboards.get(class_id)
+            versions = self.db.query_cache.versions(tables)
+            if (snapshot is not None and snapshot["size"] >= size and snapshot["versions"] == versions
+                    and time.monotonic() - snapshot["built_at"] < self.leaderboard_refresh_seconds):
+                return snapshot["rows"]
+            
+            size = max(size, self.LEADERBOARD_SNAPSHOT_SIZE)
+            rows = self._build_leaderboard_snapshot(size, class_id)
+            if rows is None:
+                return snapshot["rows"] if snapshot else []
+            self._leaderboards[class_id] = {"rows": rows, "size": size, "versions": versions, "built_at": time.monotonic()}
+            return rows
+    
+    def _build_leaderboard_snapshot(self, size: int, class_id: str = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Load the top users and their top badges in two queries.
+        
+        Args:
+            size: Number of leaders to load
+            class_id: Class to rank, or None for every user
+            
+        Returns:
+            Snapshot rows, or None if the database could not be read
+        """
+        where, params = "", ()
+        if class_id is not None:
+            where, params = "AND class_id = %s", (class_id,)
+        leaders = self.db.execute_query(f"""
+            SELECT uid, display_name_en, display_name_zh, level_name_en, level_name_zh, total_points, badge_count
+            FROM users
+            WHERE total_points > 0 {where}
+            ORDER BY total_points DESC, uid DESC
+            LIMIT %s
+        """, params + (size,))
+        if leaders is None:
+            return None
+        if not leaders:
+            return []
+        
+        # One batched badge query for the top badges of all leaders instead of one per leader
+        placeholders = ", ".join(["%s"] * len(leaders))
+        badges = self.db.execute_query(f"""
+            SELECT ub.user_id, ub.awarded_at, b.icon, b.name_en, b.name_zh, b.category, b.difficulty
+            FROM user_badges ub
+            JOIN badges b ON b.badge_id = ub.badge_id
+            WHERE ub.user_id IN ({placeholders})
+        """, tuple(leader["uid"] for leader in leaders))
+        if badges is None:
+            return None
+        
+        by_user: Dict[str, List[Dict[str, Any]]] = {}
+        for badge in badges:
+            by_user.setdefault(badge["user_id"], []).append(badge)
+        
+        difficulty_rank = {"hard": 3, "medium": 2, "easy": 1}
+        for rank, leader in enumerate(leaders, 1):
+            earned = by_user.get(leader["uid"], [])
+            # Hardest first, then most recent, as the per-leader query used to order them
+            earned.sort(key=lambda b: (difficulty_rank.get(b["difficulty"], 0), b["awarded_at"]), reverse=True)
+            leader["rank"] = rank
+            leader["top_badges"] = earned[:3]
+        return leaders
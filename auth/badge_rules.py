@@ -0,0 +1,147 @@
+"""
+Badge criteria for the Java Peer Review Training System.
+
+Every automatically awarded badge is a rule over one snapshot of a user's
+aggregates, read by a single query (SNAPSHOT_QUERY). Rules are evaluated in
+memory, so adding a badge over an existing metric adds no queries:
+
+    {"badge_id": "...", "min": {"metric": n}, "max": {"metric": n}}
+    {"badge_id": "...", "mastered_any": ("Category", ...)}
+
+"min" and "max" bounds must all hold; "mastered_any" holds when the user has
+mastered one of the categories (MASTERY_THRESHOLD over MIN_ENCOUNTERS).
+Badges granted for one-off events (e.g. tutorial-master) are awarded directly
+and have no rule.
+"""
+
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from language import SUPPORTED_LANGUAGES, get_translations
+
+# Required mastery level and minimum encounters for a category mastery badge
+MASTERY_THRESHOLD = 0.85
+MIN_ENCOUNTERS = 10
+
+
+def _category_names(key: str, *stored_names: str) -> Tuple[str, ...]:
+    """Every name a category can be stored under: its label in each language plus legacy names."""
+    names = {get_translations(lang).get(key, key) for lang in SUPPORTED_LANGUAGES}
+    return tuple(sorted(names.union(stored_names)))
+
+
+BADGE_RULES: List[Dict[str, Any]] = [
+    # Review progression
+    {"badge_id": "reviewer-novice", "min": {"reviews_completed": 5}},
+    {"badge_id": "reviewer-adept", "min": {"reviews_completed": 25}},
+    {"badge_id": "reviewer-master", "min": {"reviews_completed": 50}},
+    # Found every error in 5 reviews / in 3 reviews in a row
+    {"badge_id": "bug-hunter", "min": {"perfect_reviews": 5}},
+    {"badge_id": "perfectionist", "min": {"perfect_streak": 3}},
+    # Active 5 days in a row
+    {"badge_id": "consistency-champ", "min": {"consecutive_days": 5}},
+    # 500 points in the first week
+    {"badge_id": "rising-star", "min": {"total_points": 500}, "max": {"account_age_days": 7}},
+    # At least one error identified in each of the 5 categories
+    {"badge_id": "full-spectrum", "min": {"categories_identified": 5}},
+    # Category mastery
+    {"badge_id": "logic-guru", "mastered_any": _category_names("logical", "Logical", "邏輯錯誤")},
+    {"badge_id": "syntax-specialist", "mastered_any": _category_names("syntax", "Syntax", "語法錯誤")},
+    {"badge_id": "quality-inspector", "mastered_any": _category_names("code_quality", "Code Quality", "程式碼品質")},
+    {"badge_id": "standards-expert", "mastered_any": _category_names("standard_violation", "Standard Violation", "標準違規")},
+    {"badge_id": "java-maven", "mastered_any": _category_names("java_specific", "Java Specific", "Java 特定錯誤")},
+]
+
+# One row per user with every metric the rules read. GROUP_CONCAT uses its
+# default ',' separator, which MySQL and SQLite share.
+SNAPSHOT_QUERY = """
+    SELECT u.uid, u.reviews_completed, u.total_points, u.consecutive_days,
+        u.perfect_streak, u.created_at,
+        (SELECT COUNT(*) FROM activity_log a
+         WHERE a.user_id = u.uid AND a.activity_type = 'perfect_review') AS perfect_reviews,
+        (SELECT COUNT(*) FROM error_category_stats c
+         WHERE c.user_id = u.uid AND c.identified > 0) AS categories_identified,
+        (SELECT GROUP_CONCAT(c.category) FROM error_category_stats c
+         WHERE c.user_id = u.uid AND c.mastery_level >= %s AND c.encountered >= %s) AS mastered_categories,
+        (SELECT GROUP_CONCAT(ub.badge_id) FROM user_badges ub
+         WHERE ub.user_id = u.uid) AS earned_badges
+    FROM users u
+"""
+
+
+def snapshot_query(user_id: Optional[str] = None) -> Tuple[str, tuple]:
+    """
+    Get the snapshot query and its parameters.
+
+    Args:
+        user_id: Snapshot one user, or every user when None
+
+    Returns:
+        Tuple of (query, params)
+    """
+    params = (MASTERY_THRESHOLD, MIN_ENCOUNTERS)
+    if user_id is None:
+        return SNAPSHOT_QUERY, params
+    return SNAPSHOT_QUERY + " WHERE u.uid = %s", params + (user_id,)
+
+
+def _split(value: Optional[str]) -> set:
+    return set(value.split(",")) if value else set()
+
+
+def parse_snapshot(row: Dict[str, Any], now: datetime.datetime = None) -> Dict[str, Any]:
+    """
+    Turn a snapshot row into the metrics the rules read.
+
+    Args:
+        row: Row returned by the snapshot query
+        now: Reference time for account_age_days (defaults to now)
+
+    Returns:
+        Dict of metric name to value, plus "mastered" and "earned" sets
+    """
+    now = now or datetime.datetime.now()
+    created_at = row.get("created_at")
+    return {
+        "reviews_completed": row.get("reviews_completed") or 0,
+        "total_points": row.get("total_points") or 0,
+        "consecutive_days": row.get("consecutive_days") or 0,
+        "perfect_reviews": row.get("perfect_reviews") or 0,
+        "perfect_streak": row.get("perfect_streak") or 0,
+        "categories_identified": row.get("categories_identified") or 0,
+        "account_age_days": (now - created_at).days if created_at else None,
+        "mastered": _split(row.get("mastered_categories")),
+        "earned": _split(row.get("earned_badges")),
+    }
+
+
+def _holds(rule: Dict[str, Any], metrics: Dict[str, Any]) -> bool:
+    for metric, bound in rule.get("min", {}).items():
+        value = metrics.get(metric)
+        if value is None or value < bound:
+            return False
+    for metric, bound in rule.get("max", {}).items():
+        value = metrics.get(metric)
+        if value is None or value > bound:
+            return False
+    categories = rule.get("mastered_any")
+    if categories is not None and not metrics["mastered"].intersection(categories):
+        return False
+    return True
+
+
+def evaluate_rules(metrics: Dict[str, Any], rules: Iterable[Dict[str, Any]] = None) -> List[str]:
+    """
+    Get the badges a user qualifies for but has not earned yet.
+
+    Args:
+        metrics: Result of parse_snapshot
+        rules: Rules to evaluate (defaults to BADGE_RULES)
+
+    Returns:
+        Badge IDs in rule order
+    """
+    return [
+        rule["badge_id"] for rule in (BADGE_RULES if rules is None else rules)
+        if rule["badge_id"] not in metrics["earned"] and _holds(rule, metrics)
+    ]
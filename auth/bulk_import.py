@@ -0,0 +1,113 @@
+"""
+Student roster parsing and validation for bulk account provisioning.
+
+A roster is a CSV file with a header row or a JSON list of objects, one
+student each:
+
+    email,password,display_name,display_name_en,display_name_zh,level,class_id
+
+Only email and password are required. display_name fills whichever of the
+per-language names is missing, level is basic (default), medium or senior,
+and class_id overrides the class given to the whole import.
+
+Validation runs in memory before the database is touched; see
+MySQLAuthManager.bulk_register_users for the import itself.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+from typing import Any, Dict, List, Tuple
+
+LEVELS = ("basic", "medium", "senior")
+
+# Per-row outcomes reported by the import
+CREATED = "created"
+EXISTS = "exists"
+INVALID = "invalid"
+FAILED = "failed"
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_FIELDS = ("email", "password", "display_name", "display_name_en", "display_name_zh", "level", "class_id")
+
+
+def parse_roster(text: str, fmt: str) -> List[Dict[str, Any]]:
+    """
+    Parse a roster into one dict per student.
+
+    Args:
+        text: File contents
+        fmt: "csv" or "json"
+
+    Returns:
+        Student dicts in file order
+
+    Raises:
+        ValueError: If the format is unknown or the JSON is not a list of objects
+    """
+    if fmt == "csv":
+        return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+    if fmt == "json":
+        rows = json.loads(text)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("JSON roster must be a list of objects")
+        return rows
+    raise ValueError(f"Unsupported roster format: {fmt}")
+
+
+def read_roster(path: str) -> List[Dict[str, Any]]:
+    """Read a .csv or .json roster file."""
+    fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    with open(path, encoding="utf-8-sig") as f:
+        return parse_roster(f.read(), fmt)
+
+
+def _text(row: Dict[str, Any], field: str) -> str:
+    value = row.get(field)
+    return str(value).strip() if value is not None else ""
+
+
+def validate_roster(rows: List[Dict[str, Any]], class_id: str = "") -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Normalize roster rows and reject invalid ones.
+
+    Args:
+        rows: Parsed roster
+        class_id: Class of students whose row has none
+
+    Returns:
+        Tuple of (valid students, per-row results of the rejected ones). Each
+        valid student keeps its 1-based "row" number for reporting
+    """
+    valid, rejected = [], []
+    seen = set()
+    for number, row in enumerate(rows, 1):
+        email = _text(row, "email")
+        student = {field: _text(row, field) for field in _FIELDS}
+        student.update(row=number, email=email, level=student["level"].lower() or "basic")
+        student["class_id"] = student["class_id"] or class_id or ""
+        name = student.pop("display_name") or email.split("@")[0]
+        student["display_name_en"] = student["display_name_en"] or name
+        student["display_name_zh"] = student["display_name_zh"] or name
+
+        if not _EMAIL.match(email):
+            error = "Invalid email"
+        elif email.lower() in seen:
+            error = "Duplicate email in roster"
+        elif not student["password"]:
+            error = "Missing password"
+        elif student["level"] not in LEVELS:
+            error = f"Level must be one of {', '.join(LEVELS)}"
+        elif len(student["class_id"]) > 36:
+            error = "Class code is too long"
+        else:
+            error = None
+
+        if error:
+            rejected.append({"row": number, "email": email, "status": INVALID, "error": error})
+            continue
+        seen.add(email.lower())
+        valid.append(student)
+    return valid, rejected
@@ -6,11 +6,18 @@ MySQL-based authentication for Java Peer Review Training System.
 import logging
 import datetime
 import hashlib
+import json
+import time
 import uuid
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from db.mysql_connection import MySQLConnection
+from db.keys import new_user_id
+from db.event_queue import DONE, FAILED as EVENT_FAILED, EventQueue, EventWorker
+from auth.activity_templates import TEMPLATE_REVIEW_COMPLETION
 from auth.badge_manager import BadgeManager
-from utils.language_utils import set_language, get_current_language, t
+from auth.bulk_import import CREATED, EXISTS, FAILED, INVALID, LEVELS, validate_roster
+from language import get_translations
+from utils.language_utils import set_language, get_current_language, language_override, t
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +33,16 @@ class MySQLAuthManager:
     
     _instance = None
     
+    ALL_USERS_QUERY = """
+        SELECT uid, email, display_name_en, display_name_zh,
+        level_name_en, level_name_zh,
+        created_at, reviews_completed, total_points
+        FROM users
+    """
+    
+    # Event kind of a queued update_review_stats call
+    REVIEW_EVENT = "review_completion"
+    
     def __new__(cls):
         """Ensure singleton instance."""
         if cls._instance is None:
@@ -39,6 +56,14 @@ class MySQLAuthManager:
             return
             
         self.db = MySQLConnection()
+        
+        # Review completions are applied off the render path; starting the
+        # worker here also drains events left over from a previous process
+        self.review_queue = EventQueue()
+        self.review_worker = EventWorker(
+            self.review_queue, {self.REVIEW_EVENT: self._handle_review_event}, name="review-events"
+        )
+        self.review_worker.start()
         self._initialized = True
     
     def _hash_password(self, password: str) -> str:
@@ -89,8 +114,8 @@ class MySQLAuthManager:
 
     def register_user(self, email: str, password: str, display_name_en: str = None, display_name_zh: str = None,
                  level_name_en: str = None, 
-                 level_name_zh: str = None) -> Dict[str, Any]:
-        """Register a new user with multilingual support."""
+                 level_name_zh: str = None, class_id: str = None) -> Dict[str, Any]:
+        """Register a new user with multilingual support, optionally in a class."""
         # Check if email is already in use
         check_query = "SELECT email FROM users WHERE email = %s"
         result = self.db.execute_query(check_query, (email,), fetch_one=True)
@@ -98,8 +123,12 @@ class MySQLAuthManager:
         if result:
             return {"success": False, "error": "Email already in use"}
         
-        # Generate a unique user ID
-        user_id = str(uuid.uuid4())
+        class_id = (class_id or "").strip()
+        if len(class_id) > 36:
+            return {"success": False, "error": "Class code is too long"}
+        
+        # Generate a unique, time-ordered user ID
+        user_id = new_user_id()
         
         # Hash the password
         hashed_password = self._hash_password(password)
@@ -126,8 +155,10 @@ class MySQLAuthManager:
             set_language(current_lang)
         
         # Prepare the SQL query based on existing columns
-        columns = ["uid", "email", "display_name_en", "display_name_zh", "password", "level_name_en", "level_name_zh"]
-        values = [user_id, email, display_name_en, display_name_zh, hashed_password, level_name_en, level_name_zh]
+        columns = ["uid", "email", "display_name_en", "display_name_zh", "password", "level_name_en", "level_name_zh",
+                   "class_id"]
+        values = [user_id, email, display_name_en, display_name_zh, hashed_password, level_name_en, level_name_zh,
+                  class_id]
         
         # Create the SQL query
         columns_str = ", ".join(columns)
@@ -143,6 +174,7 @@ class MySQLAuthManager:
         
         if affected_rows:
             logger.debug(f"Registered new user: {email} (ID: {user_id})")
+            self.db.invalidate_cache_tags([BadgeManager.class_tag(class_id)])
             return {
                 "success": True,
                 "user_id": user_id,
@@ -150,11 +182,101 @@ class MySQLAuthManager:
                 "display_name_en": display_name_en,
                 "display_name_zh": display_name_zh,
                 "level_name_en": level_name_en,
-                "level_name_zh": level_name_zh
+                "level_name_zh": level_name_zh,
+                "class_id": class_id
             }
         else:
             return {"success": False, "error": "Error saving user data"}
     
+    def bulk_register_users(self, students: List[Dict[str, Any]], class_id: str = None,
+                            batch_size: int = 500) -> Dict[str, Any]:
+        """
+        Register a roster of students in one pass.
+        
+        Rows are validated in memory (see auth/bulk_import.py), checked against
+        existing accounts with one email lookup per 1000 rows, and inserted in
+        multi-row batches inside a single transaction, so a class of thousands
+        costs a handful of statements instead of three per student. If the
+        transaction fails, no account is created and every row that was going
+        to be inserted is reported as failed.
+        
+        Args:
+            students: Parsed roster rows (see auth.bulk_import.read_roster)
+            class_id: Class of students whose row has none
+            batch_size: Rows per multi-row INSERT
+            
+        Returns:
+            Dict with success status, counts per outcome, elapsed_ms and one
+            result per input row (row, email, status, user_id or error)
+        """
+        start = time.perf_counter()
+        valid, results = validate_roster(students, class_id or "")
+        
+        existing = set()
+        emails = [student["email"] for student in valid]
+        for i in range(0, len(emails), 1000):
+            chunk = emails[i:i + 1000]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            rows = self.db.execute_query(f"SELECT email FROM users WHERE email IN ({placeholders})", tuple(chunk))
+            if rows is None:
+                return {"success": False, "error": "Error checking existing emails"}
+            existing.update(row["email"].lower() for row in rows)
+        
+        new_students = []
+        for student in valid:
+            if student["email"].lower() in existing:
+                results.append({"row": student["row"], "email": student["email"], "status": EXISTS,
+                                "error": "Email already in use"})
+            else:
+                new_students.append(student)
+        
+        # SHA-256 of a short password takes about a microsecond, so hashing
+        # inline is cheaper than handing the work to a pool
+        level_names = {level: (get_translations("en").get(level, level), get_translations("zh").get(level, level))
+                       for level in LEVELS}
+        rows = [
+            (new_user_id(), student["email"], student["display_name_en"], student["display_name_zh"],
+             self._hash_password(student["password"]), *level_names[student["level"]], student["class_id"])
+            for student in new_students
+        ]
+        
+        error = None
+        try:
+            with self.db.transaction() as tx:
+                for i in range(0, len(rows), batch_size):
+                    tx.executemany("""
+                        INSERT INTO users
+                        (uid, email, display_name_en, display_name_zh, password, level_name_en, level_name_zh, class_id)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    """, rows[i:i + batch_size])
+                self.db.invalidate_cache_tags(
+                    {BadgeManager.class_tag(student["class_id"]) for student in new_students}
+                )
+        except Exception as e:
+            logger.error(f"Bulk registration of {len(rows)} users rolled back: {str(e)}")
+            error = str(e)
+        
+        for student, row in zip(new_students, rows):
+            if error is None:
+                results.append({"row": student["row"], "email": student["email"], "status": CREATED, "user_id": row[0]})
+            else:
+                results.append({"row": student["row"], "email": student["email"], "status": FAILED, "error": error})
+        results.sort(key=lambda result: result["row"])
+        
+        counts = {status: 0 for status in (CREATED, EXISTS, INVALID, FAILED)}
+        for result in results:
+            counts[result["status"]] += 1
+        logger.info(f"Bulk registration: {counts}")
+        outcome = {
+            "success": error is None,
+            **counts,
+            "elapsed_ms": (time.perf_counter() - start) * 1000,
+            "results": results,
+        }
+        if error is not None:
+            outcome["error"] = error
+        return outcome
+    
     def authenticate_user(self, email: str, password: str) -> Dict[str, Any]:
         """
         Authenticate user with email and password.
@@ -172,7 +294,7 @@ class MySQLAuthManager:
             query = """
             SELECT uid, email, password, display_name_en, display_name_zh, 
                 level_name_en, level_name_zh,
-                reviews_completed, score, tutorial_completed
+                reviews_completed, score, tutorial_completed, class_id
             FROM users 
             WHERE email = %s
             """
@@ -197,7 +319,8 @@ class MySQLAuthManager:
                     "level_name_zh": user_data["level_name_zh"],                    
                     "reviews_completed": user_data["reviews_completed"],
                     "score": user_data["score"],
-                    "tutorial_completed": user_data["tutorial_completed"]
+                    "tutorial_completed": user_data["tutorial_completed"],
+                    "class_id": user_data["class_id"]
                 }
             
                 
@@ -229,7 +352,7 @@ class MySQLAuthManager:
             WHERE uid = %s
             """
             
-            user_data = self.db.execute_query(query, (user_id,), fetch_one=True)
+            user_data = self.db.execute_query(query, (user_id,), fetch_one=True, cache_tables=("users",))
             
             if user_data:
                 return {
@@ -292,11 +415,73 @@ class MySQLAuthManager:
         affected_rows = self.db.execute_query(query, tuple(values))
         
         if affected_rows is not None:
+            # Names and levels show on the class's leaderboards
+            BadgeManager().touch_class(user_id)
             return {"success": True}
         else:
             return {"success": False, "error": "Error updating user data"}
     
-    def update_review_stats(self, user_id: str, accuracy: float, score: int = 0) -> Dict[str, Any]:
+    def enqueue_review_stats(self, user_id: str, accuracy: float, score: int = 0) -> Dict[str, Any]:
+        """
+        Queue a review completion for the background worker and return at once.
+        
+        The worker applies it with update_review_stats; poll the outcome with
+        get_review_stats_result. If the local queue cannot be written the
+        update is applied synchronously instead.
+        
+        Args:
+            user_id: The user's ID
+            accuracy: The accuracy of the review (0-100 percentage)
+            score: Number of errors detected in the review
+            
+        Returns:
+            Dict with success, queued and the event_key to poll, or the
+            update_review_stats result when applied synchronously
+        """
+        event_key = f"review:{user_id}:{uuid.uuid4().hex}"
+        # The worker has no session to read the reviewer's language from
+        payload = {"user_id": user_id, "accuracy": accuracy, "score": score, "lang": get_current_language()}
+        try:
+            self.review_queue.enqueue(self.REVIEW_EVENT, event_key, payload)
+        except Exception as e:
+            logger.error(f"Could not queue review stats for user {user_id}, applying now: {str(e)}")
+            return self.update_review_stats(user_id, accuracy, score)
+        
+        self.review_worker.start()
+        self.review_worker.wake()
+        return {"success": True, "queued": True, "event_key": event_key}
+    
+    def get_review_stats_result(self, event_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the outcome of a queued review completion.
+        
+        Args:
+            event_key: Key returned by enqueue_review_stats
+            
+        Returns:
+            The update_review_stats result, a failure dict once the event ran
+            out of retries, or None while it is still pending
+        """
+        event = self.review_queue.get(event_key)
+        if event is None:
+            return {"success": False, "error": "Unknown review event"}
+        if event["status"] == DONE:
+            return event["result"]
+        if event["status"] == EVENT_FAILED:
+            return {"success": False, "error": event["error"]}
+        return None
+    
+    def _handle_review_event(self, event_key: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a queued review completion; raising makes the worker retry it."""
+        with language_override(payload.get("lang")):
+            result = self.update_review_stats(payload["user_id"], payload["accuracy"], payload["score"],
+                                              event_key=event_key)
+        if not result.get("success", False):
+            raise RuntimeError(result.get("error", "Error updating review stats"))
+        return result
+    
+    def update_review_stats(self, user_id: str, accuracy: float, score: int = 0,
+                            event_key: str = None) -> Dict[str, Any]:
         """
         Update a user's review statistics with score and automatically upgrade user level based on score.
         Now also updates badges and point rewards.
@@ -305,6 +490,8 @@ class MySQLAuthManager:
             user_id: The user's ID
             accuracy: The accuracy of the review (0-100 percentage)
             score: Number of errors detected in the review
+            event_key: Idempotency key; a key that was already applied is
+                skipped, so a retried event is counted once
                 
         Returns:
             Dict containing success status and updated statistics
@@ -314,11 +501,82 @@ class MySQLAuthManager:
             logger.error("Database connection not initialized")
             return {"success": False, "error": "Database connection not initialized"}
         
-        # Get current stats
+        # The stats update, points, streak and badges commit together or not at all
+        try:
+            with self.db.transaction() as tx:
+                # The key commits with the stats, so it is recorded exactly when they are
+                if event_key and not tx.execute(
+                    "INSERT IGNORE INTO processed_events (event_key) VALUES (%s)", (event_key,)
+                ):
+                    logger.info(f"Review event {event_key} was already applied")
+                    return self._processed_event_result(event_key)
+                result = self._apply_review_stats(user_id, accuracy, score)
+                if not result.get("success", False):
+                    # Keep the event key unrecorded so the event can be retried
+                    tx.set_rollback_only()
+                elif event_key:
+                    tx.execute(
+                        "UPDATE processed_events SET result = %s WHERE event_key = %s",
+                        (json.dumps(result, default=str), event_key)
+                    )
+        except Exception as e:
+            logger.error(f"Error committing review stats for user {user_id}: {str(e)}")
+            return {"success": False, "error": "Error updating review stats"}
+        
+        if tx.rollback_only:
+            logger.error(f"Review stats update for user {user_id} was rolled back")
+            return {"success": False, "error": result.get("error", "Error updating review stats")}
+        
+        return result
+    
+    def _processed_event_result(self, event_key: str) -> Dict[str, Any]:
+        """Get the stored result of an already applied event, marked as a duplicate."""
+        row = self.db.execute_query(
+            "SELECT result FROM processed_events WHERE event_key = %s", (event_key,), fetch_one=True
+        )
+        result = json.loads(row["result"]) if row and row.get("result") else {"success": True}
+        result["duplicate"] = True
+        return result
+    
+    @staticmethod
+    def _level_for_score(current_level_en: str, new_score: int) -> Optional[Tuple[str, str]]:
+        """
+        Get the level a user moves up to at a new score (Basic -> Medium -> Senior).
+        
+        Args:
+            current_level_en: Current English level name
+            new_score: Score after the review
+            
+        Returns:
+            (level_name_en, level_name_zh) of the new level, or None if the level stays
+        """
+        current = current_level_en.lower()
+        if new_score > 200 and current != "senior":
+            return "Senior", "高級"
+        if 100 < new_score <= 200 and current == "basic":
+            return "Medium", "中級"
+        return None
+    
+    def _apply_review_stats(self, user_id: str, accuracy: float, score: int) -> Dict[str, Any]:
+        """
+        Apply a review completion: stats, level, points, streak and badges.
+        
+        Must run inside a transaction; see update_review_stats.
+        """
+        # Lock the row for the rest of the transaction so concurrent submissions
+        # for the same user (e.g. from two tabs) queue up instead of both reading
+        # the same counters and one increment getting lost. The lock lasts until
+        # commit whichever statement takes it: the points, streak and badge writes
+        # below update this row too and must commit with the stats.
+        #
+        # This read is the one round trip a single CASE-promoting UPDATE cannot
+        # replace: MySQL has no UPDATE ... RETURNING, and the result has to
+        # report the old and new level for the level-up animation
         query = """
             SELECT reviews_completed, score, level_name_en, level_name_zh 
             FROM users 
             WHERE uid = %s
+            FOR UPDATE
         """
         
         logger.debug(f"Executing query to get current stats for user {user_id}")
@@ -329,55 +587,30 @@ class MySQLAuthManager:
             return {"success": False, "error": "User not found"}
         
         # Calculate new stats
-        current_reviews = result["reviews_completed"]
-        current_score = result.get("score", 0)
-        current_level_en = result.get("level_name_en", "basic")  # Default to basic if not set
-        current_level_zh = result.get("level_name_zh", "基礎")   # Default to Chinese equivalent of basic
-        
-        new_reviews = current_reviews + 1
-        new_score = current_score + score
-        
-        # Determine if level upgrade is needed based on new score
-        new_level_en = current_level_en
-        new_level_zh = current_level_zh
-        
-        if new_score > 200:
-            # Senior level
-            if current_level_en != "Senior" and current_level_en != "senior":
-                new_level_en = "Senior"
-                new_level_zh = "高級"
-        elif new_score > 100 and (current_level_en == "Basic" or current_level_en == "basic"):
-            # Medium level
-            new_level_en = "Medium"
-            new_level_zh = "中級"
-        
-        # Only update level if it changed
-        level_changed = (new_level_en != current_level_en)
-        
-        # Update the database
-        if level_changed:
-            update_query = """
-                UPDATE users 
-                SET reviews_completed = %s, score = %s, 
-                level_name_en = %s, level_name_zh = %s 
-                WHERE uid = %s
-            """
-            
-            affected_rows = self.db.execute_query(
-                update_query, 
-                (new_reviews, new_score, new_level_en, new_level_zh, user_id)
-            )
-        else:
-            update_query = """
-                UPDATE users 
-                SET reviews_completed = %s, score = %s 
-                WHERE uid = %s
-            """
-            
-            affected_rows = self.db.execute_query(
-                update_query, 
-                (new_reviews, new_score, user_id)
-            )
+        current_level_en = result.get("level_name_en") or "basic"
+        new_reviews = result["reviews_completed"] + 1
+        new_score = (result.get("score") or 0) + score
+        
+        new_level = self._level_for_score(current_level_en, new_score)
+        level_changed = new_level is not None
+        
+        all_errors_found = accuracy >= 100.0
+        
+        # One write: relative increments, the level only when it moves up (as
+        # decided above from the locked row), and the perfect-review streak read
+        # by the Perfectionist badge rule
+        update_query = """
+            UPDATE users 
+            SET reviews_completed = reviews_completed + 1, score = score + %s,
+            level_name_en = COALESCE(%s, level_name_en), level_name_zh = COALESCE(%s, level_name_zh),
+            perfect_streak = CASE WHEN %s THEN perfect_streak + 1 ELSE 0 END
+            WHERE uid = %s
+        """
+        new_level_en, new_level_zh = new_level if level_changed else (None, None)
+        affected_rows = self.db.execute_query(
+            update_query,
+            (score, new_level_en, new_level_zh, all_errors_found, user_id)
+        )
         
         if affected_rows is not None and affected_rows >= 0:
             result = {
@@ -404,14 +637,15 @@ class MySQLAuthManager:
                 user_id, 
                 total_points,
                 "review_completion",
-                f"Review completion with {accuracy:.1f}% accuracy, found {score} errors"
+                TEMPLATE_REVIEW_COMPLETION,
+                {"accuracy": round(accuracy, 1), "errors": score},
+                check_badges=False
             )
             
             # Update consecutive days
             badge_manager.update_consecutive_days(user_id)
             
-            # Check for review completion badges
-            all_errors_found = accuracy >= 100.0
+            # Evaluate every badge rule once against the updated stats
             badge_manager.check_review_completion_badges(user_id, new_reviews, all_errors_found)
             
             return result
@@ -424,29 +658,42 @@ class MySQLAuthManager:
         # Get current language for field selection
         current_lang = get_current_language()
         
-        query = """
-            SELECT uid, email, display_name_en, display_name_zh,
-            level_name_en, level_name_zh,
-            created_at, reviews_completed, total_points
-            FROM users
-        """
-        
-        users = self.db.execute_query(query)
+        users = self.db.execute_query(self.ALL_USERS_QUERY)
         
         if users is None:
             return []
         
         # Process each user to select language-appropriate fields
         for user in users:
-            # Choose display name based on current language
-            display_name = user.get(f"display_name_{current_lang}") if current_lang in ["en", "zh"] else user.get("display_name_en", "")
-            user["display_name"] = display_name
-            
-            # Choose level based on current language
-            level_name = user.get(f"level_name_{current_lang}") if current_lang in ["en", "zh"] else user.get("level_name_en", "Basic")
-            user["level"] = level_name
-            
-            # Rename uid to user_id for consistency with the rest of the app
-            user["user_id"] = user.pop("uid")
+            self._localize_user(user, current_lang)
+        
+        return users
+    
+    def iter_all_users(self, fetch_size: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all users in constant memory, for exports and reports.
         
-        return users
\ No newline at end of file
+        Args:
+            fetch_size: Rows fetched per round trip (defaults to DB_STREAM_FETCH_SIZE)
+            
+        Yields:
+            User dicts shaped like the entries of get_all_users()
+        """
+        current_lang = get_current_language()
+        for user in self.db.stream_query(self.ALL_USERS_QUERY, fetch_size=fetch_size):
+            yield self._localize_user(user, current_lang)
+    
+    @staticmethod
+    def _localize_user(user: Dict[str, Any], current_lang: str) -> Dict[str, Any]:
+        """Add language-appropriate display_name/level and rename uid to user_id."""
+        # Choose display name based on current language
+        display_name = user.get(f"display_name_{current_lang}") if current_lang in ["en", "zh"] else user.get("display_name_en", "")
+        user["display_name"] = display_name
+        
+        # Choose level based on current language
+        level_name = user.get(f"level_name_{current_lang}") if current_lang in ["en", "zh"] else user.get("level_name_en", "Basic")
+        user["level"] = level_name
+        
+        # Rename uid to user_id for consistency with the rest of the app
+        user["user_id"] = user.pop("uid")
+        return user
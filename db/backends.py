@@ -0,0 +1,144 @@
+"""
+Database backends behind MySQLConnection.
+
+DB_BACKEND selects the implementation:
+
+    mysql   MySQL server through mysql-connector-python (default)
+    sqlite  in-process SQLite database file, see db/sqlite_backend.py
+
+A backend opens raw connections for the pool and knows its own error types;
+MySQLConnection provides pooling, retries, transactions and statistics on
+top of either.
+"""
+
+import copy
+import logging
+import os
+import traceback
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MySQLBackend:
+    """MySQL server reached over the network."""
+
+    dialect = "mysql"
+
+    def __init__(self):
+        import mysql.connector
+        self._connector = mysql.connector
+        self.errors = (mysql.connector.Error,)
+
+        # Get database configuration from environment variables
+        self.db_host = os.getenv("DB_HOST", "localhost")
+        self.db_user = os.getenv("DB_USER", "java_review_user")
+        self.db_password = os.getenv("DB_PASSWORD", "Selab@232")
+        self.db_name = os.getenv("DB_NAME", "java_review_trainer")
+        self.db_port = int(os.getenv("DB_PORT", "3306"))
+
+        # Opt-in fast path: C extension driver plus cached server-side prepared statements
+        self.use_c_extension = os.getenv("DB_USE_C_EXTENSION", "false").lower() == "true"
+        if self.use_c_extension and not mysql.connector.HAVE_CEXT:
+            logger.warning("MySQL C extension is not available, falling back to the pure Python driver")
+            self.use_c_extension = False
+        self.prepared_cache_size = int(os.getenv("DB_PREPARED_CACHE_SIZE", "32")) if self.use_c_extension else 0
+
+    def replica(self, address: str) -> "MySQLBackend":
+        """
+        Get a backend for a read replica with the same credentials and database.
+
+        Args:
+            address: Replica host, optionally with :port
+        """
+        replica = copy.copy(self)
+        host, _, port = address.partition(":")
+        replica.db_host = host
+        replica.db_port = int(port) if port else self.db_port
+        return replica
+
+    def describe(self) -> str:
+        return f"mysql:{self.db_user}@{self.db_host}:{self.db_port}/{self.db_name}"
+
+    def initialize(self) -> None:
+        """Create the database if it doesn't exist."""
+        try:
+            # First, connect without specifying a database to create it if needed
+            logger.debug(f"Initializing database: {self.db_name}")
+            init_conn = self._connector.connect(
+                host=self.db_host,
+                user=self.db_user,
+                password=self.db_password,
+                port=self.db_port
+            )
+
+            cursor = init_conn.cursor()
+
+            # Create database if it doesn't exist
+            logger.debug(f"Creating database if not exists: {self.db_name}")
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.db_name}")
+            cursor.execute(f"USE {self.db_name}")
+
+            # Commit changes and close connection
+            init_conn.commit()
+            cursor.close()
+            init_conn.close()
+
+            logger.debug("Database initialized successfully")
+
+        except self._connector.Error as e:
+            logger.error(f"Error initializing database: {str(e)}")
+            logger.error(traceback.format_exc())
+
+    def connect(self, use_pure: Optional[bool] = None):
+        """
+        Open a new MySQL connection for the pool.
+
+        Args:
+            use_pure: Force the pure Python (True) or C extension (False) driver;
+                defaults to the configured mode
+        """
+        if use_pure is None:
+            use_pure = not self.use_c_extension
+        # Log connection attempt
+        logger.debug(f"Connecting to MySQL: {self.db_user}@{self.db_host}:{self.db_port}/{self.db_name}")
+
+        # Add authentication_plugin parameter for compatibility
+        connection = self._connector.connect(
+            host=self.db_host,
+            user=self.db_user,
+            password=self.db_password,
+            database=self.db_name,
+            port=self.db_port,
+            auth_plugin='mysql_native_password',  # Try alternative auth method
+            use_pure=use_pure,  # Pure Python unless the C extension was opted into
+            autocommit=True  # Pooled connections must not keep a stale read snapshot between borrowers
+        )
+        logger.debug("Connected to MySQL successfully")
+        return connection
+
+    def is_alive(self, connection) -> bool:
+        return connection.is_connected()
+
+    def is_disconnect(self, error: Exception) -> bool:
+        # Common MySQL connection lost error codes
+        return "2006" in str(error) or "2013" in str(error)
+
+
+def get_backend():
+    """
+    Create the backend selected by DB_BACKEND.
+
+    Returns:
+        MySQLBackend or SQLiteBackend instance
+
+    Raises:
+        ValueError: If DB_BACKEND names an unknown backend
+    """
+    name = os.getenv("DB_BACKEND", "mysql").lower()
+    if name == "mysql":
+        return MySQLBackend()
+    if name == "sqlite":
+        from db.sqlite_backend import SQLiteBackend
+        return SQLiteBackend()
+    raise ValueError(f"Unknown DB_BACKEND '{name}', expected 'mysql' or 'sqlite'")
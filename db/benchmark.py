@@ -0,0 +1,610 @@
+"""
+Database benchmarks for the Java Peer Review Training System.
+
+Run against the database configured in the environment (DB_BACKEND=sqlite
+runs them without a MySQL server), e.g.:
+
+    python -m db.benchmark roundtrips --reviews 50
+    python -m db.benchmark decode --rows 1000
+    python -m db.benchmark rank --users 10000 100000 1000000
+    python -m db.benchmark hammer --threads 16 --reviews 10
+    python -m db.benchmark standings --users 100000 --pages 1 100 1000
+    python -m db.benchmark keys --users 100000
+    python -m db.benchmark provision --users 2000
+"""
+
+import argparse
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from auth.badge_rules import snapshot_query
+from db.mysql_connection import MySQLConnection
+
+BENCHMARK_USER_ID = "00000000-0000-0000-0000-00000000bench"
+BADGE_SNAPSHOT_QUERY, BADGE_SNAPSHOT_PARAMS = snapshot_query(BENCHMARK_USER_ID)
+
+# The statements one review completion issues through update_review_stats and
+# the badge chain behind it. Only reads and zero-row updates are used so the
+# benchmark is safe to run against a live database.
+REVIEW_COMPLETION_WORKLOAD: List[Tuple[str, tuple]] = [
+    ("SELECT reviews_completed, score, level_name_en, level_name_zh FROM users WHERE uid = %s FOR UPDATE", (BENCHMARK_USER_ID,)),
+    ("UPDATE users SET reviews_completed = reviews_completed + 1, score = score + %s, "
+     "level_name_en = COALESCE(%s, level_name_en), level_name_zh = COALESCE(%s, level_name_zh), "
+     "perfect_streak = CASE WHEN %s THEN perfect_streak + 1 ELSE 0 END WHERE uid = %s",
+     (0, None, None, False, BENCHMARK_USER_ID)),
+    ("UPDATE users SET total_points = total_points + %s WHERE uid = %s", (0, BENCHMARK_USER_ID)),
+    ("SELECT total_points FROM users WHERE uid = %s", (BENCHMARK_USER_ID,)),
+    ("SELECT last_activity, consecutive_days FROM users WHERE uid = %s", (BENCHMARK_USER_ID,)),
+    ("UPDATE users SET last_activity = last_activity WHERE uid = %s", (BENCHMARK_USER_ID,)),
+    (BADGE_SNAPSHOT_QUERY, BADGE_SNAPSHOT_PARAMS),
+    ("SELECT total_points FROM users WHERE uid = %s", (BENCHMARK_USER_ID,)),
+    ("SELECT COUNT(*) AS total FROM users", ()),
+]
+
+
+def bench_roundtrips(db: MySQLConnection, reviews: int) -> List[Dict[str, Any]]:
+    """
+    Compare round trips per review completion with and without ping-on-borrow.
+
+    Args:
+        db: Database connection manager
+        reviews: Number of simulated review completions per mode
+
+    Returns:
+        One result row per mode
+    """
+    results = []
+    original = db.pool.validate_on_borrow
+    try:
+        for label, validate_on_borrow in (("ping on borrow (before)", True), ("keepalive (after)", False)):
+            db.pool.validate_on_borrow = validate_on_borrow
+            pings_before = db.get_pool_stats()["validations"]
+            statements = 0
+            start = time.perf_counter()
+            for _ in range(reviews):
+                for query, params in REVIEW_COMPLETION_WORKLOAD:
+                    db.execute_query(query, params)
+                    statements += 1
+            elapsed = time.perf_counter() - start
+            pings = db.get_pool_stats()["validations"] - pings_before
+            results.append({
+                "mode": label,
+                "statements": statements,
+                "pings": pings,
+                "round_trips_per_review": (statements + pings) / reviews,
+                "ms_per_review": elapsed / reviews * 1000,
+            })
+    finally:
+        db.pool.validate_on_borrow = original
+    return results
+
+
+# Row-heavy reads whose decoding cost dominates the leaderboard and stats views
+DECODE_QUERIES: List[Tuple[str, str]] = [
+    ("leaderboard", """
+        SELECT uid, display_name_en, display_name_zh, total_points, level_name_en, level_name_zh, created_at
+        FROM users
+        ORDER BY total_points DESC
+        LIMIT %s
+    """),
+    ("category_stats", """
+        SELECT * FROM error_category_stats
+        ORDER BY mastery_level DESC
+        LIMIT %s
+    """),
+]
+
+
+def bench_decode(db: MySQLConnection, rows: int, repeats: int) -> List[Dict[str, Any]]:
+    """
+    Compare row decoding throughput of the pure Python and C extension drivers.
+
+    Each driver is measured with the text protocol and with a reused
+    server-side prepared statement.
+
+    Args:
+        db: Database connection manager
+        rows: LIMIT applied to each query
+        repeats: Executions per query and mode
+
+    Returns:
+        One result row per query and mode
+    """
+    import mysql.connector
+    
+    modes = [("pure", True)]
+    if mysql.connector.HAVE_CEXT:
+        modes.append(("cext", False))
+
+    results = []
+    for driver, use_pure in modes:
+        connection = db._create_connection(use_pure=use_pure)
+        try:
+            for prepared in (False, True):
+                for name, query in DECODE_QUERIES:
+                    cursor = connection.cursor(prepared=prepared, dictionary=True)
+                    fetched = 0
+                    start = time.perf_counter()
+                    for _ in range(repeats):
+                        cursor.execute(query, (rows,))
+                        fetched += len(cursor.fetchall())
+                    elapsed = time.perf_counter() - start
+                    cursor.close()
+                    results.append({
+                        "query": name,
+                        "driver": driver,
+                        "protocol": "prepared" if prepared else "text",
+                        "rows": fetched,
+                        "rows_per_sec": fetched / elapsed if elapsed else 0.0,
+                    })
+        finally:
+            connection.close()
+    return results
+
+
+def _live_rank(db: MySQLConnection, uid: str) -> Tuple[int, int]:
+    """Rank a user within their class the way get_user_rank did before the user_rank table: three queries."""
+    user = db.execute_query("SELECT total_points, class_id FROM users WHERE uid = %s", (uid,), fetch_one=True)
+    above = db.execute_query("SELECT COUNT(*) AS rank_pos FROM users WHERE class_id = %s AND total_points > %s",
+                             (user["class_id"], user["total_points"]), fetch_one=True)
+    total = db.execute_query("SELECT COUNT(*) AS total FROM users WHERE class_id = %s",
+                             (user["class_id"],), fetch_one=True)
+    return above["rank_pos"] + 1, total["total"]
+
+
+def bench_rank(db: MySQLConnection, sizes: List[int], lookups: int) -> List[Dict[str, Any]]:
+    """
+    Compare live rank counting with the precomputed user_rank table.
+    
+    The database is topped up with synthetic users (see db.query_plans) to
+    each size in turn, so only run this against a scratch database.
+    
+    Args:
+        db: Database connection manager
+        sizes: User counts to measure at, smallest first
+        lookups: Rank lookups of random users per size and method
+        
+    Returns:
+        One result row per size
+    """
+    from auth.badge_manager import BadgeManager
+    from db.query_plans import seed_users
+    
+    manager = BadgeManager()
+    results = []
+    for size in sorted(sizes):
+        current = db.execute_query("SELECT COUNT(*) AS total FROM users", fetch_one=True)["total"]
+        if current < size:
+            seed_users(db, size - current)
+        
+        sample = []
+        for _ in range(lookups):
+            row = db.execute_query("SELECT uid FROM users WHERE uid >= %s ORDER BY uid LIMIT 1",
+                                   (str(uuid.uuid4()),), fetch_one=True)
+            if row:
+                sample.append(row["uid"])
+        
+        start = time.perf_counter()
+        live = [_live_rank(db, uid) for uid in sample]
+        live_ms = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        manager.refresh_user_ranks()
+        refresh_ms = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        ranked = [
+            db.execute_query("SELECT rank_pos, total_users FROM user_rank WHERE uid = %s", (uid,), fetch_one=True)
+            for uid in sample
+        ]
+        table_ms = (time.perf_counter() - start) * 1000
+        
+        mismatches = sum(1 for (rank, total), row in zip(live, ranked)
+                         if not row or (row["rank_pos"], row["total_users"]) != (rank, total))
+        results.append({
+            "users": max(size, current),
+            "live_ms_per_lookup": live_ms / len(sample) if sample else 0.0,
+            "table_ms_per_lookup": table_ms / len(sample) if sample else 0.0,
+            "refresh_ms": refresh_ms,
+            "mismatches": mismatches,
+        })
+    return results
+
+
+def bench_hammer(db: MySQLConnection, threads: int, reviews: int,
+                 score_per_review: int = 3) -> List[Dict[str, Any]]:
+    """
+    Submit reviews for one user from many threads at once and check no update was lost.
+    
+    Registers a throwaway user, so only run this against a scratch database.
+    
+    Args:
+        db: Database connection manager
+        threads: Concurrent submitters
+        reviews: Reviews submitted by each thread
+        score_per_review: Errors found per review, added to the user's score
+        
+    Returns:
+        One result row with expected vs stored counters and level changes seen
+    """
+    from auth.mysql_auth import MySQLAuthManager
+    from utils.language_utils import language_override
+    
+    auth = MySQLAuthManager()
+    registered = auth.register_user(f"hammer-{uuid.uuid4().hex[:12]}@example.com", "hammer-password",
+                                    "Hammer", "Hammer", "basic", "基礎")
+    user_id = registered["user_id"]
+    
+    def submit(_: int) -> Tuple[int, int]:
+        ok = changes = 0
+        # Worker threads have no Streamlit session to read the language from
+        with language_override("en"):
+            for _ in range(reviews):
+                result = auth.update_review_stats(user_id, 50.0, score_per_review)
+                ok += bool(result.get("success"))
+                changes += bool(result.get("level_changed"))
+        return ok, changes
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        outcomes = list(executor.map(submit, range(threads)))
+    elapsed = time.perf_counter() - start
+    
+    succeeded = sum(ok for ok, _ in outcomes)
+    row = db.execute_query("SELECT reviews_completed, score, level_name_en FROM users WHERE uid = %s",
+                           (user_id,), fetch_one=True)
+    return [{
+        "submitted": threads * reviews,
+        "succeeded": succeeded,
+        "reviews_completed": row["reviews_completed"],
+        "score": row["score"],
+        "expected_score": succeeded * score_per_review,
+        "level": row["level_name_en"],
+        "level_changes": sum(changes for _, changes in outcomes),
+        "lost_updates": succeeded - row["reviews_completed"],
+        "reviews_per_sec": succeeded / elapsed if elapsed else 0.0,
+    }]
+
+
+# Projection, join and class filter of BadgeManager._standings_rows, so both
+# pagination methods read exactly the same rows the same way
+_STANDINGS_QUERY = """
+    SELECT u.uid, u.display_name_en AS display_name, u.level_name_en AS level,
+        u.total_points, u.badge_count, r.rank_pos
+    FROM users u
+    LEFT JOIN user_rank r ON r.uid = u.uid
+    WHERE u.class_id = %s {keyset}
+    ORDER BY u.total_points DESC, u.uid DESC
+    LIMIT %s {offset}
+"""
+
+
+def _best_ms(run, repeats: int) -> Tuple[float, Any]:
+    """Run a query function several times; return the fastest time and its result."""
+    best, result = None, None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = run()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_standings(db: MySQLConnection, size: int, page_size: int, pages: List[int],
+                    class_id: str = "", repeats: int = 5) -> List[Dict[str, Any]]:
+    """
+    Compare OFFSET and keyset pagination of a class's standings at increasing depth.
+    
+    Both sides run the standings query of BadgeManager.get_standings_page
+    directly, uncached and without its rank refresh, differing only in
+    LIMIT/OFFSET versus the keyset predicate. The database is topped up with
+    synthetic users (see db.query_plans) and about an eighth of them are
+    moved to another class, so only run this against a scratch database.
+    
+    Args:
+        db: Database connection manager
+        size: User count to measure at
+        page_size: Rows per page
+        pages: Page numbers (1-based) to fetch
+        class_id: Class whose standings are paged
+        repeats: Runs per query; the fastest is reported
+        
+    Returns:
+        One result row per page number
+    """
+    from auth.badge_manager import BadgeManager
+    from db.query_plans import seed_users
+    
+    current = db.execute_query("SELECT COUNT(*) AS total FROM users", fetch_one=True)["total"]
+    if current < size:
+        seed_users(db, size - current)
+    # Users of other classes must be filtered out, not just absent
+    other = "bench-other" if class_id != "bench-other" else "bench-other-2"
+    if not db.execute_query("SELECT uid FROM users WHERE class_id = %s LIMIT 1", (other,), fetch_one=True):
+        db.execute_query("UPDATE users SET class_id = %s WHERE class_id = %s AND uid > %s",
+                         (other, class_id, "e0000000-0000-0000-0000-000000000000"))
+    BadgeManager().refresh_user_ranks()
+    
+    offset_query = _STANDINGS_QUERY.format(keyset="", offset="OFFSET %s")
+    results = []
+    for page in sorted(pages):
+        offset = (page - 1) * page_size
+        offset_ms, by_offset = _best_ms(
+            lambda: db.execute_query(offset_query, (class_id, page_size, offset)), repeats
+        )
+        if not by_offset:
+            break
+        
+        # The cursor a reader paging from the top would hold: the row before the page
+        keyset, params = "", ()
+        if offset:
+            before = db.execute_query(offset_query, (class_id, 1, offset - 1), fetch_one=True)
+            predicate, params = BadgeManager.standings_keyset((before["total_points"], before["uid"]))
+            keyset = f"AND {predicate}"
+        keyset_query = _STANDINGS_QUERY.format(keyset=keyset, offset="")
+        keyset_ms, by_keyset = _best_ms(
+            lambda: db.execute_query(keyset_query, (class_id,) + params + (page_size,)), repeats
+        )
+        
+        results.append({
+            "page": page,
+            "offset_ms": offset_ms,
+            "keyset_ms": keyset_ms,
+            "same_rows": [row["uid"] for row in by_offset] == [row["uid"] for row in by_keyset],
+        })
+    return results
+
+
+# Text-keyed (before migration 10) and binary-keyed mirrors of the key-heavy
+# tables, built from the same rows so only the key type differs
+_KEY_MIRRORS = {
+    "VARCHAR(36)": ("keys_text_users", "keys_text_activity", "BIN_TO_UUID"),
+    "BINARY(16)": ("keys_bin_users", "keys_bin_activity", ""),
+}
+
+
+def _table_sizes(db: MySQLConnection, table: str) -> Tuple[int, int]:
+    """Get (data bytes, index bytes) of a table; the MySQL primary key is part of the data."""
+    if db.dialect == "sqlite":
+        rows = db.execute_query("""
+            SELECT m.type, SUM(s.pgsize) AS bytes
+            FROM dbstat s JOIN sqlite_master m ON m.name = s.name
+            WHERE m.tbl_name = %s
+            GROUP BY m.type
+        """, (table,))
+        sizes = {row["type"]: row["bytes"] for row in rows}
+        return sizes.get("table", 0), sizes.get("index", 0)
+    db.execute_query(f"ANALYZE TABLE {table}")
+    row = db.execute_query("""
+        SELECT data_length, index_length FROM information_schema.TABLES
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,), fetch_one=True)
+    return row["data_length"], row["index_length"]
+
+
+def bench_keys(db: MySQLConnection, size: int, lookups: int) -> List[Dict[str, Any]]:
+    """
+    Compare VARCHAR(36) and BINARY(16) user keys on the same seeded data.
+    
+    Copies users and activity_log into a text-keyed and a binary-keyed mirror
+    with the indexes the app uses, then measures their size and the
+    leaderboard, rank and per-user lookups on each. The database is topped up
+    with synthetic users (see db.query_plans), so only run this against a
+    scratch database.
+    
+    Args:
+        db: Database connection manager
+        size: User count to measure at
+        lookups: Rank and per-user lookups of random users per key type
+        
+    Returns:
+        One result row per key type
+    """
+    from db.query_plans import seed_users
+    
+    current = db.execute_query("SELECT COUNT(*) AS total FROM users", fetch_one=True)["total"]
+    if current < size:
+        seed_users(db, size - current)
+    # Seeded IDs are random, so the first IDs in key order are a random sample
+    sample = db.execute_query("SELECT uid, total_points FROM users ORDER BY uid LIMIT %s", (lookups,))
+    
+    results = []
+    binary_keys = db.binary_keys
+    try:
+        for key_type, (users, activity, to_key) in _KEY_MIRRORS.items():
+            for table in (users, activity):
+                db.execute_query(f"DROP TABLE IF EXISTS {table}")
+            db.execute_query(f"""
+                CREATE TABLE {users} (
+                    uid {key_type} PRIMARY KEY,
+                    class_id VARCHAR(36) NOT NULL,
+                    total_points INT NOT NULL
+                )
+            """)
+            db.execute_query(f"CREATE INDEX idx_{users}_class_points_uid ON {users} (class_id, total_points, uid)")
+            db.execute_query(f"""
+                CREATE TABLE {activity} (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    user_id {key_type} NOT NULL,
+                    activity_type VARCHAR(50) NOT NULL,
+                    points INT NOT NULL,
+                    created_at TIMESTAMP NULL
+                )
+            """)
+            db.execute_query(
+                f"CREATE INDEX idx_{activity}_user_type_created ON {activity} (user_id, activity_type, created_at)"
+            )
+            db.execute_query(f"INSERT INTO {users} SELECT {to_key}(uid), class_id, total_points FROM users")
+            db.execute_query(f"""
+                INSERT INTO {activity} (user_id, activity_type, points, created_at)
+                SELECT {to_key}(user_id), activity_type, points, created_at FROM activity_log
+            """)
+            users_data, users_index = _table_sizes(db, users)
+            activity_data, activity_index = _table_sizes(db, activity)
+            
+            # The text mirror is queried with plain strings, as before migration 10
+            db.binary_keys = key_type == "BINARY(16)"
+            start = time.perf_counter()
+            for _ in range(lookups):
+                db.execute_query(f"""
+                    SELECT uid, total_points FROM {users}
+                    WHERE class_id = %s ORDER BY total_points DESC, uid DESC LIMIT 50
+                """, ("",))
+            leaderboard_ms = (time.perf_counter() - start) * 1000 / lookups
+            
+            start = time.perf_counter()
+            for row in sample:
+                db.execute_query(f"SELECT COUNT(*) AS rank_pos FROM {users} WHERE class_id = %s AND total_points > %s",
+                                 ("", row["total_points"]), fetch_one=True)
+            rank_ms = (time.perf_counter() - start) * 1000 / len(sample)
+            
+            start = time.perf_counter()
+            for row in sample:
+                db.execute_query(f"SELECT total_points FROM {users} WHERE uid = %s", (row["uid"],), fetch_one=True)
+                db.execute_query(f"SELECT COUNT(*) AS n FROM {activity} WHERE user_id = %s AND activity_type = %s",
+                                 (row["uid"], "perfect_review"), fetch_one=True)
+            lookup_ms = (time.perf_counter() - start) * 1000 / len(sample)
+            db.binary_keys = binary_keys
+            
+            results.append({
+                "keys": key_type,
+                "users_kb": users_data // 1024,
+                "users_index_kb": users_index // 1024,
+                "activity_kb": activity_data // 1024,
+                "activity_index_kb": activity_index // 1024,
+                "leaderboard_ms": leaderboard_ms,
+                "rank_ms": rank_ms,
+                "user_lookup_ms": lookup_ms,
+            })
+    finally:
+        db.binary_keys = binary_keys
+        for users, activity, _ in _KEY_MIRRORS.values():
+            for table in (users, activity):
+                db.execute_query(f"DROP TABLE IF EXISTS {table}")
+    return results
+
+
+def bench_provision(db: MySQLConnection, users: int) -> List[Dict[str, Any]]:
+    """
+    Compare registering a roster one register_user call at a time with bulk_register_users.
+    
+    Registers 2 x users throwaway accounts, so only run this against a scratch database.
+    
+    Args:
+        db: Database connection manager
+        users: Accounts registered by each method
+        
+    Returns:
+        One result row per method
+    """
+    from auth.mysql_auth import MySQLAuthManager
+    
+    auth = MySQLAuthManager()
+    run_id = uuid.uuid4().hex[:8]
+    
+    def roster(method: str) -> List[Dict[str, Any]]:
+        return [{"email": f"provision-{run_id}-{method}-{i}@example.com", "password": f"password-{i}",
+                 "display_name": f"Student {i}"} for i in range(users)]
+    
+    results = []
+    start = time.perf_counter()
+    created = sum(
+        bool(auth.register_user(student["email"], student["password"], student["display_name"],
+                                student["display_name"]).get("success"))
+        for student in roster("single")
+    )
+    elapsed = time.perf_counter() - start
+    results.append({"method": "register_user per student (before)", "created": created,
+                    "seconds": elapsed, "accounts_per_sec": created / elapsed if elapsed else 0.0})
+    
+    start = time.perf_counter()
+    outcome = auth.bulk_register_users(roster("bulk"))
+    elapsed = time.perf_counter() - start
+    results.append({"method": "bulk_register_users (after)", "created": outcome.get("created", 0),
+                    "seconds": elapsed, "accounts_per_sec": outcome.get("created", 0) / elapsed if elapsed else 0.0})
+    return results
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    headers = list(rows[0].keys())
+    formatted = [[f"{row[h]:.2f}" if isinstance(row[h], float) else str(row[h]) for h in headers] for row in rows]
+    widths = [max(len(h), *(len(r[i]) for r in formatted)) for i, h in enumerate(headers)]
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    for r in formatted:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Database benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    roundtrips = subparsers.add_parser("roundtrips", help="Round trips per review completion")
+    roundtrips.add_argument("--reviews", type=int, default=50)
+
+    decode = subparsers.add_parser("decode", help="Rows/sec for pure Python vs C extension driver")
+    decode.add_argument("--rows", type=int, default=1000)
+    decode.add_argument("--repeats", type=int, default=20)
+
+    rank = subparsers.add_parser("rank", help="Live COUNT rank vs user_rank table (seeds a scratch database)")
+    rank.add_argument("--users", type=int, nargs="+", default=[10000, 100000, 1000000])
+    rank.add_argument("--lookups", type=int, default=200)
+
+    hammer = subparsers.add_parser("hammer", help="Concurrent review submissions for one user (registers a user)")
+    hammer.add_argument("--threads", type=int, default=16)
+    hammer.add_argument("--reviews", type=int, default=10)
+
+    standings = subparsers.add_parser("standings", help="OFFSET vs keyset standings pages (seeds a scratch database)")
+    standings.add_argument("--users", type=int, default=100000)
+    standings.add_argument("--page-size", type=int, default=50)
+    standings.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    standings.add_argument("--class-id", default="")
+
+    keys = subparsers.add_parser("keys", help="VARCHAR(36) vs BINARY(16) user keys (seeds a scratch database)")
+    keys.add_argument("--users", type=int, default=100000)
+    keys.add_argument("--lookups", type=int, default=200)
+
+    provision = subparsers.add_parser("provision", help="Per-student vs bulk registration (registers users)")
+    provision.add_argument("--users", type=int, default=2000)
+
+    args = parser.parse_args()
+    db = MySQLConnection()
+
+    if args.command == "roundtrips":
+        from db.migrations import run_migrations
+        run_migrations(db)
+        _print_table(bench_roundtrips(db, args.reviews))
+    elif args.command == "decode":
+        if db.dialect != "mysql":
+            parser.error("decode compares MySQL drivers and needs DB_BACKEND=mysql")
+        _print_table(bench_decode(db, args.rows, args.repeats))
+    elif args.command == "rank":
+        from db.migrations import run_migrations
+        run_migrations(db)
+        _print_table(bench_rank(db, args.users, args.lookups))
+    elif args.command == "hammer":
+        from db.migrations import run_migrations
+        run_migrations(db)
+        rows = bench_hammer(db, args.threads, args.reviews)
+        _print_table(rows)
+        if rows[0]["lost_updates"] or rows[0]["score"] != rows[0]["expected_score"]:
+            raise SystemExit(1)
+    elif args.command == "standings":
+        from db.migrations import run_migrations
+        run_migrations(db)
+        _print_table(bench_standings(db, args.users, args.page_size, args.pages, args.class_id))
+    elif args.command == "keys":
+        from db.migrations import run_migrations
+        run_migrations(db)
+        _print_table(bench_keys(db, args.users, args.lookups))
+    elif args.command == "provision":
+        from db.migrations import run_migrations
+        run_migrations(db)
+        _print_table(bench_provision(db, args.users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Thread-safe database connection pool for the Java Peer Review Training System.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the acquire timeout."""
+
+
+class PooledConnection:
+    """A raw driver connection plus the bookkeeping the pool needs."""
+
+    def __init__(self, raw: Any):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        # Server-side prepared statements owned by this connection, in LRU order
+        self.statements: OrderedDict = OrderedDict()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of database connections shared by all session threads.
+
+    Each thread checks out its own connection for the duration of a statement
+    and returns it afterwards, so concurrent sessions never interleave on one
+    socket. Idle connections above ``min_size`` are closed after
+    ``idle_timeout`` seconds.
+
+    Borrowing does not ping the server: a background keepalive thread validates
+    connections that sat idle for a whole interval, and callers discard a
+    connection that turns out to be dead when a statement fails on it.
+    """
+
+    def __init__(self, connect: Callable[[], Any], min_size: int = 1, max_size: int = 10,
+                 idle_timeout: float = 300.0, acquire_timeout: float = 10.0,
+                 validate: Optional[Callable[[Any], bool]] = None, validate_on_borrow: bool = False,
+                 name: str = "primary"):
+        """
+        Initialize the pool.
+
+        Args:
+            connect: Factory returning a new raw driver connection
+            min_size: Number of connections kept open even when idle
+            max_size: Upper bound on open connections
+            idle_timeout: Seconds an idle connection above min_size is kept
+            acquire_timeout: Seconds to wait for a free connection
+            validate: Liveness check used by the keepalive; falsy result drops the connection
+            validate_on_borrow: Also run validate on every borrow (one extra round trip each)
+            name: Label used in logs and stats
+        """
+        self.name = name
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self._connect = connect
+        self._validate = validate
+        self.validate_on_borrow = validate_on_borrow
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: List[PooledConnection] = []
+        self._size = 0
+        self._in_use = 0
+
+        # Sizing statistics
+        self._acquired = 0
+        self._timeouts = 0
+        self._created = 0
+        self._closed = 0
+        self._validations = 0
+        self._peak_in_use = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        self._keepalive_thread: Optional[threading.Thread] = None
+        self._keepalive_stop = threading.Event()
+
+    def fill(self) -> None:
+        """Open connections until the pool holds at least min_size of them."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                pooled = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Check out a connection, waiting up to the acquire timeout.
+
+        Raises:
+            PoolTimeoutError: If the pool stays exhausted for the whole timeout
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        pooled = None
+        expired: List[PooledConnection] = []
+
+        with self._cond:
+            while True:
+                expired.extend(self._evict_idle_locked())
+                if self._idle:
+                    # LIFO keeps the most recently used connections warm
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {timeout:.1f}s waiting for a '{self.name}' connection "
+                        f"({self._in_use}/{self.max_size} in use)"
+                    )
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+        for stale in expired:
+            self._close(stale)
+
+        try:
+            if pooled is not None and self.validate_on_borrow and self._validate and not self._check(pooled):
+                logger.debug(f"Discarding stale connection from pool '{self.name}'")
+                self._close(pooled)
+                pooled = None
+            if pooled is None:
+                pooled = self._open()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._acquired += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        pooled.last_used = time.monotonic()
+        return pooled
+
+    def release(self, pooled: PooledConnection, discard: bool = False) -> None:
+        """
+        Return a connection to the pool.
+
+        Args:
+            pooled: Connection previously obtained from acquire()
+            discard: Close the connection instead of reusing it (e.g. after a lost connection)
+        """
+        if discard:
+            self._close(pooled)
+        else:
+            pooled.last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._size -= 1
+            else:
+                self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a raw connection that is returned on exit."""
+        pooled = self.acquire()
+        discard = False
+        try:
+            yield pooled.raw
+        except Exception:
+            discard = True
+            raise
+        finally:
+            self.release(pooled, discard=discard)
+
+    def start_keepalive(self, interval: float) -> None:
+        """
+        Start a daemon thread that validates idle connections every interval.
+
+        Args:
+            interval: Seconds between checks; connections used more recently are skipped
+        """
+        if interval <= 0 or self._keepalive_thread is not None:
+            return
+        self._keepalive_stop = threading.Event()
+
+        def run():
+            while not self._keepalive_stop.wait(interval):
+                try:
+                    self.check_idle(interval)
+                except Exception as e:
+                    logger.debug(f"Keepalive check failed for pool '{self.name}': {str(e)}")
+
+        self._keepalive_thread = threading.Thread(target=run, name=f"db-keepalive-{self.name}", daemon=True)
+        self._keepalive_thread.start()
+
+    def stop_keepalive(self) -> None:
+        """Stop the keepalive thread if it is running."""
+        if self._keepalive_thread is not None:
+            self._keepalive_stop.set()
+            self._keepalive_thread.join()
+            self._keepalive_thread = None
+
+    def check_idle(self, min_idle: float = 0.0) -> None:
+        """
+        Validate idle connections and top the pool back up to min_size.
+
+        Args:
+            min_idle: Only ping connections idle for at least this many seconds
+        """
+        now = time.monotonic()
+        with self._cond:
+            expired = self._evict_idle_locked()
+            candidates = [p for p in self._idle if now - p.last_used >= min_idle]
+            # Take candidates out of circulation while they are being pinged
+            self._idle = [p for p in self._idle if now - p.last_used < min_idle]
+
+        for pooled in expired:
+            self._close(pooled)
+
+        for pooled in candidates:
+            alive = self._check(pooled) if self._validate else True
+            if not alive:
+                logger.debug(f"Keepalive dropped dead connection from pool '{self.name}'")
+                self._close(pooled)
+            with self._cond:
+                if alive:
+                    self._idle.insert(0, pooled)
+                else:
+                    self._size -= 1
+                self._cond.notify()
+
+        self.fill()
+
+    def close_all(self) -> None:
+        """Close every idle connection held by the pool."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for pooled in idle:
+            self._close(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool sizing statistics.
+
+        Returns:
+            Dict with size, utilization and wait-time figures
+        """
+        with self._cond:
+            return {
+                "name": self.name,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "peak_in_use": self._peak_in_use,
+                "utilization": self._in_use / self.max_size,
+                "acquired": self._acquired,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "closed": self._closed,
+                "validations": self._validations,
+                "avg_wait_ms": (self._wait_total / self._acquired * 1000) if self._acquired else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+            }
+
+    def _evict_idle_locked(self) -> List[PooledConnection]:
+        """Detach idle connections above min_size that exceeded the idle timeout."""
+        expired = []
+        if not self.idle_timeout:
+            return expired
+        now = time.monotonic()
+        # Oldest idle connections sit at the front of the list
+        while self._idle and self._size > self.min_size and now - self._idle[0].last_used > self.idle_timeout:
+            expired.append(self._idle.pop(0))
+            self._size -= 1
+        return expired
+
+    def _check(self, pooled: PooledConnection) -> bool:
+        with self._cond:
+            self._validations += 1
+        try:
+            return bool(self._validate(pooled.raw))
+        except Exception:
+            return False
+
+    def _open(self) -> PooledConnection:
+        pooled = PooledConnection(self._connect())
+        with self._cond:
+            self._created += 1
+        logger.debug(f"Opened new connection in pool '{self.name}'")
+        return pooled
+
+    def _close(self, pooled: PooledConnection) -> None:
+        try:
+            pooled.raw.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled connection: {str(e)}")
+        with self._cond:
+            self._closed += 1
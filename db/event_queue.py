@@ -0,0 +1,264 @@
+"""
+Durable local event queue for work that should not block a page render.
+
+Events are stored in a local SQLite file (EVENT_QUEUE_PATH), so they survive
+an app restart, and applied by a background EventWorker thread. Each event
+carries an idempotency key: enqueueing the same key twice stores one event,
+and handlers record the key with their own writes so an event that is
+retried after a crash (its claim lease expired) is not applied twice.
+
+Failed events are retried with the database RetryPolicy backoff and marked
+failed after EVENT_QUEUE_MAX_ATTEMPTS. Finished events keep their result
+for EVENT_QUEUE_RETENTION_SECONDS so the UI can pick it up on a later rerun.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from db.resilience import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+class EventQueue:
+    """SQLite-backed queue of events keyed by idempotency key, safe across threads and processes."""
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: Queue file (defaults to EVENT_QUEUE_PATH)
+        """
+        self.path = path or os.getenv("EVENT_QUEUE_PATH", "event_queue.sqlite3")
+        self.lease_seconds = float(os.getenv("EVENT_QUEUE_LEASE_SECONDS", "60"))
+        self.max_attempts = int(os.getenv("EVENT_QUEUE_MAX_ATTEMPTS", "10"))
+        self.retention_seconds = float(os.getenv("EVENT_QUEUE_RETENTION_SECONDS", "86400"))
+        self.retry_policy = RetryPolicy(self.max_attempts, base_delay=1.0, max_delay=300.0)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_status_available ON events (status, available_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection to the queue file."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, kind: str, idempotency_key: str, payload: Dict[str, Any]) -> bool:
+        """
+        Store an event unless one with the same key exists.
+
+        Args:
+            kind: Event type, selects the worker handler
+            idempotency_key: Unique key of this event
+            payload: JSON-serializable event data
+
+        Returns:
+            True if the event was stored, False if the key was already queued
+        """
+        now = time.time()
+        cursor = self._connection().execute(
+            "INSERT OR IGNORE INTO events (idempotency_key, kind, payload, available_at, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (idempotency_key, kind, json.dumps(payload), now, now)
+        )
+        return cursor.rowcount == 1
+
+    def claim(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Lease due pending events to the caller.
+
+        A claimed event is hidden for lease_seconds; if it is neither completed
+        nor failed by then (e.g. the process died) it is claimed again.
+
+        Args:
+            limit: Maximum events to claim
+
+        Returns:
+            Claimed events with id, idempotency_key, kind, payload and attempts
+        """
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, idempotency_key, kind, payload, attempts FROM events "
+                "WHERE status = ? AND available_at <= ? ORDER BY id LIMIT ?",
+                (PENDING, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE events SET attempts = attempts + 1, available_at = ? WHERE id = ?",
+                [(now + self.lease_seconds, row["id"]) for row in rows]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [
+            {
+                "id": row["id"],
+                "idempotency_key": row["idempotency_key"],
+                "kind": row["kind"],
+                "payload": json.loads(row["payload"]),
+                "attempts": row["attempts"] + 1,
+            }
+            for row in rows
+        ]
+
+    def complete(self, event_id: int, result: Any = None) -> None:
+        """Mark a claimed event done and keep its result."""
+        self._connection().execute(
+            "UPDATE events SET status = ?, finished_at = ?, result = ?, error = NULL WHERE id = ?",
+            (DONE, time.time(), json.dumps(result, default=str), event_id)
+        )
+
+    def fail(self, event_id: int, attempts: int, error: str) -> None:
+        """Schedule a retry of a claimed event, or mark it failed once out of attempts."""
+        now = time.time()
+        if attempts >= self.max_attempts:
+            logger.error(f"Event {event_id} failed after {attempts} attempts: {error}")
+            self._connection().execute(
+                "UPDATE events SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                (FAILED, now, error, event_id)
+            )
+        else:
+            self._connection().execute(
+                "UPDATE events SET available_at = ?, error = ? WHERE id = ?",
+                (now + self.retry_policy.delay(attempts), error, event_id)
+            )
+
+    def get(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an event by key.
+
+        Returns:
+            Dict with status, attempts, result and error, or None if unknown
+        """
+        row = self._connection().execute(
+            "SELECT status, attempts, result, error FROM events WHERE idempotency_key = ?",
+            (idempotency_key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+        }
+
+    def purge(self) -> int:
+        """Delete finished events older than the retention period; returns the number deleted."""
+        cursor = self._connection().execute(
+            "DELETE FROM events WHERE status != ? AND finished_at < ?",
+            (PENDING, time.time() - self.retention_seconds)
+        )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of events per status."""
+        rows = self._connection().execute("SELECT status, COUNT(*) AS n FROM events GROUP BY status").fetchall()
+        counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+
+class EventWorker:
+    """Background thread that applies queued events with per-kind handlers."""
+
+    def __init__(self, queue: EventQueue, handlers: Dict[str, Callable[[str, Dict[str, Any]], Any]],
+                 poll_interval: float = None, name: str = "event-worker"):
+        """
+        Args:
+            queue: Queue to drain
+            handlers: Mapping of event kind to handler(idempotency_key, payload). A
+                handler returns the event result or raises to have the event retried
+            poll_interval: Seconds between polls when not woken (defaults to EVENT_QUEUE_POLL_SECONDS)
+            name: Thread name
+        """
+        self.queue = queue
+        self.handlers = handlers
+        self.poll_interval = poll_interval or float(os.getenv("EVENT_QUEUE_POLL_SECONDS", "2"))
+        self.name = name
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start the worker thread if it is not running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def wake(self) -> None:
+        """Process the queue now instead of at the next poll."""
+        self._wake.set()
+
+    def run_once(self) -> int:
+        """
+        Apply every due event.
+
+        Returns:
+            Number of events claimed
+        """
+        processed = 0
+        while True:
+            events = self.queue.claim()
+            if not events:
+                return processed
+            for event in events:
+                self._apply(event)
+            processed += len(events)
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        handler = self.handlers.get(event["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for event kind {event['kind']}")
+            result = handler(event["idempotency_key"], event["payload"])
+            self.queue.complete(event["id"], result)
+        except Exception as e:
+            logger.warning(f"Event {event['idempotency_key']} attempt {event['attempts']} failed: {str(e)}")
+            self.queue.fail(event["id"], event["attempts"], str(e))
+
+    def _run(self) -> None:
+        last_purge = 0.0
+        while True:
+            try:
+                self.run_once()
+                if time.monotonic() - last_purge > 3600:
+                    self.queue.purge()
+                    last_purge = time.monotonic()
+            except Exception as e:
+                logger.error(f"Event worker {self.name} error: {str(e)}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
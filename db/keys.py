@@ -0,0 +1,175 @@
+"""
+Compact binary user keys for the Java Peer Review Training System.
+
+User IDs are UUIDs. Since migration 10 they are stored as BINARY(16) in
+users.uid and every user_id column instead of 36-character strings, which
+more than halves every primary and secondary index that carries them.
+
+The rest of the code keeps passing and receiving canonical UUID strings:
+once the schema uses binary keys, MySQLConnection binds the parameters that
+go into a uid / user_id column as their 16 bytes and turns 16-byte uid /
+user_id result columns back into strings. A parameter goes into a key column
+when it is written as
+
+    [alias.]uid = %s          (or <, <=, >, >=, !=, <>)
+    [alias.]user_id IN (%s, %s, ...)
+    INSERT INTO t (uid, ...) VALUES (%s, ...), (%s, ...)
+
+so UUID-shaped values of other columns (e.g. class codes) are left alone.
+Key parameters bound any other way must be wrapped in UUID_TO_BIN(), which
+the SQLite backend registers as well, like BIN_TO_UUID().
+
+New IDs are time-ordered (UUID version 7 layout) so inserts append to the
+end of the users primary key instead of landing on random pages.
+"""
+
+import os
+import re
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Schema version (migration 10) from which user keys are BINARY(16)
+BINARY_KEYS_VERSION = 10
+
+# Result columns holding user keys
+KEY_COLUMNS = ("uid", "user_id")
+
+# A placeholder compared with a key column, or in a key column's IN list
+_KEY_COMPARISON = re.compile(r"\b(?:uid|user_id)\s*(?:=|<>|!=|<=|>=|<|>)\s*$", re.IGNORECASE)
+_KEY_IN_LIST = re.compile(r"\b(?:uid|user_id)\s+(?:NOT\s+)?IN\s*\((?:\s*%s\s*,)*\s*$", re.IGNORECASE)
+# INSERT ... (columns) VALUES, up to an upsert clause
+_INSERT_VALUES = re.compile(r"^\s*INSERT\s+(?:IGNORE\s+)?INTO\s+\w+\s*\(([^)]*)\)\s*VALUES\b", re.IGNORECASE)
+_UPSERT = re.compile(r"\bON\s+(?:DUPLICATE|CONFLICT)\b", re.IGNORECASE)
+_TOKENS = re.compile(r"%s|[(),]")
+
+_UUID_TEXT = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+
+
+def new_user_id() -> str:
+    """
+    Generate a user ID: 48-bit millisecond timestamp followed by random bits.
+
+    Returns:
+        Canonical UUID string (version 7 layout)
+    """
+    value = (int(time.time() * 1000) & ((1 << 48) - 1)) << 80
+    value |= int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # Version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
+
+
+def uuid_to_bin(text: Any, swap: int = 0) -> Optional[bytes]:
+    """
+    Convert a UUID string to its 16 bytes, like MySQL's UUID_TO_BIN().
+
+    Args:
+        text: UUID string (or bytes of one); None stays None
+        swap: 1 to move the time-high field first, as MySQL does for version 1 UUIDs
+
+    Returns:
+        16 bytes, or None
+    """
+    if text is None:
+        return None
+    if isinstance(text, (bytes, bytearray)):
+        text = bytes(text).decode("ascii")
+    raw = uuid.UUID(text).bytes
+    if swap:
+        raw = raw[6:8] + raw[4:6] + raw[0:4] + raw[8:]
+    return raw
+
+
+def bin_to_uuid(raw: Any, swap: int = 0) -> Optional[str]:
+    """
+    Convert 16 bytes to a UUID string, like MySQL's BIN_TO_UUID().
+
+    Args:
+        raw: 16 bytes; None stays None
+        swap: 1 if the bytes were produced with UUID_TO_BIN(..., 1)
+
+    Returns:
+        Canonical UUID string, or None
+    """
+    if raw is None:
+        return None
+    raw = bytes(raw)
+    if swap:
+        raw = raw[4:8] + raw[2:4] + raw[0:2] + raw[8:]
+    return str(uuid.UUID(bytes=raw))
+
+
+# Both conversions run for every statement and key column, so they use
+# hex slicing, several times faster than going through uuid.UUID. Placeholder
+# positions are worked out once per distinct statement
+
+@lru_cache(maxsize=1024)
+def key_param_positions(query: str) -> Tuple[int, ...]:
+    """
+    Find the parameters of a statement that are bound to a user key column.
+
+    Args:
+        query: SQL statement with %s placeholders
+
+    Returns:
+        Zero-based indexes of the key parameters
+    """
+    positions = []
+    insert = _INSERT_VALUES.match(query)
+    columns, values_end = [], 0
+    if insert:
+        columns = [column.strip().lower() for column in insert.group(1).split(",")]
+        upsert = _UPSERT.search(query, insert.end())
+        values_end = upsert.start() if upsert else len(query)
+    depth = column = index = 0
+    for token in _TOKENS.finditer(query, insert.end() if insert else 0):
+        in_values = token.start() < values_end
+        if token.group() == "%s":
+            if in_values:
+                is_key = column < len(columns) and columns[column] in KEY_COLUMNS
+            else:
+                is_key = bool(_KEY_COMPARISON.search(query, 0, token.start())
+                              or _KEY_IN_LIST.search(query, 0, token.start()))
+            if is_key:
+                positions.append(index)
+            index += 1
+        elif in_values:
+            # Track the column of each VALUES row by its top-level commas
+            if token.group() == "(":
+                depth += 1
+                if depth == 1:
+                    column = 0
+            elif token.group() == ")":
+                depth -= 1
+            elif depth == 1:
+                column += 1
+    return tuple(positions)
+
+
+def encode_params(query: str, params: Optional[Iterable[Any]]) -> Optional[tuple]:
+    """Bind a statement's canonical UUID string parameters for key columns as 16 bytes."""
+    if not params:
+        return params
+    params = tuple(params)
+    positions = key_param_positions(query)
+    if not positions:
+        return params
+    encoded = list(params)
+    for i in positions:
+        value = encoded[i] if i < len(encoded) else None
+        if isinstance(value, str) and len(value) == 36 and _UUID_TEXT.match(value):
+            encoded[i] = bytes.fromhex(value.replace("-", ""))
+    return tuple(encoded)
+
+
+def decode_row(row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Turn 16-byte user key columns of a result row back into UUID strings, in place."""
+    if row:
+        for column in KEY_COLUMNS:
+            value = row.get(column)
+            if isinstance(value, (bytes, bytearray)) and len(value) == 16:
+                text = value.hex()
+                row[column] = f"{text[:8]}-{text[8:12]}-{text[12:16]}-{text[16:20]}-{text[20:]}"
+    return row
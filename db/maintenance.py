@@ -0,0 +1,79 @@
+"""
+Maintenance jobs for denormalized and precomputed data.
+
+Run from cron or by hand against the database configured in the environment:
+
+    python -m db.maintenance repair-badge-counts
+    python -m db.maintenance refresh-ranks
+    python -m db.maintenance reevaluate-badges
+    python -m db.maintenance rebuild-activity-rollup
+    python -m db.maintenance import-users students.csv --class-id CS101
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Database maintenance jobs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("repair-badge-counts", help="Recompute users.badge_count where it drifted from user_badges")
+    subparsers.add_parser("refresh-ranks", help="Rebuild the user_rank table")
+    subparsers.add_parser("reevaluate-badges", help="Award badges every user qualifies for under the current rules")
+    subparsers.add_parser("rebuild-activity-rollup", help="Recompute user_daily_activity from activity_log")
+    import_users = subparsers.add_parser("import-users", help="Register the students of a CSV or JSON roster")
+    import_users.add_argument("path", help="Roster file (.csv with a header row, or .json list of objects)")
+    import_users.add_argument("--class-id", default="", help="Class of students whose row has no class_id")
+    import_users.add_argument("--report", help="Write the per-row results to this JSON file")
+    args = parser.parse_args()
+
+    from auth.badge_manager import BadgeManager
+    from db.migrations import run_migrations
+
+    manager = BadgeManager()
+    run_migrations(manager.db)
+
+    if args.command == "repair-badge-counts":
+        fixed = manager.repair_badge_counts()
+        if fixed < 0:
+            sys.exit(1)
+        print(f"Repaired badge_count for {fixed} users")
+    elif args.command == "refresh-ranks":
+        if not manager.refresh_user_ranks():
+            sys.exit(1)
+        print("User ranks refreshed")
+    elif args.command == "reevaluate-badges":
+        awarded = manager.evaluate_all_badges()
+        if awarded < 0:
+            sys.exit(1)
+        print(f"Awarded {awarded} badges")
+    elif args.command == "rebuild-activity-rollup":
+        if not manager.rebuild_daily_activity():
+            sys.exit(1)
+        print("Daily activity rollup rebuilt")
+    elif args.command == "import-users":
+        from auth.bulk_import import CREATED, read_roster
+        from auth.mysql_auth import MySQLAuthManager
+        
+        outcome = MySQLAuthManager().bulk_register_users(read_roster(args.path), args.class_id)
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(outcome.get("results", []), f, ensure_ascii=False, indent=2)
+        if not outcome["success"]:
+            print(f"Import failed: {outcome['error']}")
+            sys.exit(1)
+        print(f"Created {outcome['created']}, existing {outcome['exists']}, invalid {outcome['invalid']} "
+              f"in {outcome['elapsed_ms']:.0f} ms")
+        for result in outcome["results"]:
+            if result["status"] != CREATED:
+                print(f"  row {result['row']} {result['email']}: {result['status']} ({result['error']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""
+Versioned schema migrations for the Java Peer Review Training System.
+
+Each migration runs exactly once per database and is recorded in the
+schema_version table. The application applies pending migrations once per
+process through ensure_schema(); they can also be applied ahead of a deploy:
+
+    python -m db.migrations            # apply pending migrations
+    python -m db.migrations --status   # list applied and pending versions
+"""
+
+import argparse
+import logging
+import threading
+from typing import Callable, List, Optional, Set, Tuple
+
+from db.keys import BINARY_KEYS_VERSION
+from db.mysql_connection import MySQLConnection
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MigrationError(Exception):
+    """Raised when a migration statement fails."""
+
+
+def _execute(db: MySQLConnection, query: str, params: tuple = None):
+    """Run a migration statement, turning execute_query's None result into an error."""
+    result = db.execute_query(query, params)
+    if result is None:
+        raise MigrationError(f"Migration statement failed: {query.strip().splitlines()[0]}")
+    return result
+
+
+def _initial_schema(db: MySQLConnection) -> None:
+    """Create the users, badges, user_badges, error_category_stats and activity_log tables."""
+    # Create users table with multilingual support if it doesn't exist
+    _execute(db, """
+    CREATE TABLE IF NOT EXISTS users (
+        uid VARCHAR(36) PRIMARY KEY,
+        email VARCHAR(255) UNIQUE NOT NULL,
+        display_name_en VARCHAR(255),
+        display_name_zh VARCHAR(255),
+        password VARCHAR(255) NOT NULL,
+        level_name_en VARCHAR(50),
+        level_name_zh VARCHAR(50),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        reviews_completed INT DEFAULT 0,
+        score INT DEFAULT 0,
+        last_activity DATE DEFAULT NULL,
+        consecutive_days INT DEFAULT 0,
+        total_points INT DEFAULT 0,
+        tutorial_completed BOOLEAN DEFAULT FALSE
+    )
+    """)
+
+    # Create badges table with multilingual fields (if not exists)
+    _execute(db, """
+    CREATE TABLE IF NOT EXISTS badges (
+        badge_id VARCHAR(36) PRIMARY KEY,
+        name_en VARCHAR(100) NOT NULL,
+        name_zh VARCHAR(100) NOT NULL,
+        description_en TEXT NOT NULL,
+        description_zh TEXT NOT NULL,
+        icon VARCHAR(50) NOT NULL,
+        category VARCHAR(50) NOT NULL,
+        difficulty ENUM('easy', 'medium', 'hard') DEFAULT 'medium',
+        points INT DEFAULT 10,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Create user_badges table
+    _execute(db, """
+    CREATE TABLE IF NOT EXISTS user_badges (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id VARCHAR(36) NOT NULL,
+        badge_id VARCHAR(36) NOT NULL,
+        awarded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(uid),
+        FOREIGN KEY (badge_id) REFERENCES badges(badge_id),
+        UNIQUE KEY (user_id, badge_id)
+    )
+    """)
+
+    # Create error_category_stats table
+    _execute(db, """
+    CREATE TABLE IF NOT EXISTS error_category_stats (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id VARCHAR(36) NOT NULL,
+        category VARCHAR(50) NOT NULL,
+        encountered INT DEFAULT 0,
+        identified INT DEFAULT 0,
+        mastery_level FLOAT DEFAULT 0.0,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(uid),
+        UNIQUE KEY (user_id, category)
+    )
+    """)
+
+    # Create activity_log table for detailed point history
+    _execute(db, """
+    CREATE TABLE IF NOT EXISTS activity_log (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id VARCHAR(36) NOT NULL,
+        activity_type VARCHAR(50) NOT NULL,
+        points INT NOT NULL,
+        details_en TEXT,
+        details_zh TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(uid)
+    )
+    """)
+
+
+def _default_badges(db: MySQLConnection) -> None:
+    """Insert the default multilingual badge catalog."""
+    from db.schema_update import insert_default_badges
+    if not insert_default_badges(db):
+        raise MigrationError("Failed to insert default badges")
+
+
+def _hot_query_indexes(db: MySQLConnection) -> None:
+    """Add composite indexes behind the badge checks, rank lookup and leaderboards."""
+    # Perfect-review counts filter on (user_id, activity_type); the recent-activity
+    # check orders one user's rows by created_at
+    _execute(db, "CREATE INDEX idx_activity_user_type_created ON activity_log (user_id, activity_type, created_at)")
+    _execute(db, "CREATE INDEX idx_activity_user_created ON activity_log (user_id, created_at)")
+    # Leaderboards sort on total_points and the rank lookup counts users above a score
+    _execute(db, "CREATE INDEX idx_users_points_uid ON users (total_points, uid)")
+    # Category stats are read per user ordered by mastery
+    _execute(db, "CREATE INDEX idx_category_stats_user_mastery ON error_category_stats (user_id, mastery_level)")
+
+
+def _user_rank_table(db: MySQLConnection) -> None:
+    """Add the user_rank table refreshed by BadgeManager.refresh_user_ranks()."""
+    # One row per user with the rank computed for the whole class at the last
+    # refresh, so rank lookups are a primary-key read instead of a range count
+    _execute(db, """
+    CREATE TABLE IF NOT EXISTS user_rank (
+        uid VARCHAR(36) PRIMARY KEY,
+        rank_pos INT NOT NULL,
+        total_points INT NOT NULL,
+        total_users INT NOT NULL
+    )
+    """)
+
+
+def _users_badge_count(db: MySQLConnection) -> None:
+    """Add the denormalized users.badge_count column and backfill it."""
+    _execute(db, "ALTER TABLE users ADD COLUMN badge_count INT NOT NULL DEFAULT 0")
+    _execute(db, """
+        UPDATE users
+        SET badge_count = (SELECT COUNT(*) FROM user_badges WHERE user_badges.user_id = users.uid)
+    """)
+
+
+def _users_perfect_streak(db: MySQLConnection) -> None:
+    """Add users.perfect_streak, the run of consecutive reviews with every error found."""
+    # The activity log cannot tell which reviews were perfect in order, so
+    # existing users start a fresh streak
+    _execute(db, "ALTER TABLE users ADD COLUMN perfect_streak INT NOT NULL DEFAULT 0")
+
+
+def _processed_events_table(db: MySQLConnection) -> None:
+    """Add processed_events, the idempotency keys of applied queue events."""
+    _execute(db, """
+    CREATE TABLE IF NOT EXISTS processed_events (
+        event_key VARCHAR(100) PRIMARY KEY,
+        processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def _user_daily_activity(db: MySQLConnection) -> None:
+    """Add the per-user daily rollup of activity_log and backfill it."""
+    _execute(db, """
+    CREATE TABLE IF NOT EXISTS user_daily_activity (
+        user_id VARCHAR(36) NOT NULL,
+        activity_date DATE NOT NULL,
+        points INT NOT NULL DEFAULT 0,
+        reviews INT NOT NULL DEFAULT 0,
+        perfect_reviews INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, activity_date)
+    )
+    """)
+    # Period leaderboards read one date range across all users
+    _execute(db, "CREATE INDEX idx_daily_activity_date ON user_daily_activity (activity_date, user_id)")
+    _execute(db, """
+        INSERT INTO user_daily_activity (user_id, activity_date, points, reviews, perfect_reviews)
+        SELECT user_id, DATE(created_at), SUM(points),
+            SUM(CASE WHEN activity_type = 'review_completion' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN activity_type = 'perfect_review' THEN 1 ELSE 0 END)
+        FROM activity_log
+        GROUP BY user_id, DATE(created_at)
+    """)
+
+
+def _class_cohorts(db: MySQLConnection) -> None:
+    """Add users.class_id and scope ranks per class."""
+    # '' is the default cohort of users not assigned to a class
+    _execute(db, "ALTER TABLE users ADD COLUMN class_id VARCHAR(36) NOT NULL DEFAULT ''")
+    # Class leaderboards, standings and rank counts read one class's slice of this index
+    _execute(db, "CREATE INDEX idx_users_class_points_uid ON users (class_id, total_points, uid)")
+    # Ranks become per class at the next refresh
+    _execute(db, "ALTER TABLE user_rank ADD COLUMN class_id VARCHAR(36) NOT NULL DEFAULT ''")
+
+
+# (table, column) of every user key converted by migration 10
+USER_KEY_COLUMNS = [
+    ("users", "uid"),
+    ("user_badges", "user_id"),
+    ("error_category_stats", "user_id"),
+    ("activity_log", "user_id"),
+    ("user_rank", "uid"),
+    ("user_daily_activity", "user_id"),
+]
+
+
+def _column_type(db: MySQLConnection, pooled, table: str, column: str) -> str:
+    """Get a MySQL column's type as information_schema reports it, e.g. 'binary(16)'."""
+    row = db._run_statement(pooled, """
+        SELECT COLUMN_TYPE AS column_type FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column), fetch_one=True)
+    if not row:
+        raise MigrationError(f"Column {table}.{column} not found")
+    return row["column_type"].lower()
+
+
+def _binary_user_keys(db: MySQLConnection) -> None:
+    """Store users.uid and every user_id as BINARY(16) instead of VARCHAR(36); see db/keys.py."""
+    if db.dialect == "sqlite":
+        # Column types are only affinities in SQLite and BLOBs are stored
+        # as-is, so converting the values is enough. Foreign keys are checked
+        # at commit, after parents and children have both been converted
+        with db.transaction() as tx:
+            tx.execute("PRAGMA defer_foreign_keys = ON")
+            for table, column in USER_KEY_COLUMNS:
+                tx.execute(f"UPDATE {table} SET {column} = UUID_TO_BIN({column}) WHERE typeof({column}) = 'text'")
+        return
+
+    # Every ALTER commits implicitly, so MySQL cannot run this as one
+    # transaction. Each step checks the column's current type instead, and a
+    # run that failed part way resumes where it stopped when retried.
+    # Parents and children disagree on the key type until the last ALTER, and
+    # FOREIGN_KEY_CHECKS is per session, so all statements run on one connection
+    pooled = db.pool.acquire()
+    discard = False
+    try:
+        db._run_statement(pooled, "SET FOREIGN_KEY_CHECKS = 0")
+        for table, column in USER_KEY_COLUMNS:
+            column_type = _column_type(db, pooled, table, column)
+            if column_type == "binary(16)":
+                continue
+            if column_type != "varbinary(36)":
+                # VARBINARY keeps the text bytes, so UUID_TO_BIN can read them back
+                db._run_statement(pooled, f"ALTER TABLE {table} MODIFY {column} VARBINARY(36) NOT NULL")
+            # Only values still in text form, in case a run stopped after this UPDATE
+            db._run_statement(pooled, f"UPDATE {table} SET {column} = UUID_TO_BIN({column}) WHERE LENGTH({column}) = 36")
+            db._run_statement(pooled, f"ALTER TABLE {table} MODIFY {column} BINARY(16) NOT NULL")
+            logger.info(f"Converted {table}.{column} to BINARY(16)")
+    finally:
+        try:
+            db._run_statement(pooled, "SET FOREIGN_KEY_CHECKS = 1")
+        except db.backend.errors as e:
+            # Never hand a connection with checks off back to the pool
+            logger.error(f"Error restoring FOREIGN_KEY_CHECKS: {str(e)}")
+            discard = True
+        db.pool.release(pooled, discard=discard)
+
+
+def _has_column(db: MySQLConnection, table: str, column: str) -> bool:
+    """Check whether a table has a column, on either backend."""
+    if db.dialect == "sqlite":
+        row = _execute(db, "SELECT COUNT(*) AS n FROM pragma_table_info(%s) WHERE name = %s", (table, column))
+    else:
+        row = _execute(db, """
+            SELECT COUNT(*) AS n FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (table, column))
+    return row[0]["n"] > 0
+
+
+def _activity_templates(db: MySQLConnection, batch_size: int = 1000) -> None:
+    """Replace activity_log.details_en/details_zh with a template ID and JSON params."""
+    from auth.activity_templates import encode_params, parse_legacy_details
+
+    # Every ALTER commits on its own in MySQL, so each step checks what a
+    # previous, failed run already did and the migration can simply be retried
+    if not _has_column(db, "activity_log", "template_id"):
+        _execute(db, "ALTER TABLE activity_log ADD COLUMN template_id SMALLINT NULL")
+    if not _has_column(db, "activity_log", "params"):
+        _execute(db, "ALTER TABLE activity_log ADD COLUMN params JSON NULL")
+
+    # details_en is only dropped once every row is converted, so without it there is nothing left to convert
+    if _has_column(db, "activity_log", "details_en"):
+        badge_ids_by_name = {}
+        for badge in _execute(db, "SELECT badge_id, name_en, name_zh FROM badges"):
+            badge_ids_by_name[badge["name_en"]] = badge["badge_id"]
+            badge_ids_by_name[badge["name_zh"]] = badge["badge_id"]
+
+        # Convert in id order, one batch per transaction, so memory and lock
+        # time stay flat however large the log is. Converted rows have a
+        # template_id, so a retried run skips the batches that committed
+        last_id, converted = 0, 0
+        while True:
+            rows = _execute(db, """
+                SELECT id, activity_type, details_en FROM activity_log
+                WHERE template_id IS NULL AND id > %s ORDER BY id LIMIT %s
+            """, (last_id, batch_size))
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                template_id, params = parse_legacy_details(row["activity_type"], row["details_en"], badge_ids_by_name)
+                updates.append((template_id, encode_params(params), row["id"]))
+            with db.transaction() as tx:
+                tx.executemany("UPDATE activity_log SET template_id = %s, params = %s WHERE id = %s", updates)
+            last_id = rows[-1]["id"]
+            converted += len(rows)
+        if converted:
+            logger.info(f"Converted {converted} activity_log rows to templates")
+
+        remaining = _execute(db, "SELECT COUNT(*) AS n FROM activity_log WHERE template_id IS NULL")[0]["n"]
+        if remaining:
+            raise MigrationError(f"{remaining} activity_log rows are not converted; keeping details_en/details_zh")
+        _execute(db, "ALTER TABLE activity_log DROP COLUMN details_en")
+    if _has_column(db, "activity_log", "details_zh"):
+        _execute(db, "ALTER TABLE activity_log DROP COLUMN details_zh")
+
+
+def _processed_event_results(db: MySQLConnection) -> None:
+    """Keep each applied queue event's result, so a redelivery can return it."""
+    # Keys recorded before this migration have no result to return
+    _execute(db, "ALTER TABLE processed_events ADD COLUMN result TEXT NULL")
+
+
+# Ordered list of (version, description, apply function). Never edit or reorder
+# an applied migration; append a new one instead.
+MIGRATIONS: List[Tuple[int, str, Callable[[MySQLConnection], None]]] = [
+    (1, "Initial schema", _initial_schema),
+    (2, "Default badge catalog", _default_badges),
+    (3, "Indexes for activity_log, users and error_category_stats hot queries", _hot_query_indexes),
+    (4, "Precomputed user_rank table", _user_rank_table),
+    (5, "Denormalized users.badge_count", _users_badge_count),
+    (6, "users.perfect_streak for the badge rules", _users_perfect_streak),
+    (7, "processed_events idempotency keys", _processed_events_table),
+    (8, "user_daily_activity rollup", _user_daily_activity),
+    (9, "Per-class cohorts", _class_cohorts),
+    (BINARY_KEYS_VERSION, "BINARY(16) user keys", _binary_user_keys),
+    (11, "activity_log templates instead of per-language text", _activity_templates),
+    (12, "processed_events results", _processed_event_results),
+]
+
+SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        description VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def get_applied_versions(db: MySQLConnection) -> Set[int]:
+    """
+    Get the migration versions already applied to the database.
+
+    Args:
+        db: Database connection manager
+
+    Returns:
+        Set of applied version numbers
+    """
+    _execute(db, SCHEMA_VERSION_TABLE)
+    rows = db.execute_query("SELECT version FROM schema_version")
+    if rows is None:
+        raise MigrationError("Could not read schema_version")
+    return {row["version"] for row in rows}
+
+
+def run_migrations(db: Optional[MySQLConnection] = None) -> List[int]:
+    """
+    Apply all pending migrations in version order.
+
+    Args:
+        db: Database connection manager (defaults to the shared instance)
+
+    Returns:
+        List of versions applied by this call
+
+    Raises:
+        MigrationError: If a migration fails; later migrations are not attempted
+    """
+    db = db or MySQLConnection()
+    applied = get_applied_versions(db)
+    newly_applied = []
+    # From BINARY_KEYS_VERSION on, the DB layer converts user IDs between strings and bytes
+    db.binary_keys = BINARY_KEYS_VERSION in applied
+
+    for version, description, apply in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        logger.info(f"Applying migration {version}: {description}")
+        apply(db)
+        _execute(db, "INSERT INTO schema_version (version, description) VALUES (%s, %s)", (version, description))
+        newly_applied.append(version)
+        if version == BINARY_KEYS_VERSION:
+            db.binary_keys = True
+
+    if newly_applied:
+        logger.info(f"Database schema is now at version {newly_applied[-1]}")
+    return newly_applied
+
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def ensure_schema() -> bool:
+    """
+    Bring the schema up to date once per process.
+
+    Safe to call on every Streamlit rerun: after the first successful call it
+    returns immediately without touching the database.
+
+    Returns:
+        True if the schema is up to date
+    """
+    global _schema_ready
+    if _schema_ready:
+        return True
+
+    with _schema_lock:
+        if _schema_ready:
+            return True
+        try:
+            run_migrations()
+            _schema_ready = True
+        except Exception as e:
+            logger.error(f"Database schema migration failed: {str(e)}")
+    return _schema_ready
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    args = parser.parse_args()
+
+    db = MySQLConnection()
+    if args.status:
+        applied = get_applied_versions(db)
+        for version, description, _ in MIGRATIONS:
+            state = "applied" if version in applied else "pending"
+            print(f"{version:>4}  {state:<8} {description}")
+        return
+
+    versions = run_migrations(db)
+    print(f"Applied migrations: {versions}" if versions else "Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
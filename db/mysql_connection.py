@@ -1,11 +1,19 @@
 # db/mysql_connection.py
-import mysql.connector
 import logging
 import time
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 import os
+import re
 from dotenv import load_dotenv
 import traceback
+import threading
+from contextlib import contextmanager
+from db.backends import get_backend
+from db.connection_pool import ConnectionPool, PoolTimeoutError
+from db.keys import BINARY_KEYS_VERSION, decode_row, encode_params
+from db.query_cache import QueryCache, written_table
+from db.query_stats import query_stats
+from db.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
 
 # Load environment variables
 load_dotenv()
@@ -17,9 +25,99 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def _is_read_query(query: str) -> bool:
+    """Check whether a statement returns rows rather than an affected-row count."""
+    return query.strip().upper().startswith(("SELECT", "SHOW", "EXPLAIN"))
+
+
+_FOR_UPDATE = re.compile(r"\bFOR\s+UPDATE\b", re.IGNORECASE)
+
+
+def _is_preparable(query: str) -> bool:
+    """Check whether a statement can go through the prepared-statement protocol."""
+    return query.strip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE"))
+
+
+class Transaction:
+    """
+    Unit of work bound to one pooled connection.
+    
+    Obtained from MySQLConnection.transaction(). Every statement runs on the
+    same connection and nothing is committed until the block exits, so a chain
+    of writes costs one commit instead of one per statement.
+    """
+    
+    def __init__(self, owner: "MySQLConnection", pooled):
+        self.owner = owner
+        self.pooled = pooled
+        self.connection = pooled.raw
+        self.rollback_only = False
+        self.committed = False
+        # Tables whose cached results are dropped once the transaction commits
+        self.written_tables = set()
+    
+    def execute(self, query: str, params: tuple = None, fetch_one: bool = False):
+        """
+        Execute a statement inside the transaction.
+        
+        Args:
+            query: SQL statement
+            params: Statement parameters
+            fetch_one: Return a single row for SELECT statements
+            
+        Returns:
+            Row(s) for SELECT/SHOW statements, affected row count otherwise
+        """
+        self._track_write(query)
+        return self.owner._run_statement(self.pooled, query, params, fetch_one)
+    
+    def executemany(self, query: str, seq_params: List[tuple]) -> int:
+        """
+        Execute a statement once per parameter tuple.
+        
+        Multi-row INSERT ... VALUES statements are sent as a single batched
+        statement by the driver.
+        
+        Args:
+            query: SQL statement
+            seq_params: Sequence of parameter tuples
+            
+        Returns:
+            Total affected row count
+        """
+        if not seq_params:
+            return 0
+        self._track_write(query)
+        if self.owner.binary_keys:
+            seq_params = [encode_params(query, params) for params in seq_params]
+        start = time.perf_counter() if query_stats.enabled else 0.0
+        cursor = self.connection.cursor()
+        try:
+            cursor.executemany(query, seq_params)
+            if query_stats.enabled:
+                query_stats.record(query, (time.perf_counter() - start) * 1000, rows=cursor.rowcount)
+            return cursor.rowcount
+        finally:
+            cursor.close()
+    
+    def _track_write(self, query: str) -> None:
+        table = written_table(query)
+        if table:
+            self.written_tables.add(table)
+    
+    def set_rollback_only(self) -> None:
+        """Mark the transaction so that it is rolled back instead of committed."""
+        self.rollback_only = True
+
+
 class MySQLConnection:
     """
-    MySQL database connection manager for the Java Peer Review Training System.
+    Database connection manager for the Java Peer Review Training System.
+    
+    Statements are written in the MySQL dialect. DB_BACKEND=sqlite swaps the
+    MySQL server for an embedded SQLite database with the same execute_query
+    and transaction() contract; see db/backends.py.
     """
     
     _instance = None
@@ -36,115 +134,455 @@ class MySQLConnection:
         if self._initialized:
             return
             
-        # Get database configuration from environment variables
-        self.db_host = os.getenv("DB_HOST", "localhost")
-        self.db_user = os.getenv("DB_USER", "java_review_user")
-        self.db_password = os.getenv("DB_PASSWORD", "Selab@232")
-        self.db_name = os.getenv("DB_NAME", "java_review_trainer")
-        self.db_port = int(os.getenv("DB_PORT", "3306"))
-        
-        # Initialize connection to None
-        self.connection = None
+        # MySQL server or embedded SQLite, selected by DB_BACKEND
+        self.backend = get_backend()
+        self.dialect = self.backend.dialect
+        self.prepared_cache_size = self.backend.prepared_cache_size
+        
+        # Connection pool shared by all session threads
+        self.pool = self._create_pool(self._create_connection, "primary")
+        
+        # Optional read replicas (DB_REPLICAS: comma-separated host[:port] for
+        # MySQL, file paths for SQLite). Reads go to them round-robin, except
+        # for a session that wrote within the read-your-writes window.
+        replicas = [address.strip() for address in os.getenv("DB_REPLICAS", "").split(",") if address.strip()]
+        self.replica_pools = [
+            self._create_pool(self.backend.replica(address).connect, f"replica-{i + 1}")
+            for i, address in enumerate(replicas)
+        ]
+        self.stream_fetch_size = int(os.getenv("DB_STREAM_FETCH_SIZE", "500"))
+        self.read_your_writes_seconds = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+        self._last_write: Dict[Any, float] = {}
+        self._routing_lock = threading.Lock()
+        self._next_replica = 0
+        
+        # Retries back off with jitter; the breaker is shared by all sessions and
+        # fails statements fast while the primary is unreachable
+        self.retry_policy = RetryPolicy(
+            max_attempts=int(os.getenv("DB_RETRY_ATTEMPTS", "3")),
+            base_delay=float(os.getenv("DB_RETRY_BASE_DELAY_MS", "100")) / 1000,
+            max_delay=float(os.getenv("DB_RETRY_MAX_DELAY_MS", "2000")) / 1000
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("DB_BREAKER_RESET_SECONDS", "15")),
+            half_open_probes=int(os.getenv("DB_BREAKER_HALF_OPEN_PROBES", "1"))
+        )
+        
+        # Opt-in result cache for hot reads, invalidated by writes to the tables they read
+        self.query_cache = QueryCache()
+        
+        # Whether user keys are BINARY(16); see db/keys.py. Read from the schema
+        # once the pool is up and kept current by run_migrations
+        self.binary_keys = False
+        
+        self._local = threading.local()
         self._initialized = True
         
-        # Create database and tables if they don't exist
-        self._initialize_database()
+        # Create the database if it doesn't exist
+        self.backend.initialize()
+        
+        # Warm up the pools; failures are retried lazily on first use.
+        # Liveness is checked in the background instead of pinging before every statement
+        keepalive_interval = float(os.getenv("DB_POOL_KEEPALIVE_INTERVAL", "60"))
+        for pool in [self.pool] + self.replica_pools:
+            try:
+                pool.fill()
+            except self.backend.errors as e:
+                logger.error(f"Error filling {self.dialect} connection pool {pool.name}: {str(e)}")
+            pool.start_keepalive(keepalive_interval)
+        
+        self.binary_keys = self._detect_binary_keys()
     
-    def _get_connection(self):
-        """Get a database connection with improved error handling."""
+    def _detect_binary_keys(self) -> bool:
+        """
+        Check whether the schema already stores user keys as BINARY(16).
+        
+        Read at startup rather than left to run_migrations, so that key
+        parameters are bound as bytes even when this process's migration run
+        fails or never happens.
+        
+        Returns:
+            True if migration BINARY_KEYS_VERSION is recorded in schema_version
+        """
         try:
-            if self.connection is None or not self.connection.is_connected():
-                # Log connection attempt
-                logger.debug(f"Connecting to MySQL: {self.db_user}@{self.db_host}:{self.db_port}/{self.db_name}")
-                
-                # Add authentication_plugin parameter for compatibility
-                self.connection = mysql.connector.connect(
-                    host=self.db_host,
-                    user=self.db_user,
-                    password=self.db_password,
-                    database=self.db_name,
-                    port=self.db_port,
-                    auth_plugin='mysql_native_password',  # Try alternative auth method
-                    use_pure=True  # Use pure Python implementation for better compatibility
-                )
-                logger.debug("Connected to MySQL successfully")
-            return self.connection
-        except mysql.connector.Error as e:
-            logger.error(f"Error connecting to MySQL: {str(e)}")
-            logger.error(traceback.format_exc())
-            return None
-    
-    def _initialize_database(self):
-        """Create the database and tables if they don't exist."""
+            pooled = self.pool.acquire()
+        except self.backend.errors + (PoolTimeoutError,) as e:
+            logger.warning(f"Could not read the user key type, assuming string keys until migrations run: {str(e)}")
+            return False
         try:
-            # First, connect without specifying a database to create it if needed
-            logger.debug(f"Initializing database: {self.db_name}")
-            init_conn = mysql.connector.connect(
-                host=self.db_host,
-                user=self.db_user,
-                password=self.db_password,
-                port=self.db_port
+            row = self._run_statement(
+                pooled, "SELECT COUNT(*) AS applied FROM schema_version WHERE version = %s",
+                (BINARY_KEYS_VERSION,), fetch_one=True
             )
-            
-            cursor = init_conn.cursor()
-            
-            # Create database if it doesn't exist
-            logger.debug(f"Creating database if not exists: {self.db_name}")
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.db_name}")
-            cursor.execute(f"USE {self.db_name}")
-            
-            # Commit changes and close connection
-            init_conn.commit()
-            cursor.close()
-            init_conn.close()
-            
-            logger.debug("Database and tables initialized successfully")
-            
-        except mysql.connector.Error as e:
-            logger.error(f"Error initializing database: {str(e)}")
-            logger.error(traceback.format_exc())
+            return bool(row and row["applied"])
+        except self.backend.errors:
+            # No schema_version table yet: a new database, created with string keys
+            return False
+        finally:
+            self.pool.release(pooled)
+    
+    def _create_pool(self, connect, name: str) -> ConnectionPool:
+        """Create a connection pool sized from the DB_POOL_* settings."""
+        return ConnectionPool(
+            connect,
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            idle_timeout=float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300")),
+            acquire_timeout=float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "10")),
+            validate=self.backend.is_alive,
+            validate_on_borrow=os.getenv("DB_POOL_VALIDATE_ON_BORROW", "false").lower() == "true",
+            name=name
+        )
+    
+    def _create_connection(self, use_pure: Optional[bool] = None):
+        """
+        Open a new backend connection for the pool.
+        
+        Args:
+            use_pure: Force the pure Python (True) or C extension (False) MySQL
+                driver; defaults to the configured mode
+        """
+        return self.backend.connect(use_pure)
+    
+    def get_query_stats(self) -> List[Dict[str, Any]]:
+        """
+        Get per-query-fingerprint statistics (requires DB_QUERY_STATS=true).
+        
+        Returns:
+            List of fingerprint rows with latency histogram, rows, retries and reconnects
+        """
+        return query_stats.snapshot()
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics for sizing the pool.
+        
+        Returns:
+            Dict with the primary pool's size, utilization and wait times, plus
+            the same statistics per read replica under "replicas"
+        """
+        stats = self.pool.stats()
+        stats["replicas"] = [pool.stats() for pool in self.replica_pools]
+        stats["breaker"] = self.breaker.stats()
+        return stats
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get query result cache statistics.
+        
+        Returns:
+            Dict with hits, misses, hit ratio, entries, invalidations and evictions
+        """
+        return self.query_cache.stats()
     
-    def execute_query(self, query: str, params: tuple = None, fetch_one: bool = False):
+    def invalidate_cache_tags(self, tags: Iterable[str]) -> None:
+        """
+        Invalidate cache tags that are not table names, e.g. a per-class tag.
+        
+        Writes invalidate the tables they touch automatically; callers use this
+        for finer-grained tags they attach to reads via cache_tables. Inside a
+        transaction the tags are invalidated when it commits.
+        
+        Args:
+            tags: Cache tags to invalidate
+        """
+        tx = self.current_transaction()
+        if tx is not None:
+            tx.written_tables.update(tags)
+        else:
+            self.query_cache.invalidate(tags)
+    
+    def is_available(self) -> bool:
+        """
+        Check whether the database is worth querying.
+        
+        UI components can skip optional database work while this is False;
+        execute_query would return None straight away anyway.
+        
+        Returns:
+            False while the circuit breaker is open
+        """
+        return self.breaker.state != CircuitBreaker.OPEN
+    
+    def bind_session(self, session_id: Optional[str]) -> None:
+        """
+        Attribute statements from the calling thread to a user session.
+        
+        Read-your-writes routing is tracked per session; unbound threads are
+        tracked per thread.
+        
+        Args:
+            session_id: Stable id of the session (e.g. the Streamlit session id)
+        """
+        self._local.session_id = session_id
+    
+    def _session_key(self):
+        return getattr(self._local, "session_id", None) or threading.get_ident()
+    
+    def _mark_write(self) -> None:
+        """Start the read-your-writes window for the calling session."""
+        if not self.replica_pools:
+            return
+        now = time.monotonic()
+        with self._routing_lock:
+            self._last_write[self._session_key()] = now
+            if len(self._last_write) > 1000:
+                # Forget sessions whose window has long passed
+                cutoff = now - self.read_your_writes_seconds
+                self._last_write = {key: at for key, at in self._last_write.items() if at >= cutoff}
+    
+    def _pool_for(self, query: str) -> ConnectionPool:
+        """
+        Choose the pool for a statement outside a transaction.
+        
+        Reads go to the replicas round-robin unless the calling session wrote
+        within the read-your-writes window; everything else goes to the primary.
+        """
+        if not self.replica_pools or not _is_read_query(query) or _FOR_UPDATE.search(query):
+            return self.pool
+        last_write = self._last_write.get(self._session_key())
+        if last_write is not None and time.monotonic() - last_write < self.read_your_writes_seconds:
+            return self.pool
+        with self._routing_lock:
+            pool = self.replica_pools[self._next_replica % len(self.replica_pools)]
+            self._next_replica += 1
+        return pool
+    
+    def _statement_cursor(self, pooled, query: str, params: tuple, buffered: bool):
+        """
+        Get a cursor for a statement.
+        
+        Parameterized SELECT/INSERT/UPDATE/DELETE statements use a server-side
+        prepared statement cached per connection in LRU order (keyed by SQL
+        text) when the prepared cache is enabled, so repeated hot queries skip
+        re-parsing. Everything else uses a regular dictionary cursor.
+        
+        Returns:
+            Tuple of (cursor, query object to execute, whether the cursor is cached)
+        """
+        if self.prepared_cache_size > 0 and params and _is_preparable(query):
+            statements = pooled.statements
+            entry = statements.get(query)
+            if entry is None:
+                entry = (query, pooled.raw.cursor(prepared=True, dictionary=True))
+                statements[query] = entry
+                if len(statements) > self.prepared_cache_size:
+                    _, (_, evicted) = statements.popitem(last=False)
+                    evicted.close()  # Deallocates the server-side statement
+            else:
+                statements.move_to_end(query)
+            # The driver only reuses a prepared statement for the identical query object
+            return entry[1], entry[0], True
+        return pooled.raw.cursor(dictionary=True, buffered=buffered), query, False
+    
+    def _run_statement(self, pooled, query: str, params: tuple = None, fetch_one: bool = False,
+                       buffered: bool = True, retries: int = 0, reconnects: int = 0):
+        """Execute one statement on a pooled connection and return rows or the affected row count."""
+        start = time.perf_counter() if query_stats.enabled else 0.0
+        if self.binary_keys:
+            params = encode_params(query, params)
+        cursor, operation, cached = self._statement_cursor(pooled, query, params, buffered)
+        try:
+            cursor.execute(operation, params or ())
+            if _is_read_query(query):
+                if cached:
+                    # Drain prepared cursors fully so they can be reused
+                    rows = cursor.fetchall()
+                    result = (rows[0] if rows else None) if fetch_one else rows
+                else:
+                    result = cursor.fetchone() if fetch_one else cursor.fetchall()
+                row_count = (1 if result else 0) if fetch_one else len(result)
+                if self.binary_keys and result:
+                    if fetch_one:
+                        decode_row(result)
+                    else:
+                        for row in result:
+                            decode_row(row)
+            else:
+                result = row_count = cursor.rowcount
+            if query_stats.enabled:
+                query_stats.record(query, (time.perf_counter() - start) * 1000, row_count, retries, reconnects)
+            return result
+        except Exception:
+            if query_stats.enabled:
+                query_stats.record(query, (time.perf_counter() - start) * 1000, 0, retries, reconnects, error=True)
+            if cached:
+                # Re-prepare on next use rather than reuse a statement in an unknown state
+                pooled.statements.pop(query, None)
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            raise
+        finally:
+            if not cached:
+                cursor.close()
+    
+    def current_transaction(self) -> Optional[Transaction]:
+        """Get the transaction open in the calling thread, if any."""
+        return getattr(self._local, "transaction", None)
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Run a block of statements as one unit of work.
+        
+        Usage:
+            with db.transaction() as tx:
+                tx.execute(...)
+                tx.executemany(...)
+        
+        Calls to execute_query from the same thread while the block is open
+        join the transaction, so existing helpers can be composed into it.
+        Nested transaction() blocks join the outermost one. The transaction is
+        committed when the outermost block exits and rolled back if it raises
+        or any statement failed.
+        
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+        """
+        current = self.current_transaction()
+        if current is not None:
+            try:
+                yield current
+            except Exception:
+                # The outer block may swallow the error, so make sure it cannot commit
+                current.set_rollback_only()
+                raise
+            return
+        
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Database circuit breaker is open")
+        try:
+            pooled = self.pool.acquire()
+        except PoolTimeoutError:
+            # Every connection is busy: local backpressure, not a database outage
+            self.breaker.release_probe()
+            raise
+        except self.backend.errors:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        tx = Transaction(self, pooled)
+        self._local.transaction = tx
+        discard = False
+        try:
+            pooled.raw.start_transaction()
+            yield tx
+            if tx.rollback_only:
+                logger.warning("Rolling back transaction after a failed statement")
+                pooled.raw.rollback()
+            else:
+                pooled.raw.commit()
+                tx.committed = True
+                self._mark_write()
+                if tx.written_tables:
+                    self.query_cache.invalidate(tx.written_tables)
+        except Exception:
+            try:
+                pooled.raw.rollback()
+            except self.backend.errors as e:
+                logger.error(f"Error rolling back transaction: {str(e)}")
+                discard = True
+            raise
+        finally:
+            self._local.transaction = None
+            self.pool.release(pooled, discard=discard)
+    
+    def execute_query(self, query: str, params: tuple = None, fetch_one: bool = False,
+                      cache_tables: Tuple[str, ...] = None, cache_ttl: float = None):
         """
         Execute a query and return the results.
+        
+        Args:
+            query: SQL statement
+            params: Statement parameters
+            fetch_one: Return a single row for SELECT statements
+            cache_tables: Opt a SELECT into the result cache, naming every table
+                it reads; writes to any of them invalidate the cached result
+            cache_ttl: Seconds the cached result stays valid (defaults to DB_QUERY_CACHE_TTL)
+        
+        Inside a transaction() block the statement runs on the transaction's
+        connection; a failure marks the transaction rollback-only.
+        
+        Connection failures are retried with jittered exponential backoff.
+        While the circuit breaker is open, statements for the primary return
+        None without touching the database.
         """
-        max_retries = 3
+        tx = self.current_transaction()
+        if tx is not None:
+            try:
+                return tx.execute(query, params, fetch_one)
+            except self.backend.errors as e:
+                logger.error(f"Error executing query in transaction: {str(e)}")
+                logger.error(f"Query: {query}")
+                logger.error(f"Params: {params}")
+                tx.set_rollback_only()
+                return None
+        
+        cache_key = None
+        if cache_tables and self.query_cache.enabled:
+            cache_key = (query, tuple(params) if params else (), fetch_one)
+            hit, cached = self.query_cache.get(cache_key)
+            if hit:
+                return cached
+            versions = self.query_cache.versions(cache_tables)
+        
+        max_retries = self.retry_policy.max_attempts
         retry_count = 0
+        reconnects = 0
         
+        pool = self._pool_for(query)
         while retry_count < max_retries:
-            connection = self._get_connection()
-            if not connection:
-                logger.error("Failed to get database connection")
-                time.sleep(1)  # Wait before retry
+            # Replicas are not guarded; reads keep flowing to them while the primary is down
+            guarded = pool is self.pool
+            if guarded and not self.breaker.allow_request():
+                logger.debug("Circuit breaker open, skipping query")
+                return None
+            try:
+                pooled = pool.acquire()
+            except self.backend.errors + (PoolTimeoutError,) as e:
+                if not guarded:
+                    logger.warning(f"Read replica {pool.name} unavailable, reading from primary: {str(e)}")
+                    pool = self.pool
+                    continue
+                if isinstance(e, PoolTimeoutError):
+                    # Every connection is busy: back off and retry, but the
+                    # database itself is fine, so leave the breaker alone
+                    logger.warning(f"Connection pool exhausted, retrying: {str(e)}")
+                    self.breaker.release_probe()
+                else:
+                    logger.error(f"Failed to get database connection: {str(e)}")
+                    self.breaker.record_failure()
                 retry_count += 1
+                if retry_count < max_retries:
+                    time.sleep(self.retry_policy.delay(retry_count))
                 continue
-                
+            
+            discard = False
             try:
-                cursor = connection.cursor(dictionary=True)
-                
-                # Log query with parameters
-                if params:
-                    param_str = str(params)
-                    logger.debug(f"Executing query: {query} with params: {param_str}")
-                else:
-                    logger.debug(f"Executing query: {query}")
+                # Only format the query and parameters when debug logging is on
+                debug = logger.isEnabledFor(logging.DEBUG)
+                if debug:
+                    logger.debug("Executing query: %s with params: %s", query, params)
                 
-                cursor.execute(query, params or ())
-                
-                if query.strip().upper().startswith(("SELECT", "SHOW")):
-                    if fetch_one:
-                        result = cursor.fetchone()
-                    else:
-                        result = cursor.fetchall()
-                    cursor.close()
-                    return result
-                else:
-                    connection.commit()
-                    affected_rows = cursor.rowcount
-                    cursor.close()
-                    logger.debug(f"Query executed successfully. Affected rows: {affected_rows}")
-                    return affected_rows
-            except mysql.connector.Error as e:
+                # Connections run in autocommit mode, so writes are already durable
+                result = self._run_statement(pooled, query, params, fetch_one, buffered=False,
+                                             retries=retry_count, reconnects=reconnects)
+                if guarded:
+                    self.breaker.record_success()
+                if cache_key is not None and result is not None:
+                    self.query_cache.put(cache_key, tuple(cache_tables), result, versions, cache_ttl)
+                elif not _is_read_query(query):
+                    self._mark_write()
+                    table = written_table(query)
+                    if table:
+                        self.query_cache.invalidate([table])
+                    if debug:
+                        logger.debug("Query executed successfully. Affected rows: %s", result)
+                return result
+            except self.backend.errors as e:
                 logger.error(f"Error executing query: {str(e)}")
                 logger.error(f"Query: {query}")
                 logger.error(f"Params: {params}")
@@ -152,18 +590,106 @@ class MySQLConnection:
                 
                 # Check for connection-related errors to retry
                 should_retry = False
-                if "2006" in str(e) or "2013" in str(e):  # Common MySQL connection lost error codes
+                if self.backend.is_disconnect(e):
                     logger.debug("Connection lost, attempting to reconnect...")
-                    self.connection = None  # Force reconnection
+                    discard = True  # Force reconnection
+                    reconnects += 1
                     should_retry = True
+                    if guarded:
+                        self.breaker.record_failure()
+                elif guarded:
+                    # The server answered; the statement itself was at fault
+                    self.breaker.record_success()
                 
                 if should_retry and retry_count < max_retries - 1:
+                    # Retry straight away: the dead connection is dropped and the
+                    # next one comes from the pool or is freshly opened
                     retry_count += 1
-                    time.sleep(1)  # Wait before retry
                     continue
                 else:
                     return None
             except Exception as e:
                 logger.error(f"Unexpected error executing query: {str(e)}")
                 #logger.error(traceback.format_exc())
-                return None
\ No newline at end of file
+                if guarded:
+                    self.breaker.record_success()
+                return None
+            finally:
+                pool.release(pooled, discard=discard)
+    
+    def stream_query(self, query: str, params: tuple = None, fetch_size: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the rows of a SELECT without materializing the result set.
+        
+        Rows are read through an unbuffered cursor fetch_size at a time, so a
+        bulk reader runs in constant memory. The stream holds its own pooled
+        connection until it is exhausted or closed; do not interleave other
+        statements from inside a transaction() block with it.
+        
+        Usage:
+            for row in db.stream_query("SELECT uid, email FROM users"):
+                ...
+        
+        Args:
+            query: SELECT statement
+            params: Statement parameters
+            fetch_size: Rows fetched per round trip (defaults to DB_STREAM_FETCH_SIZE)
+            
+        Yields:
+            One dict per row
+            
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            Database errors are logged and re-raised, so a failed stream is never
+            mistaken for a short result
+        """
+        fetch_size = fetch_size or self.stream_fetch_size
+        pool = self._pool_for(query)
+        guarded = pool is self.pool
+        if guarded and not self.breaker.allow_request():
+            raise CircuitOpenError("Database circuit breaker is open")
+        try:
+            pooled = pool.acquire()
+        except PoolTimeoutError:
+            if guarded:
+                self.breaker.release_probe()
+            raise
+        except self.backend.errors:
+            if guarded:
+                self.breaker.record_failure()
+            raise
+        if guarded:
+            self.breaker.record_success()
+        
+        start = time.perf_counter() if query_stats.enabled else 0.0
+        rows = 0
+        exhausted = False
+        discard = False
+        binary_keys = self.binary_keys
+        cursor = pooled.raw.cursor(dictionary=True, buffered=False)
+        try:
+            cursor.execute(query, (encode_params(query, params) if binary_keys else params) or ())
+            while True:
+                batch = cursor.fetchmany(fetch_size)
+                if not batch:
+                    break
+                rows += len(batch)
+                if binary_keys:
+                    for row in batch:
+                        decode_row(row)
+                yield from batch
+            exhausted = True
+        except self.backend.errors as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            logger.error(f"Query: {query}")
+            discard = self.backend.is_disconnect(e)
+            raise
+        finally:
+            if query_stats.enabled:
+                query_stats.record(query, (time.perf_counter() - start) * 1000, rows, error=not exhausted)
+            try:
+                cursor.close()
+            except Exception:
+                # Abandoned mid-stream: the unread rest of the result makes the connection unusable
+                discard = True
+            pool.release(pooled, discard=discard)
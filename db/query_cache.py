@@ -0,0 +1,194 @@
+"""
+Query result cache for the Java Peer Review Training System.
+
+Caching is opt-in per statement: execute_query(..., cache_tables=("users",))
+names the tables a SELECT reads. Any write through MySQLConnection to one of
+those tables drops the matching entries (writes inside a transaction drop
+them when it commits). Entries also expire after a TTL and the least recently
+used entry is evicted when the cache is full.
+
+The cache is per process. Writes made by other processes or directly in the
+database are only picked up when entries expire, so keep TTLs short for data
+that other writers touch. Enable with DB_QUERY_CACHE=true (default).
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WRITE_TARGET = re.compile(
+    r"^\s*(?:INSERT(?:\s+IGNORE)?(?:\s+INTO)?|REPLACE(?:\s+INTO)?|UPDATE|DELETE\s+FROM)\s+`?(\w+)`?",
+    re.IGNORECASE
+)
+_DDL = re.compile(r"^\s*(?:ALTER|CREATE|DROP|TRUNCATE|RENAME)\b", re.IGNORECASE)
+
+# Marker for "invalidate every table", returned for DDL
+ALL_TABLES = "*"
+
+
+def written_table(query: str) -> Optional[str]:
+    """
+    Get the table a write statement modifies.
+
+    Args:
+        query: SQL statement
+
+    Returns:
+        Lower-case table name, ALL_TABLES for DDL, or None for statements that don't write
+    """
+    match = _WRITE_TARGET.match(query)
+    if match:
+        return match.group(1).lower()
+    if _DDL.match(query):
+        return ALL_TABLES
+    return None
+
+
+def _copy(value: Any) -> Any:
+    """Shallow-copy result rows so callers can mutate what they get back."""
+    if isinstance(value, list):
+        return [dict(row) if isinstance(row, dict) else row for row in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class QueryCache:
+    """Thread-safe TTL + LRU cache of query results tagged with the tables they read."""
+
+    def __init__(self, max_entries: int = None, default_ttl: float = None):
+        """
+        Args:
+            max_entries: Maximum cached results (defaults to DB_QUERY_CACHE_SIZE)
+            default_ttl: Seconds an entry stays valid (defaults to DB_QUERY_CACHE_TTL)
+        """
+        self.enabled = os.getenv("DB_QUERY_CACHE", "true").lower() == "true"
+        self.max_entries = max_entries or int(os.getenv("DB_QUERY_CACHE_SIZE", "1024"))
+        self.default_ttl = default_ttl or float(os.getenv("DB_QUERY_CACHE_TTL", "30"))
+        self._lock = threading.Lock()
+        # key -> (expires_at, tables, value)
+        self._entries: "OrderedDict[Any, Tuple[float, Tuple[str, ...], Any]]" = OrderedDict()
+        self._by_table: Dict[str, Set[Any]] = {}
+        # Bumped on every invalidation so a read that overlapped a write is not cached
+        self._table_versions: Dict[str, int] = {}
+        self._epoch = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+
+    def versions(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        """
+        Get the current invalidation counters of the given tables.
+
+        Counters advance on every write through MySQLConnection, even with the
+        cache disabled, so they also tell in-process caches built on top of
+        the DB layer when to refresh.
+        """
+        with self._lock:
+            return self._versions_locked(tables)
+
+    def get(self, key: Any) -> Tuple[bool, Any]:
+        """
+        Look up a cached result.
+
+        Returns:
+            Tuple of (hit, value)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return True, _copy(entry[2])
+            if entry is not None:
+                self._remove_locked(key)
+            self._misses += 1
+            return False, None
+
+    def put(self, key: Any, tables: Tuple[str, ...], value: Any, versions: Tuple[int, ...],
+            ttl: float = None) -> None:
+        """
+        Store a result unless one of its tables was written since versions were taken.
+
+        Args:
+            key: Cache key
+            tables: Tables the result was read from
+            value: Query result
+            versions: Result of versions(tables) taken before the query ran
+            ttl: Seconds the entry stays valid (defaults to default_ttl)
+        """
+        with self._lock:
+            if self._versions_locked(tables) != versions:
+                return
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = (time.monotonic() + (ttl or self.default_ttl), tables, _copy(value))
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove_locked(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        """
+        Drop every entry that read from any of the tables.
+
+        Args:
+            tables: Table names, or ALL_TABLES to drop everything
+        """
+        with self._lock:
+            for table in tables:
+                if table == ALL_TABLES:
+                    self._epoch += 1
+                    self._invalidations += len(self._entries)
+                    self._entries.clear()
+                    self._by_table.clear()
+                    return
+                self._table_versions[table] = self._table_versions.get(table, 0) + 1
+                for key in self._by_table.pop(table, ()):
+                    if key in self._entries:
+                        self._remove_locked(key)
+                        self._invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self.invalidate([ALL_TABLES])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with hits, misses, hit ratio (round trips saved / cacheable reads),
+            entries, invalidations and evictions
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "invalidations": self._invalidations,
+                "evictions": self._evictions,
+            }
+
+    def _versions_locked(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        return (self._epoch,) + tuple(self._table_versions.get(table, 0) for table in tables)
+
+    def _remove_locked(self, key: Any) -> None:
+        _, tables, _ = self._entries.pop(key)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
@@ -0,0 +1,190 @@
+"""
+EXPLAIN-based regression check for the project's known hot queries.
+
+Fails when any known query falls back to a full table scan on one of the
+large tables. Query plans depend on table statistics, so run it against a
+database seeded to a realistic size, e.g. a scratch database:
+
+    python -m db.query_plans --seed-users 100000
+"""
+
+import argparse
+import logging
+import random
+import re
+import sys
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from auth.badge_rules import snapshot_query
+from db.mysql_connection import MySQLConnection
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_USER_ID = "00000000-0000-0000-0000-000000000001"
+SAMPLE_CLASS_ID = ""
+
+# Tables that grow with the user base; a full scan of these is a regression.
+# The badge catalog is small and constant, so scanning it is fine.
+LARGE_TABLES = {"users", "user_badges", "error_category_stats", "activity_log", "user_daily_activity"}
+
+# (name, query, params) for the statements the app runs on every render or review
+KNOWN_QUERIES: List[Tuple[str, str, tuple]] = [
+    ("user_profile", "SELECT * FROM users WHERE uid = %s", (SAMPLE_USER_ID,)),
+    ("user_total_points", "SELECT total_points FROM users WHERE uid = %s", (SAMPLE_USER_ID,)),
+    ("user_rank_count", "SELECT COUNT(*) AS rank_pos FROM users WHERE class_id = %s AND total_points > %s",
+     (SAMPLE_CLASS_ID, 500)),
+    ("leaderboard", """
+        SELECT uid, display_name_en as display_name, total_points, level_name_en as level
+        FROM users
+        WHERE total_points > 0 AND class_id = %s
+        ORDER BY total_points DESC, uid DESC
+        LIMIT %s
+    """, (SAMPLE_CLASS_ID, 10)),
+    ("user_badges", """
+        SELECT b.badge_id, b.name_en as name, b.icon, ub.awarded_at
+        FROM badges b
+        JOIN user_badges ub ON b.badge_id = ub.badge_id
+        WHERE ub.user_id = %s
+        ORDER BY ub.awarded_at DESC
+    """, (SAMPLE_USER_ID,)),
+    ("badge_exists", "SELECT * FROM user_badges WHERE user_id = %s AND badge_id = %s", (SAMPLE_USER_ID, "bug-hunter")),
+    ("category_stats", """
+        SELECT * FROM error_category_stats
+        WHERE user_id = %s
+        ORDER BY mastery_level DESC
+    """, (SAMPLE_USER_ID,)),
+    ("class_category_stats", """
+        SELECT c.category, SUM(c.encountered) AS encountered, SUM(c.identified) AS identified,
+            COUNT(*) AS students
+        FROM users u
+        JOIN error_category_stats c ON c.user_id = u.uid
+        WHERE u.class_id = %s
+        GROUP BY c.category
+    """, (SAMPLE_CLASS_ID,)),
+    ("badge_snapshot", *snapshot_query(SAMPLE_USER_ID)),
+    ("activity_log", """
+        SELECT activity_type, points, template_id, params, created_at
+        FROM activity_log
+        WHERE user_id = %s
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s
+    """, (SAMPLE_USER_ID, 20)),
+    ("activity_history", """
+        SELECT activity_date, points, reviews, perfect_reviews
+        FROM user_daily_activity
+        WHERE user_id = %s AND activity_date >= %s
+    """, (SAMPLE_USER_ID, "2024-01-01")),
+]
+
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+def _sqlite_full_scan(step: Dict[str, Any]) -> Optional[str]:
+    """Get the table of an EXPLAIN QUERY PLAN step that scans a table without an index."""
+    match = _SQLITE_SCAN.match(step.get("detail", ""))
+    if match and "USING" not in step["detail"]:
+        return match.group(1)
+    return None
+
+
+def find_full_scans(db: MySQLConnection) -> List[Dict[str, Any]]:
+    """
+    EXPLAIN every known query and report full scans of large tables.
+
+    Args:
+        db: Database connection manager
+
+    Returns:
+        One entry per offending (query, table) pair; empty when all plans use indexes
+    """
+    problems = []
+    for name, query, params in KNOWN_QUERIES:
+        plan = db.execute_query(f"EXPLAIN {query}", params)
+        if plan is None:
+            problems.append({"query": name, "table": None, "detail": "EXPLAIN failed"})
+            continue
+        for step in plan:
+            if db.dialect == "sqlite":
+                # EXPLAIN QUERY PLAN reports "SCAN <table>" for an unindexed scan
+                table = _sqlite_full_scan(step)
+                if table in LARGE_TABLES:
+                    problems.append({"query": name, "table": table, "detail": step["detail"]})
+            elif step.get("type") == "ALL" and step.get("table") in LARGE_TABLES:
+                problems.append({
+                    "query": name,
+                    "table": step.get("table"),
+                    "detail": f"full scan of ~{step.get('rows')} rows",
+                })
+    return problems
+
+
+def seed_users(db: MySQLConnection, count: int, batch_size: int = 1000) -> None:
+    """
+    Insert synthetic users with activity and badges so plans reflect a large class.
+
+    Seeded accounts use @seed.invalid emails. Only run this against a scratch database.
+
+    Args:
+        db: Database connection manager
+        count: Number of users to insert
+        batch_size: Rows per batched insert
+    """
+    badge_ids = [row["badge_id"] for row in db.execute_query("SELECT badge_id FROM badges") or []]
+    run_id = uuid.uuid4().hex[:8]
+    inserted = 0
+    while inserted < count:
+        size = min(batch_size, count - inserted)
+        users, activities, badges = [], [], []
+        for i in range(inserted, inserted + size):
+            uid = str(uuid.uuid4())
+            points = random.randint(0, 2000)
+            badge_count = 1 if badge_ids and random.random() < 0.3 else 0
+            users.append((uid, f"seed-{run_id}-{i}@seed.invalid", f"Seed {i}", f"Seed {i}", "-", "Basic", "基礎",
+                          points, badge_count))
+            activities.append((uid, random.choice(["review_completion", "perfect_review", "badge_earned"]), 10, None, None))
+            if badge_count:
+                badges.append((uid, random.choice(badge_ids)))
+        with db.transaction() as tx:
+            tx.executemany(
+                """
+                INSERT INTO users (uid, email, display_name_en, display_name_zh, password, level_name_en, level_name_zh,
+                                   total_points, badge_count)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                users
+            )
+            tx.executemany(
+                "INSERT INTO activity_log (user_id, activity_type, points, template_id, params) VALUES (%s, %s, %s, %s, %s)",
+                activities
+            )
+            tx.executemany("INSERT INTO user_badges (user_id, badge_id) VALUES (%s, %s)", badges)
+        inserted += size
+        logger.info(f"Seeded {inserted}/{count} users")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fail if known queries fall back to full table scans")
+    parser.add_argument("--seed-users", type=int, default=0,
+                        help="Insert this many synthetic users first (scratch databases only)")
+    args = parser.parse_args()
+
+    from db.migrations import run_migrations
+
+    db = MySQLConnection()
+    run_migrations(db)
+    if args.seed_users:
+        seed_users(db, args.seed_users)
+
+    problems = find_full_scans(db)
+    for problem in problems:
+        print(f"FULL SCAN  {problem['query']}: {problem['table']} ({problem['detail']})")
+    if problems:
+        sys.exit(1)
+    print(f"All {len(KNOWN_QUERIES)} known queries use indexes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Query instrumentation for the Java Peer Review Training System.
+
+Records per-statement latency, rows, retries and reconnects, rolled up into
+per-fingerprint histograms, plus a slow-query log and per-rerun counters.
+Disabled by default; enable with DB_QUERY_STATS=true. When disabled the
+database layer skips timing entirely.
+"""
+
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("db.slow_query")
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(query: str) -> str:
+    """
+    Normalize a statement so that executions differing only in literals group together.
+
+    Args:
+        query: SQL statement
+
+    Returns:
+        Statement with literals replaced by ? and whitespace collapsed
+    """
+    normalized = _STRING_LITERAL.sub("?", query)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?+)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class QueryScope:
+    """Counter for the statements issued while a scope (e.g. one rerun) is open."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queries = 0
+        self.total_ms = 0.0
+
+
+class QueryStats:
+    """Thread-safe accumulator of statement metrics."""
+
+    def __init__(self):
+        self.enabled = os.getenv("DB_QUERY_STATS", "false").lower() == "true"
+        self.slow_query_ms = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._by_fingerprint: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, str] = {}
+
+    def record(self, query: str, elapsed_ms: float, rows: int = 0, retries: int = 0,
+               reconnects: int = 0, error: bool = False) -> None:
+        """
+        Record one executed statement.
+
+        Args:
+            query: SQL statement
+            elapsed_ms: Wall-clock latency in milliseconds
+            rows: Rows returned (reads) or affected (writes)
+            retries: Attempts that failed before this one
+            reconnects: Connections dropped and reopened for this statement
+            error: Whether the statement failed
+        """
+        if not self.enabled:
+            return
+
+        key = self._fingerprints.get(query)
+        if key is None:
+            key = fingerprint(query)
+            if len(self._fingerprints) < 1000:
+                self._fingerprints[query] = key
+
+        with self._lock:
+            entry = self._by_fingerprint.get(key)
+            if entry is None:
+                entry = {
+                    "count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+                    "retries": 0, "reconnects": 0, "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+                self._by_fingerprint[key] = entry
+            entry["count"] += 1
+            entry["errors"] += 1 if error else 0
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["rows"] += rows
+            entry["retries"] += retries
+            entry["reconnects"] += reconnects
+            entry["buckets"][self._bucket(elapsed_ms)] += 1
+
+        for scope in getattr(self._local, "scopes", ()):
+            scope.queries += 1
+            scope.total_ms += elapsed_ms
+
+        if elapsed_ms >= self.slow_query_ms:
+            slow_query_logger.warning(
+                "Slow query (%.1f ms, %d rows, %d retries): %s", elapsed_ms, rows, retries, key
+            )
+
+    @contextmanager
+    def scope(self, name: str):
+        """
+        Count the statements issued by the current thread inside the block.
+
+        Scopes nest, so a sidebar scope inside a rerun scope counts towards both.
+
+        Usage:
+            with query_stats.scope("rerun") as rerun:
+                ...
+            logger.debug(f"{rerun.queries} queries")
+        """
+        current = QueryScope(name)
+        scopes = getattr(self._local, "scopes", None)
+        if scopes is None:
+            scopes = self._local.scopes = []
+        scopes.append(current)
+        try:
+            yield current
+        finally:
+            scopes.remove(current)
+            if self.enabled:
+                logger.debug(f"{name} issued {current.queries} queries in {current.total_ms:.1f} ms")
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Get the per-fingerprint statistics, most expensive first.
+
+        Returns:
+            List of dicts with count, latency, rows, retries, reconnects and histogram
+        """
+        with self._lock:
+            rows = []
+            for key, entry in self._by_fingerprint.items():
+                rows.append({
+                    "fingerprint": key,
+                    **entry,
+                    "buckets": dict(zip([f"<={b}ms" for b in LATENCY_BUCKETS_MS] + ["inf"], entry["buckets"])),
+                    "avg_ms": entry["total_ms"] / entry["count"] if entry["count"] else 0.0,
+                })
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def reset(self) -> None:
+        """Discard all recorded statistics."""
+        with self._lock:
+            self._by_fingerprint.clear()
+            self._fingerprints.clear()
+
+    @staticmethod
+    def _bucket(elapsed_ms: float) -> int:
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                return i
+        return len(LATENCY_BUCKETS_MS)
+
+
+# Shared instance used by the database layer
+query_stats = QueryStats()
@@ -0,0 +1,154 @@
+"""
+Failure handling for the database layer.
+
+RetryPolicy spaces retries with capped exponential backoff and full jitter,
+so sessions that failed together do not retry in lockstep. CircuitBreaker
+is shared by every session: after repeated connection failures it opens and
+statements fail fast instead of each waiting out its own retries. After a
+cool-down it lets a few probe requests through (half-open) and closes again
+on the first success.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a unit of work is refused because the circuit breaker is open."""
+
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.1, max_delay: float = 2.0):
+        """
+        Args:
+            max_attempts: Attempts per statement, including the first
+            base_delay: Backoff ceiling (seconds) before the first retry
+            max_delay: Upper bound of the backoff ceiling (seconds)
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """
+        Get the wait before the next attempt.
+
+        Args:
+            attempt: Number of attempts that have failed so far (1 for the first retry)
+
+        Returns:
+            Seconds to wait, uniformly random between 0 and the backoff ceiling
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """Thread-safe closed / open / half-open circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 15.0,
+                 half_open_probes: int = 1, name: str = "database"):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before probing
+            half_open_probes: Concurrent probe requests allowed while half-open
+            name: Label used in logs and stats
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.name = name
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._rejected = 0
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """Current state; an open circuit whose cool-down has passed reports half-open."""
+        with self._lock:
+            self._refresh_locked()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may go to the database, claiming a probe slot when half-open.
+
+        Every allowed request must be followed by record_success(), record_failure()
+        or, if it never reached the database, release_probe().
+
+        Returns:
+            False when the request should fail fast
+        """
+        with self._lock:
+            self._refresh_locked()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """Record that the database answered; closes a half-open circuit."""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit breaker {self.name} closed: database reachable again")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot claimed by a request that never reached the database."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_failure(self) -> None:
+        """Record a connection-level failure; may open the circuit."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (self._state == self.CLOSED and self._failures >= self.failure_threshold):
+                logger.warning(f"Circuit breaker {self.name} opened after {self._failures} consecutive failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probes = 0
+                self._times_opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get breaker statistics.
+
+        Returns:
+            Dict with state, consecutive failures, rejected requests and times opened
+        """
+        with self._lock:
+            self._refresh_locked()
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "rejected": self._rejected,
+                "times_opened": self._times_opened,
+            }
+
+    def _refresh_locked(self) -> None:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probes = 0
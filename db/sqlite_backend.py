@@ -0,0 +1,241 @@
+"""
+Embedded SQLite backend for the Java Peer Review Training System.
+
+Selected with DB_BACKEND=sqlite. The database lives in a single file
+(DB_SQLITE_PATH) opened in WAL mode, so readers never block the writer and
+queries run in-process without a network hop. Statements are written in the
+MySQL dialect used throughout the project and translated on first use:
+
+    %s placeholders          -> ?
+    INSERT IGNORE            -> INSERT OR IGNORE
+    SELECT ... FOR UPDATE    -> SELECT (transactions take the write lock up front)
+    EXPLAIN                  -> EXPLAIN QUERY PLAN
+    AUTO_INCREMENT, ENUM, UNIQUE KEY and ON UPDATE CURRENT_TIMESTAMP in DDL
+
+MySQL's UUID_TO_BIN() and BIN_TO_UUID() are registered as SQL functions.
+
+Use a file path rather than :memory:, since every pooled connection must
+see the same database.
+"""
+
+import copy
+import datetime
+import logging
+import os
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from db.keys import bin_to_uuid, uuid_to_bin
+
+logger = logging.getLogger(__name__)
+
+# Return DATE/TIMESTAMP columns as date/datetime objects like mysql.connector does
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("DATE", lambda value: datetime.date.fromisoformat(value.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.datetime.fromisoformat(value.decode()))
+
+_TRANSLATIONS = [
+    (re.compile(r"%([s%])"), lambda m: "?" if m.group(1) == "s" else "%"),
+    (re.compile(r"\bINSERT\s+IGNORE\b", re.IGNORECASE), lambda m: "INSERT OR IGNORE"),
+    (re.compile(r"\s+FOR\s+UPDATE\s*$", re.IGNORECASE), lambda m: ""),
+    (re.compile(r"^\s*EXPLAIN\s+", re.IGNORECASE), lambda m: "EXPLAIN QUERY PLAN "),
+    (re.compile(r"\b(?:BIG)?INT(?:EGER)?\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.IGNORECASE),
+     lambda m: "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bENUM\s*\([^)]*\)", re.IGNORECASE), lambda m: "TEXT"),
+    (re.compile(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b", re.IGNORECASE), lambda m: ""),
+    (re.compile(r"\bUNIQUE\s+KEY\s*(?:\w+\s*)?\(", re.IGNORECASE), lambda m: "UNIQUE ("),
+]
+
+_translated: Dict[str, str] = {}
+
+
+def translate_query(query: str) -> str:
+    """
+    Translate a MySQL-dialect statement to SQLite.
+
+    Args:
+        query: SQL statement as written for MySQL
+
+    Returns:
+        Equivalent SQLite statement
+    """
+    translated = _translated.get(query)
+    if translated is None:
+        translated = query
+        for pattern, replacement in _TRANSLATIONS:
+            translated = pattern.sub(replacement, translated)
+        if len(_translated) < 1000:
+            _translated[query] = translated
+    return translated
+
+
+def _dict_row(cursor: sqlite3.Cursor, row: tuple) -> Dict[str, Any]:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    """Cursor with the subset of the mysql.connector cursor API used by the project."""
+
+    def __init__(self, cursor: sqlite3.Cursor, dictionary: bool):
+        self._cursor = cursor
+        if dictionary:
+            cursor.row_factory = _dict_row
+
+    def execute(self, operation: str, params: tuple = ()) -> None:
+        self._cursor.execute(translate_query(operation), params or ())
+
+    def executemany(self, operation: str, seq_params: List[tuple]) -> None:
+        self._cursor.executemany(translate_query(operation), seq_params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self) -> list:
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: int = 1) -> list:
+        return self._cursor.fetchmany(size)
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    Connection with the subset of the mysql.connector connection API used by the project.
+
+    The underlying connection runs in autocommit mode; start_transaction()
+    opens a BEGIN IMMEDIATE transaction, which takes the write lock up front
+    so that read-then-write units of work cannot deadlock on lock upgrade.
+    """
+
+    def __init__(self, raw: sqlite3.Connection):
+        self.raw = raw
+
+    def cursor(self, dictionary: bool = False, buffered: Optional[bool] = None,
+               prepared: bool = False) -> SQLiteCursor:
+        # sqlite3 compiles and caches statements per connection, so the
+        # buffered and prepared options need no equivalent
+        return SQLiteCursor(self.raw.cursor(), dictionary)
+
+    def start_transaction(self) -> None:
+        self.raw.execute("BEGIN IMMEDIATE")
+
+    def commit(self) -> None:
+        if self.raw.in_transaction:
+            self.raw.execute("COMMIT")
+
+    def rollback(self) -> None:
+        if self.raw.in_transaction:
+            self.raw.execute("ROLLBACK")
+
+    def is_connected(self) -> bool:
+        try:
+            self.raw.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self) -> None:
+        self.raw.close()
+
+
+class SQLiteBackend:
+    """In-process SQLite database file in WAL mode."""
+
+    dialect = "sqlite"
+    errors = (sqlite3.Error,)
+    # Statement reuse is handled by sqlite3's own per-connection cache
+    prepared_cache_size = 0
+
+    def __init__(self):
+        self.path = os.getenv("DB_SQLITE_PATH", f"{os.getenv('DB_NAME', 'java_review_trainer')}.sqlite3")
+        self.busy_timeout_ms = int(os.getenv("DB_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        self.cache_size_mb = int(os.getenv("DB_SQLITE_CACHE_MB", "64"))
+        self.mmap_size_mb = int(os.getenv("DB_SQLITE_MMAP_MB", "256"))
+        self.statement_cache_size = int(os.getenv("DB_PREPARED_CACHE_SIZE", "128"))
+        self.read_only = False
+
+    def replica(self, address: str) -> "SQLiteBackend":
+        """
+        Get a read-only backend for a replica database file.
+
+        Args:
+            address: Path of the replica file (kept up to date externally,
+                or the primary's own file as a local stand-in)
+        """
+        replica = copy.copy(self)
+        replica.path = address
+        replica.read_only = True
+        return replica
+
+    def describe(self) -> str:
+        return f"sqlite:{self.path}"
+
+    def initialize(self) -> None:
+        """Create the database file and switch it to WAL mode (persistent per file)."""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory and not self.path.startswith("file:"):
+                os.makedirs(directory, exist_ok=True)
+            connection = self.connect()
+            try:
+                mode = connection.raw.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+                if mode.lower() != "wal":
+                    logger.warning(f"SQLite database {self.path} is using journal mode {mode}, not WAL")
+            finally:
+                connection.close()
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Error initializing database: {str(e)}")
+
+    def connect(self, use_pure: Optional[bool] = None) -> SQLiteConnection:
+        """
+        Open a new connection for the pool.
+
+        Args:
+            use_pure: Ignored; accepted for interface compatibility with the MySQL backend
+        """
+        logger.debug(f"Opening SQLite database: {self.path}")
+        raw = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,  # Autocommit; transactions are opened explicitly
+            check_same_thread=False,  # The pool hands connections to one thread at a time
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            cached_statements=self.statement_cache_size,
+            uri=self.path.startswith("file:")
+        )
+        # WAL makes NORMAL durable across application crashes; only an OS crash
+        # can lose the last transactions
+        raw.execute("PRAGMA synchronous=NORMAL")
+        raw.execute("PRAGMA foreign_keys=ON")
+        raw.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        raw.execute(f"PRAGMA cache_size=-{self.cache_size_mb * 1024}")
+        raw.execute(f"PRAGMA mmap_size={self.mmap_size_mb * 1024 * 1024}")
+        raw.execute("PRAGMA temp_store=MEMORY")
+        raw.create_function("UUID_TO_BIN", -1, uuid_to_bin, deterministic=True)
+        raw.create_function("BIN_TO_UUID", -1, bin_to_uuid, deterministic=True)
+        if self.read_only:
+            raw.execute("PRAGMA query_only=ON")
+        return SQLiteConnection(raw)
+
+    def is_alive(self, connection: SQLiteConnection) -> bool:
+        return connection.is_connected()
+
+    def is_disconnect(self, error: Exception) -> bool:
+        # An in-process database has no connection to lose
+        return False
@@ -22,6 +22,8 @@ translations = {
     
     # Login/Register
     "confirm_password": "Confirm Password",
+    "class_code": "Class Code (optional)",
+    "class_code_help": "Code from your instructor; leaderboards rank you against your class",
     "continue_demo": "Continue in Demo Mode (No Login Required)",
     "demo_mode": "Demo Mode",
     "display_name": "Display Name",
@@ -507,7 +509,15 @@ translations = {
     "top_performers": "Top Performers",
     "view_full_leaderboard": "View Full Leaderboard",
     "users": "users",
-    "of": "of"
+    "of": "of",
+    "previous_page": "Previous",
+    "next_page": "Next",
+    "jump_to_my_position": "Jump to my position",
+    "recent_activity": "Recent Activity",
+    "activity_free_text": "{text}",
+    "activity_review_completion": "Review completion with {accuracy:.1f}% accuracy, found {errors} errors",
+    "activity_badge_earned": "Earned badge: {badge}",
+    "activity_perfect_review": "Completed a perfect review"
 
 
 
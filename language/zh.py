@@ -21,6 +21,8 @@ translations = {
     
     # Login/Register
     "confirm_password": "確認密碼",
+    "class_code": "班級代碼（選填）",
+    "class_code_help": "由授課教師提供；排行榜將在您的班級內排名",
     "continue_demo": "繼續使用示範模式（無需登入）",
     "demo_mode": "示範模式",
     "display_name": "顯示名稱",
@@ -516,7 +518,15 @@ translations = {
     "top_performers": "頂尖表現者", 
     "view_full_leaderboard": "查看完整排行榜",
     "users": "用戶",
-    "of": "共"
+    "of": "共",
+    "previous_page": "上一頁",
+    "next_page": "下一頁",
+    "jump_to_my_position": "跳到我的位置",
+    "recent_activity": "最近活動",
+    "activity_free_text": "{text}",
+    "activity_review_completion": "完成審查，準確率 {accuracy:.1f}%，找到 {errors} 個錯誤",
+    "activity_badge_earned": "獲得徽章：{badge}",
+    "activity_perfect_review": "完成一次完美審查"
 
 
 }
\ No newline at end of file
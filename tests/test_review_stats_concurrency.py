@@ -0,0 +1,60 @@
+"""
+Concurrency tests for review statistics updates.
+
+Many threads submit reviews for the same user at once against a throwaway
+SQLite database; every submission must be counted exactly once and a level
+threshold crossed by the total must be reported by exactly one of them.
+
+    python -m unittest tests.test_review_stats_concurrency
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+# MySQLConnection is a singleton configured from the environment on first use,
+# so the backend is chosen before anything under db/ or auth/ is imported
+_DB_DIR = tempfile.mkdtemp(prefix="review-stats-")
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["DB_SQLITE_PATH"] = os.path.join(_DB_DIR, "review_stats.sqlite3")
+os.environ["EVENT_QUEUE_PATH"] = os.path.join(_DB_DIR, "event_queue.sqlite3")
+
+from db.benchmark import bench_hammer  # noqa: E402
+from db.migrations import run_migrations  # noqa: E402
+from db.mysql_connection import MySQLConnection  # noqa: E402
+
+
+def tearDownModule():
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+
+class ReviewStatsConcurrencyTest(unittest.TestCase):
+    """Hammer one user's review stats from many threads."""
+
+    THREADS = 8
+    REVIEWS_PER_THREAD = 5
+    # 40 reviews x 3 errors = 120: crosses Basic -> Medium (> 100) once, stays below Senior (> 200)
+    SCORE_PER_REVIEW = 3
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = MySQLConnection()
+        run_migrations(cls.db)
+        cls.result = bench_hammer(cls.db, cls.THREADS, cls.REVIEWS_PER_THREAD, cls.SCORE_PER_REVIEW)[0]
+
+    def test_every_submission_succeeds(self):
+        self.assertEqual(self.result["succeeded"], self.THREADS * self.REVIEWS_PER_THREAD)
+
+    def test_no_lost_updates(self):
+        self.assertEqual(self.result["lost_updates"], 0)
+        self.assertEqual(self.result["reviews_completed"], self.result["succeeded"])
+        self.assertEqual(self.result["score"], self.result["expected_score"])
+
+    def test_level_change_reported_once(self):
+        self.assertEqual(self.result["level_changes"], 1)
+        self.assertEqual(self.result["level"], "Medium")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,6 +14,7 @@ from pathlib import Path
 import base64
 
 from auth.mysql_auth import MySQLAuthManager
+from ui.components.animation import level_up_animation
 from utils.language_utils import t, get_current_language, set_language
 
 # Configure logging
@@ -90,7 +91,8 @@ class AuthUI:
                             "level_name_zh": result.get("level_name_zh"),
                             "reviews_completed": result.get("reviews_completed"),
                             "score": result.get("score"),
-                            "tutorial_completed": result.get("tutorial_completed", False)
+                            "tutorial_completed": result.get("tutorial_completed", False),
+                            "class_id": result.get("class_id", "")
                         }                     
                         st.success(t("login_success"))
                         
@@ -127,6 +129,7 @@ class AuthUI:
             email = st.text_input(t("email"), key="reg_email")
             password = st.text_input(t("password"), type="password", key="reg_password")
             confirm_password = st.text_input(t("confirm_password"), type="password", key="reg_confirm")
+            class_code = st.text_input(t("class_code"), key="reg_class", help=t("class_code_help"))
             
             # Student level selection using t() function
             level_internal_values = ["basic", "medium", "senior"]
@@ -178,7 +181,8 @@ class AuthUI:
                         display_name_en=display_name_en,
                         display_name_zh=display_name_zh,                        
                         level_name_en=level_name_en,
-                        level_name_zh=level_name_zh
+                        level_name_zh=level_name_zh,
+                        class_id=class_code
                     )
                     
                     # Handle registration result
@@ -194,7 +198,8 @@ class AuthUI:
                             "level": result.get("level", "basic"),
                             "level_name_en": result.get("level_name_en"),
                             "level_name_zh": result.get("level_name_zh"),
-                            "tutorial_completed": False  # New users haven't completed tutorial
+                            "tutorial_completed": False,  # New users haven't completed tutorial
+                            "class_id": result.get("class_id", "")
                         }                     
                         st.success(t("registration_success"))
                         
@@ -253,22 +258,76 @@ class AuthUI:
         
         # IMPORTANT: Pass both accuracy AND score parameters to the auth manager
         result = self.auth_manager.update_review_stats(user_id, accuracy, score)
-
+        self._apply_review_result(result)
+        return result
+    
+    def enqueue_review_stats(self, accuracy: float, score: int = 0):
+        """
+        Queue a review's statistics update so the page renders without waiting for it.
+        
+        The outcome is picked up on a later rerun by collect_review_results.
+        
+        Args:
+            accuracy: The accuracy of the review (0-100 percentage)
+            score: Number of errors detected in the review
+        """
+        if not st.session_state.auth.get("is_authenticated", False):
+            return {"success": False, "error": "User not authenticated"}
+        
+        if st.session_state.auth.get("user_id") == "demo-user":
+            return {"success": True, "message": "Demo user - no updates needed"}
+        
+        user_id = st.session_state.auth.get("user_id")
+        score = int(score) if score else 0
+        
+        result = self.auth_manager.enqueue_review_stats(user_id, accuracy, score)
+        if result.get("queued", False):
+            st.session_state.auth.setdefault("pending_review_events", []).append(result["event_key"])
+        else:
+            # Applied synchronously because the queue was unavailable
+            self._apply_review_result(result)
+        return result
+    
+    def collect_review_results(self) -> list:
+        """
+        Apply the outcome of queued review updates that finished since the last rerun.
+        
+        Returns:
+            List of finished update_review_stats results
+        """
+        pending = st.session_state.auth.get("pending_review_events") or []
+        finished = []
+        for event_key in list(pending):
+            result = self.auth_manager.get_review_stats_result(event_key)
+            if result is None:
+                continue
+            pending.remove(event_key)
+            self._apply_review_result(result)
+            finished.append(result)
+        return finished
+    
+    def _apply_review_result(self, result: Dict[str, Any]) -> None:
+        """Copy an applied review update into the session's user info and play any level-up."""
         if result and result.get("success", False):
             logger.debug(f"Updated user statistics: reviews={result.get('reviews_completed')}, " +
                     f"score={result.get('score')}")
             
+            user_info = st.session_state.auth.get("user_info")
+            if user_info and "reviews_completed" in result:
+                user_info["reviews_completed"] = result["reviews_completed"]
+                user_info["score"] = result["score"]
+            
             # Update session state if level changed
             if result.get("level_changed", False):
                 new_level = result.get("new_level")
-                if new_level and st.session_state.auth.get("user_info"):
-                    st.session_state.auth["user_info"]["level"] = new_level
+                if new_level and user_info:
+                    user_info["level"] = new_level
+                    user_info["level_name_en"] = new_level
                     logger.debug(f"Updated user level in session to: {new_level}")
+                level_up_animation(result.get("old_level", ""), new_level or "")
         else:
             err_msg = result.get('error', 'Unknown error') if result else "No result returned"
             logger.error(f"Failed to update review stats: {err_msg}")
-        
-        return result
     
     def is_authenticated(self) -> bool:
         """
@@ -374,6 +433,9 @@ class AuthUI:
         if not st.session_state.auth.get("is_authenticated", False):
             return
         
+        # Review updates applied in the background since the last rerun
+        self.collect_review_results()
+        
         user_info = st.session_state.auth.get("user_info", {})
         user_id = st.session_state.auth.get("user_id")
         
@@ -9,13 +9,11 @@ import streamlit as st
 import logging
 import pandas as pd
 import matplotlib.pyplot as plt
-import time
 import traceback
 from typing import List, Dict, Any, Optional, Tuple, Callable
 from auth.badge_manager import BadgeManager
 from auth.mysql_auth import MySQLAuthManager
 from utils.language_utils import t, get_current_language
-from ui.components.animation import level_up_animation
 
 import plotly.express as px
 import plotly.graph_objects as go
@@ -528,8 +526,8 @@ class FeedbackSystem:
     
     def _update_user_statistics(self, state, latest_analysis):
         """
-        Update user statistics based on review performance.
-        Now with level-up animation.
+        Queue a user statistics update based on review performance.
+        The level-up animation plays once the update has been applied.
         
         Args:
             state: The workflow state
@@ -549,8 +547,9 @@ class FeedbackSystem:
                 logger.debug(f"{t('preparing_update_stats')}: {t('accuracy')}={accuracy:.1f}%, " + 
                         f"{t('score')}={identified_count} ({t('identified_count')}), key={stats_key}")
                 
-                # Update user stats with identified_count as score
-                result = self.auth_ui.update_review_stats(accuracy, identified_count)
+                # Queue the update; points, level and badges are applied in the
+                # background and show up on a later rerun (see AuthUI.collect_review_results)
+                result = self.auth_ui.enqueue_review_stats(accuracy, identified_count)
                     
                 # Store the update result for debugging
                 st.session_state[stats_key] = result
@@ -558,26 +557,7 @@ class FeedbackSystem:
                 
                 # Log the update result
                 if result and result.get("success", False):
-                    logger.debug(f"Successfully updated user statistics: {result}")
-                    
-                    # Add explicit UI message about the update
-                    #st.success(f"Statistics updated! Added {identified_count} to your score.")
-                    
-                    # Show level promotion message and animation if level changed
-                    if result.get("level_changed", False):
-                        old_level = result.get("old_level", "").capitalize()
-                        new_level = result.get("new_level", "").capitalize()
-                        
-                        # Import the animation function
-                        try:
-                            level_up_animation(old_level, new_level)
-                        except ImportError:
-                            # Fallback if animation module is not available
-                            st.balloons()  # Add visual celebration effect
-                            st.success(f"🎉 Congratulations! Your level has been upgraded from {old_level} to {new_level}!")
-                        
-                        # Give the database a moment to complete the update
-                        time.sleep(0.5)
+                    logger.debug(f"Queued user statistics update: {result}")
                 else:                 
                     logger.error(f"{t('failed_update_statistics')}:")
                     st.error(f"{t('failed_update_statistics')}:")
@@ -728,6 +708,31 @@ class FeedbackSystem:
             )
             st.plotly_chart(fig, use_container_width=True)
         
+        # Points per day from the daily rollup
+        history = badge_manager.get_activity_history(user_id, days=30)
+        if any(day["points"] for day in history):
+            fig = px.bar(
+                x=[day["date"] for day in history],
+                y=[day["points"] for day in history],
+                title="Points per Day (last 30 days)",
+                labels={"x": "Date", "y": "Points"},
+            )
+            fig.update_layout(height=300)
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Activity text is rendered from templates in the current language
+        activity = badge_manager.get_activity_log(user_id, limit=20)
+        if activity:
+            with st.expander(t("recent_activity")):
+                st.dataframe(
+                    [
+                        {"Date": entry["created_at"], "Activity": entry["details"], "Points": entry["points"]}
+                        for entry in activity
+                    ],
+                    hide_index=True,
+                    use_container_width=True,
+                )
+        
         # Create skill tree visualization
         st.subheader("🌳 Skill Tree")
         
@@ -6,6 +6,7 @@ import streamlit as st
 import logging
 from typing import Dict, Any, List
 from auth.badge_manager import BadgeManager
+from db.query_stats import query_stats
 from utils.language_utils import t, get_current_language
 
 logger = logging.getLogger(__name__)
@@ -25,10 +26,15 @@ class ProfileLeaderboardSidebar:
             # Extract user data
             display_name, level, reviews_completed, score = self._extract_user_data(user_info)
             
-            # Get user badges and rank
-            user_badges = self.badge_manager.get_user_badges(user_id)[:4]
-            user_rank_info = self.badge_manager.get_user_rank(user_id)
-            leaders = self.badge_manager.get_leaderboard_with_badges(8)
+            # Get user badges and rank; while the database is down render the
+            # profile from session data alone instead of waiting on every query
+            user_badges, user_rank_info, leaders, class_id = [], {}, [], ""
+            if self.badge_manager.db.is_available():
+                with query_stats.scope("sidebar"):
+                    class_id = self.badge_manager.get_user_class(user_id)
+                    user_badges = self.badge_manager.get_user_badges(user_id)[:4]
+                    user_rank_info = self.badge_manager.get_user_rank(user_id)
+                    leaders = self.badge_manager.get_leaderboard_with_badges(8, class_id)
             
             # Render profile section
             self._render_profile_section(display_name, level, reviews_completed, 
@@ -37,6 +43,8 @@ class ProfileLeaderboardSidebar:
             # Render leaderboard section with proper error handling
             if leaders:
                 self._render_leaderboard_section(leaders, user_id)
+                if self.badge_manager.db.is_available():
+                    self._render_full_standings(user_id, class_id)
             else:
                 st.info("No leaderboard data available")
                 
@@ -224,9 +232,6 @@ class ProfileLeaderboardSidebar:
             # Close container and add button
             footer_html = f'''
                 </div>
-                <button class="view-full-btn" onclick="alert('Feature coming soon!')">
-                    📊 {t('view_full_leaderboard')}
-                </button>
             </div>
             '''
             
@@ -234,8 +239,48 @@ class ProfileLeaderboardSidebar:
             
         except Exception as e:
             logger.error(f"Error rendering styled leaderboard: {str(e)}")
+
+    def _render_full_standings(self, user_id: str, class_id: str, page_size: int = 20) -> None:
+        """
+        Render the full standings of the user's class one keyset page at a time.
+        
+        The page position is kept in session state as the cursor the page was
+        read from, so paging costs the same on every page.
+        """
+        with st.expander(f"📊 {t('view_full_leaderboard')}"):
+            view = st.session_state.setdefault("standings_view", {"cursor": None, "backward": False, "around_me": False})
             
+            if view["around_me"]:
+                page = self.badge_manager.get_standings_around_user(user_id, page_size)
+            else:
+                page = self.badge_manager.get_standings_page(view["cursor"], page_size, view["backward"], class_id)
             
-    
-
-    
\ No newline at end of file
+            prev_col, me_col, next_col = st.columns(3)
+            if prev_col.button(t("previous_page"), key="standings_prev", disabled=page["prev_cursor"] is None):
+                view.update(cursor=page["prev_cursor"], backward=True, around_me=False)
+                st.rerun()
+            if me_col.button(t("jump_to_my_position"), key="standings_me"):
+                view.update(cursor=None, backward=False, around_me=True)
+                st.rerun()
+            if next_col.button(t("next_page"), key="standings_next", disabled=page["next_cursor"] is None):
+                view.update(cursor=page["next_cursor"], backward=False, around_me=False)
+                st.rerun()
+            
+            if not page["rows"]:
+                st.info(t("no_users_leaderboard"))
+                return
+            
+            st.dataframe(
+                [
+                    {
+                        t("rank"): row.get("rank") or "-",
+                        t("user"): ("➤ " if row["uid"] == user_id else "") + (row.get("display_name") or ""),
+                        t("level"): (row.get("level") or "").capitalize(),
+                        t("points"): row.get("total_points", 0),
+                        t("badges"): row.get("badge_count", 0),
+                    }
+                    for row in page["rows"]
+                ],
+                hide_index=True,
+                use_container_width=True,
+            )
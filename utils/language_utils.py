@@ -9,7 +9,9 @@ import streamlit as st
 import os
 import logging
 import sys
-from typing import Dict, Any, Optional
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
 
 # Add the parent directory to the path to allow absolute imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,6 +25,10 @@ from language import get_translations, get_llm_prompt_instructions, SUPPORTED_LA
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Per-thread language for code running outside a Streamlit script run, e.g.
+# background workers, which have no session state to read it from
+_override = threading.local()
+
 def init_language():
     """Initialize language selection in session state."""
     if "language" not in st.session_state:
@@ -48,8 +54,26 @@ def get_current_language() -> str:
     Returns:
         Current language code
     """
+    lang = getattr(_override, "language", None)
+    if lang is not None:
+        return lang
     return st.session_state.get("language", DEFAULT_LANGUAGE)
 
+@contextmanager
+def language_override(lang: Optional[str]) -> Iterator[None]:
+    """
+    Use a language on this thread instead of the session's, for the duration of the block.
+    
+    Args:
+        lang: Language code; unsupported or missing codes use the default language
+    """
+    previous = getattr(_override, "language", None)
+    _override.language = lang if lang in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE
+    try:
+        yield
+    finally:
+        _override.language = previous
+
 def t(key: str) -> str:
     """
     Translate a text key to the current language.
@@ -290,14 +290,8 @@ class WorkflowManager:
                                             if category in category_stats:
                                                 category_stats[category]["identified"] += 1
                                 
-                                # Update stats for each category
-                                for category, stats in category_stats.items():
-                                    badge_manager.update_category_stats(
-                                        user_id,
-                                        category,
-                                        stats["encountered"],
-                                        stats["identified"]
-                                    )
+                                # Update stats for all categories in one batched statement
+                                badge_manager.update_category_stats_batch(user_id, category_stats)
                         except ImportError:
                             logger.warning("Badge manager not available")
                         except Exception as e: